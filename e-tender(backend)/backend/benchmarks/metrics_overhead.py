@@ -0,0 +1,56 @@
+"""
+Overhead of `MetricsMiddleware` per request.
+
+Calls a no-op ASGI app directly and through the middleware --requests times
+each, on a scope that already carries a matched route, and reports the
+difference per request. Run from e-tender(backend):
+
+    python -m backend.benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.routing import Route
+
+from ..http_metrics import MetricsMiddleware, MetricsRegistry
+
+BODY = b'{"ok": true}'
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+async def _send(message):
+    pass
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def time_app(app, requests: int) -> float:
+    route = Route("/api/v1/tenders/{tender_id}", noop_app)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "route": route}, _receive, _send)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    bare = asyncio.run(time_app(noop_app, args.requests))
+    measured = asyncio.run(time_app(MetricsMiddleware(noop_app, MetricsRegistry()), args.requests))
+    overhead_us = (measured - bare) / args.requests * 1e6
+    print(f"bare      {bare / args.requests * 1e6:6.2f} us/request")
+    print(f"metrics   {measured / args.requests * 1e6:6.2f} us/request")
+    print(f"overhead  {overhead_us:6.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
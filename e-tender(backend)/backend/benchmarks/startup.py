@@ -0,0 +1,124 @@
+"""
+Startup benchmark: import time and cold start of one worker.
+
+* import  - a fresh interpreter runs `import backend.main`; measured inside
+            the child, so interpreter start-up is excluded.
+* cold    - spawn `uvicorn backend.main:app` and poll `/` until it answers
+            200; measured from spawn, so it covers interpreter start-up,
+            imports and the lifespan hook.
+
+Each is repeated --runs times and the median / max reported. Exits non-zero
+if the median cold start exceeds --target seconds. Mapper configuration and
+the jose / passlib imports are deferred to first use (`models.LazyOptions`,
+`security.py`); most of what remains is importing FastAPI, SQLAlchemy and
+pydantic, declaring the models and schemas, and FastAPI building the
+response models of every route. Run from e-tender(backend):
+
+    python -m backend.benchmarks.startup --runs 5 --target 1.0
+    python -m backend.benchmarks.startup --top 15   # slowest imports (-X importtime)
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import backend.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    # The scheduler starts in a background thread, but keep its DB work out of the numbers
+    env.setdefault("TENDER_SCHEDULER_ENABLED", "0")
+    return env
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=APP_ROOT, env=_env(),
+        check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_cold_start(timeout: float = 30.0) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_ROOT, env=_env()
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"worker not ready after {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def slowest_imports(top: int) -> List[str]:
+    """The `top` modules with the largest cumulative import time."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=APP_ROOT, env=_env(), check=True, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    return [f"{cumulative / 1000:8.1f} ms {self_us / 1000:8.1f} ms  {name}" for cumulative, self_us, name in rows[:top]]
+
+
+def _report(label: str, samples: List[float]) -> float:
+    median = statistics.median(samples)
+    print(f"{label:<8} median {median * 1000:7.1f} ms   max {max(samples) * 1000:7.1f} ms   ({len(samples)} runs)")
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=1.0, help="max median cold start, in seconds")
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    _report("import", [measure_import() for _ in range(args.runs)])
+    cold = _report("cold", [measure_cold_start() for _ in range(args.runs)])
+
+    if args.top:
+        print(f"\n{'cumulative':>11} {'self':>11}  module")
+        for line in slowest_imports(args.top):
+            print(line)
+
+    if cold > args.target:
+        sys.exit(f"cold start {cold:.2f}s is over the {args.target:.2f}s target")
+
+
+if __name__ == "__main__":
+    main()
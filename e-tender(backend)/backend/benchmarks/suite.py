@@ -0,0 +1,258 @@
+"""
+Endpoint benchmark suite with regression check.
+
+Drives the real app (every router, the auth dependencies and middleware
+included) over an in-process ASGI transport against a database filled by
+`synthetic.py`, sending --requests requests per endpoint from --concurrency
+clients, and reports throughput and p50/p95/p99 latency per endpoint.
+
+--save-baseline writes the results to a JSON file; --baseline compares a run
+against one and exits non-zero if any endpoint's p95 grew, or its throughput
+fell, by more than --tolerance. Run from e-tender(backend):
+
+    python -m backend.benchmarks.suite --scale small --save-baseline bench-baseline.json
+    python -m backend.benchmarks.suite --scale small --baseline bench-baseline.json
+    python -m backend.benchmarks.suite --url mysql+pymysql://root@localhost/tender_bench --requests 500
+
+Without --url a fresh SQLite file is generated at --scale. Only read and
+idempotent endpoints are driven so every run sees the same data; login
+(bcrypt) and statement reconciliation (a CSV with no matching payments)
+stand in for the write paths.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine, select
+
+# synthetic.py imports the models, and with them the database module, which
+# builds the app's engines from DATABASE_URL on import: it is imported lazily,
+# once main() has pointed DATABASE_URL at the benchmark database.
+SCALE_NAMES = ("small", "medium", "large")
+
+STATEMENT_CSV = b"transaction_id,amount\nBENCH-NO-MATCH-1,100.00\nBENCH-NO-MATCH-2,250.00\n"
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    role: Optional[str] = None  # admin / department / vendor, None for public
+    params: Dict = field(default_factory=dict)
+    data: Optional[Dict] = None
+    files: Optional[Dict] = None
+
+
+def endpoints(ids: Dict) -> List[Endpoint]:
+    from .synthetic import PASSWORD
+
+    tender, bid, dept = ids["tender_id"], ids["bid_id"], ids["dept_id"]
+    return [
+        Endpoint("auth.login", "POST", "/api/v1/auth/login", data={"username": ids["vendor"], "password": PASSWORD}),
+        Endpoint("auth.me", "GET", "/api/v1/auth/me", "admin"),
+        Endpoint("auth.vendor_me", "GET", "/api/v1/auth/vendor/me", "vendor"),
+        Endpoint("departments.list", "GET", "/api/v1/departments/", "admin"),
+        Endpoint("departments.my_institute", "GET", "/api/v1/departments/my-institute", "department"),
+        Endpoint("departments.current", "GET", "/api/v1/departments/current", "department"),
+        Endpoint("categories.list", "GET", "/api/v1/tender-categories/"),
+        Endpoint("tenders.all", "GET", "/api/v1/tenders/all"),
+        Endpoint("tenders.institute", "GET", "/api/v1/tenders/institute", "admin"),
+        Endpoint("tenders.department", "GET", f"/api/v1/tenders/department/{dept}", "admin"),
+        Endpoint("tenders.my_department", "GET", "/api/v1/tenders/my-department", "department"),
+        Endpoint("tenders.history", "GET", f"/api/v1/tenders/{tender}/history", "admin"),
+        Endpoint("tenders.opening_report", "GET", f"/api/v1/tenders/{tender}/opening-report", "admin"),
+        Endpoint("tenders.clarifications", "GET", f"/api/v1/tenders/{tender}/clarifications"),
+        Endpoint("bids.list", "GET", "/api/v1/bids/", "vendor"),
+        Endpoint("bids.get", "GET", f"/api/v1/bids/{bid}", "vendor"),
+        Endpoint("bids.history", "GET", f"/api/v1/bids/{bid}/history", "vendor"),
+        Endpoint("bids.documents", "GET", f"/api/v1/bids/{bid}/documents/", "vendor"),
+        Endpoint("awards.list", "GET", "/api/v1/awards/", "admin"),
+        Endpoint("notifications.list", "GET", "/api/v1/notifications/", "vendor"),
+        Endpoint("notifications.unread_count", "GET", "/api/v1/notifications/unread-count", "vendor"),
+        Endpoint("analytics.category", "GET", "/api/v1/analytics/", "admin", {"group_by": "category"}),
+        Endpoint("analytics.month", "GET", "/api/v1/analytics/", "admin", {"group_by": "month"}),
+        Endpoint("payments.reconcile", "POST", "/api/v1/payments/reconcile", "admin",
+                 files={"file": ("statement.csv", STATEMENT_CSV, "text/csv")}),
+        Endpoint("system.pool", "GET", "/api/v1/system/pool", "admin"),
+        Endpoint("system.metrics", "GET", "/metrics"),
+    ]
+
+
+def pick_ids(url: str) -> Dict:
+    """An institute-1 tender with bids, one of its bids, and the accounts that can see them."""
+    from .. import models
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        tender_id, dept_id, bid_id, vendor_id = conn.execute(
+            select(models.Tender.tender_id, models.Tender.dept_id, models.Bid.bid_id, models.Bid.vendor_id)
+            .join(models.Bid, models.Bid.tender_id == models.Tender.tender_id)
+            .join(models.Department, models.Department.dept_id == models.Tender.dept_id)
+            .where(models.Department.institute_id == 1)
+            .order_by(models.Tender.tender_id, models.Bid.bid_id)
+            .limit(1)
+        ).one()
+        dept_username = conn.execute(
+            select(models.Department.username).where(models.Department.dept_id == dept_id)
+        ).scalar_one()
+        vendor_username = conn.execute(
+            select(models.User.username).join(models.Vendor, models.Vendor.user_id == models.User.user_id)
+            .where(models.Vendor.vendor_id == vendor_id)
+        ).scalar_one()
+    engine.dispose()
+    return {"tender_id": tender_id, "dept_id": dept_id, "bid_id": bid_id,
+            "admin": "admin-1", "department": dept_username, "vendor": vendor_username}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def login(client: httpx.AsyncClient, username: str) -> Dict[str, str]:
+    from .synthetic import PASSWORD
+
+    response = await client.post("/api/v1/auth/login", data={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def measure(client: httpx.AsyncClient, endpoint: Endpoint, headers: Dict, requests: int,
+                  concurrency: int, warmup: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+
+    async def drive(total: int, record: bool) -> None:
+        remaining = total
+
+        async def one() -> None:
+            nonlocal errors, remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await client.request(
+                    endpoint.method, endpoint.path, headers=headers, params=endpoint.params,
+                    data=endpoint.data, files=endpoint.files
+                )
+                if not record:
+                    continue
+                if response.is_success:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+
+    await drive(warmup, record=False)
+    started = time.perf_counter()
+    await drive(requests, record=True)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else 0.0,
+    }
+
+
+async def run(app, ids: Dict, args) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)  # 500s count as errors
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        tokens = {role: await login(client, ids[role]) for role in ("admin", "department", "vendor")}
+        print(f"{'endpoint':<26}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for endpoint in endpoints(ids):
+            if args.only and not any(endpoint.name.startswith(prefix) for prefix in args.only):
+                continue
+            result = await measure(
+                client, endpoint, tokens.get(endpoint.role, {}), args.requests, args.concurrency, args.warmup
+            )
+            results[endpoint.name] = result
+            print(
+                f"{endpoint.name:<26}{result['requests']:>9}{result['errors']:>8}{result['rps']:>10.1f}"
+                f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+            )
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Endpoints whose p95 rose or throughput fell by more than `tolerance` (a fraction)."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        if base["rps"] and result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {base['rps']:.1f} -> {result['rps']:.1f} req/s")
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: {base.get('errors', 0)} -> {result['errors']} errors")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="sync SQLAlchemy URL of a database filled by synthetic.py")
+    parser.add_argument("--scale", choices=SCALE_NAMES, default="small", help="scale to generate without --url")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="endpoint name prefixes to run, e.g. tenders bids.list")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 / throughput change, as a fraction")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="etender-suite-")
+    url = args.url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    os.environ["TENDER_SCHEDULER_ENABLED"] = "0"
+
+    from .synthetic import SCALES, generate
+
+    if not args.url:
+        print(f"generating '{args.scale}' data set in {url}")
+        generate(url, SCALES[args.scale], args.seed)
+    app = importlib.import_module("backend.main").app
+    ids = pick_ids(url)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_path = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    os.chdir(workdir)  # uploads/ and reconciliation reports land here
+
+    results = asyncio.run(run(app, ids, args))
+
+    if save_path:
+        meta = {"url": url.split("@")[-1], "scale": None if args.url else args.scale, "seed": args.seed,
+                "requests": args.requests, "concurrency": args.concurrency}
+        with open(save_path, "w") as f:
+            json.dump({"meta": meta, "endpoints": results}, f, indent=2, sort_keys=True)
+        print(f"baseline written to {save_path}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)["endpoints"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions over {args.tolerance:.0%} against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Seeded synthetic data set for benchmarks.
+
+Generates institutes (one admin each), departments, categories, vendors,
+tenders in every lifecycle state, tender and bid documents, bids and awards
+at a configurable scale, written with chunked core INSERTs so a million bids
+never sit in memory. The same `--seed` always produces the same rows.
+Version-1 history rows and the analytics rollups, which the ORM listeners
+would normally maintain, are filled in set-based at the end.
+
+Every account's password is `PASSWORD`; the runner logs in as
+`admin-1`, `dept-1-1` and `vendor-1`. Run from e-tender(backend):
+
+    python -m backend.benchmarks.synthetic --url sqlite:////tmp/bench.db --scale medium
+    python -m backend.benchmarks.synthetic --url mysql+pymysql://root@localhost/tender_bench --scale large
+"""
+import argparse
+import random
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import DateTime, create_engine, insert, literal, select
+from sqlalchemy.orm import sessionmaker
+
+from .. import history, models, security
+from ..services.analytics import rebuild_rollups
+
+PASSWORD = "bench-password"
+CHUNK_SIZE = 5000
+
+VENDOR_ROLE_ID = 1
+ADMIN_ROLE_ID = 2
+
+# Share of tenders in each state, in generation order
+STATUS_MIX = (
+    (models.TenderStatus.DRAFT, 0.10),
+    (models.TenderStatus.OPEN, 0.40),
+    (models.TenderStatus.CLOSED, 0.25),
+    (models.TenderStatus.AWARDED, 0.25),
+)
+
+
+@dataclass
+class Scale:
+    institutes: int
+    departments_per_institute: int
+    tenders_per_department: int
+    bids_per_tender: int
+    vendors: int
+    categories: int = 20
+    documents_per_tender: int = 2
+    documents_per_bid: int = 1
+
+    @property
+    def tenders(self) -> int:
+        return self.institutes * self.departments_per_institute * self.tenders_per_department
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(institutes=5, departments_per_institute=2, tenders_per_department=5, bids_per_tender=5, vendors=20),
+    "medium": Scale(institutes=50, departments_per_institute=3, tenders_per_department=10, bids_per_tender=8, vendors=500),
+    # 1k institutes, 100k tenders, ~1M bids (drafts get none)
+    "large": Scale(institutes=1000, departments_per_institute=5, tenders_per_department=20, bids_per_tender=11, vendors=5000),
+}
+
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(conn, model, rows: Iterable[Dict]) -> int:
+    count = 0
+    for chunk in _chunks(rows, CHUNK_SIZE):
+        conn.execute(insert(model), chunk)
+        count += len(chunk)
+    return count
+
+
+def _status_for(index: int, total: int) -> models.TenderStatus:
+    position, cumulative = index / max(total, 1), 0.0
+    for status, share in STATUS_MIX:
+        cumulative += share
+        if position < cumulative:
+            return status
+    return STATUS_MIX[-1][0]
+
+
+class _Generator:
+    def __init__(self, scale: Scale, seed: int):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.hashed_password = security.get_password_hash(PASSWORD)
+
+    # ids: admins are users 1..I, vendor users follow
+    def vendor_user_id(self, vendor_id: int) -> int:
+        return self.scale.institutes + vendor_id
+
+    def dept_id(self, institute_id: int, n: int) -> int:
+        return (institute_id - 1) * self.scale.departments_per_institute + n
+
+    def users(self) -> Iterator[Dict]:
+        for i in range(1, self.scale.institutes + 1):
+            yield {"user_id": i, "username": f"admin-{i}", "email": f"admin-{i}@bench.example.com",
+                   "hashed_password": self.hashed_password}
+        for v in range(1, self.scale.vendors + 1):
+            yield {"user_id": self.vendor_user_id(v), "username": f"vendor-{v}", "email": f"vendor-{v}@bench.example.com",
+                   "hashed_password": self.hashed_password}
+
+    def user_roles(self) -> Iterator[Dict]:
+        for i in range(1, self.scale.institutes + 1):
+            yield {"user_id": i, "role_id": ADMIN_ROLE_ID}
+        for v in range(1, self.scale.vendors + 1):
+            yield {"user_id": self.vendor_user_id(v), "role_id": VENDOR_ROLE_ID}
+
+    def institutes(self) -> Iterator[Dict]:
+        for i in range(1, self.scale.institutes + 1):
+            yield {"institute_id": i, "institute_name": f"Institute {i}", "contact_email": f"institute-{i}@bench.example.com",
+                   "user_id": i, "verification_status": models.VerificationStatus.VERIFIED}
+
+    def departments(self) -> Iterator[Dict]:
+        for i in range(1, self.scale.institutes + 1):
+            for n in range(1, self.scale.departments_per_institute + 1):
+                yield {"dept_id": self.dept_id(i, n), "dept_name": f"Department {n}", "institute_id": i,
+                       "username": f"dept-{i}-{n}", "hashed_password": self.hashed_password}
+
+    def categories(self) -> Iterator[Dict]:
+        for c in range(1, self.scale.categories + 1):
+            yield {"category_id": c, "category_name": f"Category {c}"}
+
+    def vendors(self) -> Iterator[Dict]:
+        for v in range(1, self.scale.vendors + 1):
+            yield {"vendor_id": v, "company_name": f"Vendor {v}", "user_id": self.vendor_user_id(v),
+                   "verification_status": models.VerificationStatus.VERIFIED}
+
+    def tenders(self) -> Iterator[Tuple[Dict, models.TenderStatus]]:
+        total, rng = self.scale.tenders, self.rng
+        for t in range(1, total + 1):
+            status = _status_for(t - 1, total)
+            published = self.now - timedelta(days=rng.randint(1, 365))
+            if status in (models.TenderStatus.DRAFT, models.TenderStatus.OPEN):
+                deadline = self.now + timedelta(days=rng.randint(1, 60))
+            else:
+                deadline = published + timedelta(days=rng.randint(1, 30))
+            yield {
+                "tender_id": t, "tender_number": f"BENCH-{t:07d}", "title": f"Synthetic tender {t}",
+                "description": "Generated for benchmarking.", "estimated_cost": float(rng.randint(10, 5000) * 1000),
+                "submission_deadline": deadline, "publish_date": published, "status": status,
+                "is_checked": status != models.TenderStatus.DRAFT, "is_deleted": False, "version": 1,
+                "dept_id": (t - 1) // self.scale.tenders_per_department + 1,
+                "category_id": rng.randint(1, self.scale.categories),
+            }, status
+
+    def tender_documents(self) -> Iterator[Dict]:
+        for t in range(1, self.scale.tenders + 1):
+            for d in range(1, self.scale.documents_per_tender + 1):
+                yield {"tender_id": t, "document_name": f"tender-{t}-{d}.pdf",
+                       "file_path": f"uploads/tender_docs/tender-{t}-{d}.pdf"}
+
+    def bids(self, tenders: List[Tuple[int, models.TenderStatus, float, datetime]]):
+        """Bids, bid documents and awards, in FK order, for the (id, status, cost, published) tenders."""
+        rng, bid_id = self.rng, 0
+        bid_rows, document_rows, award_rows = [], [], []
+        per_tender = min(self.scale.bids_per_tender, self.scale.vendors)
+        for tender_id, status, cost, published in tenders:
+            if status == models.TenderStatus.DRAFT:
+                continue
+            best = None
+            for vendor_id in rng.sample(range(1, self.scale.vendors + 1), per_tender):
+                bid_id += 1
+                amount = round(cost * rng.uniform(0.8, 1.2), 2)
+                bid_rows.append({
+                    "bid_id": bid_id, "tender_id": tender_id, "vendor_id": vendor_id, "bid_amount": amount,
+                    "submission_date": published + timedelta(hours=rng.randint(1, 240)),
+                    "bid_status": models.BidStatus.SUBMITTED, "is_deleted": False, "version": 1,
+                })
+                for d in range(1, self.scale.documents_per_bid + 1):
+                    document_rows.append({"bid_id": bid_id, "document_name": f"bid-{bid_id}-{d}.pdf",
+                                          "file_path": f"uploads/bid_docs/bid-{bid_id}-{d}.pdf"})
+                if best is None or amount < best["bid_amount"]:
+                    best = bid_rows[-1]
+            if status == models.TenderStatus.AWARDED and best is not None:
+                best["bid_status"] = models.BidStatus.AWARDED
+                award_date = best["submission_date"] + timedelta(days=rng.randint(1, 30))
+                award_rows.append({"bid_id": best["bid_id"], "award_date": award_date, "is_deleted": False,
+                                   "contract_start_date": award_date, "contract_end_date": award_date + timedelta(days=365)})
+            if len(bid_rows) >= CHUNK_SIZE:
+                yield bid_rows, document_rows, award_rows
+                bid_rows, document_rows, award_rows = [], [], []
+        if bid_rows:
+            yield bid_rows, document_rows, award_rows
+
+
+def _backfill_history(conn, when: datetime) -> None:
+    """Version-1 history rows for every tender and bid, one INSERT ... SELECT per table."""
+    for model, (history_model, key, fields) in history.TRACKED.items():
+        conn.execute(insert(history_model).from_select(
+            ["version", "changed_at", "changed_fields", key, *fields],
+            select(
+                literal(1), literal(when, type_=DateTime), literal(",".join(fields)),
+                getattr(model, key), *[getattr(model, name) for name in fields]
+            )
+        ))
+
+
+def generate(url: str, scale: Scale, seed: int = 42, create_schema: bool = True) -> Dict[str, int]:
+    """Fill an empty database at `url` and return row counts per table."""
+    engine = create_engine(url)
+    if create_schema:
+        models.Base.metadata.create_all(engine)
+    generator = _Generator(scale, seed)
+    counts: Dict[str, int] = {}
+    tenders: List[Tuple[int, models.TenderStatus, float, datetime]] = []
+
+    def tender_rows():
+        for row, status in generator.tenders():
+            tenders.append((row["tender_id"], status, row["estimated_cost"], row["publish_date"]))
+            yield row
+
+    with engine.begin() as conn:
+        counts["roles"] = _insert(conn, models.Role, [
+            {"role_id": VENDOR_ROLE_ID, "role_name": "VENDOR"},
+            {"role_id": ADMIN_ROLE_ID, "role_name": "INSTITUTE_ADMIN"},
+        ])
+        counts["users"] = _insert(conn, models.User, generator.users())
+        counts["user_roles"] = _insert(conn, models.UserRole, generator.user_roles())
+        counts["institutes"] = _insert(conn, models.Institute, generator.institutes())
+        counts["departments"] = _insert(conn, models.Department, generator.departments())
+        counts["categories"] = _insert(conn, models.TenderCategory, generator.categories())
+        counts["vendors"] = _insert(conn, models.Vendor, generator.vendors())
+        counts["tenders"] = _insert(conn, models.Tender, tender_rows())
+        counts["tender_documents"] = _insert(conn, models.TenderDocument, generator.tender_documents())
+
+    counts.update(bids=0, bid_documents=0, awards=0)
+    for bid_rows, document_rows, award_rows in generator.bids(tenders):
+        # One transaction per chunk keeps the undo log small at 1M rows
+        with engine.begin() as conn:
+            counts["bids"] += _insert(conn, models.Bid, bid_rows)
+            counts["bid_documents"] += _insert(conn, models.BidDocument, document_rows)
+            counts["awards"] += _insert(conn, models.Award, award_rows)
+
+    with engine.begin() as conn:
+        _backfill_history(conn, generator.now)
+    with sessionmaker(bind=engine)() as db:
+        rebuild_rollups(db)
+    engine.dispose()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="sync SQLAlchemy URL of an empty database")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--institutes", type=int, help="override the preset")
+    parser.add_argument("--bids-per-tender", type=int, help="override the preset")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    if args.institutes:
+        scale = replace(scale, institutes=args.institutes)
+    if args.bids_per_tender:
+        scale = replace(scale, bids_per_tender=args.bids_per_tender)
+
+    print(f"scale {asdict(scale)}: {scale.tenders} tenders")
+    started = time.perf_counter()
+    counts = generate(args.url, scale, args.seed)
+    print(", ".join(f"{table} {count}" for table, count in counts.items()))
+    print(f"generated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Negotiated response compression.
+
+`CompressionMiddleware` compresses text-like responses (JSON, CSV, text,
+XML, JavaScript) with brotli or gzip, whichever the client's
+Accept-Encoding prefers (brotli wins ties). Brotli needs the optional
+`brotli` package; without it only gzip is offered.
+
+* Bodies smaller than `COMPRESSION_MIN_SIZE` bytes go out as they are.
+* Complete bodies are compressed in one go, on a worker thread when larger
+  than `OFFLOAD_SIZE` so a multi-megabyte tender listing does not stall
+  the event loop (zlib and brotli release the GIL).
+* Streamed bodies (`StreamingResponse`, `FileResponse` exports) are
+  compressed chunk by chunk and flushed after each chunk, so the client
+  keeps receiving data.
+
+Levels: `COMPRESSION_GZIP_LEVEL` (1-9, default 6) and
+`COMPRESSION_BROTLI_QUALITY` (0-11, default 4 - close to gzip 6 in speed,
+smaller output). `benchmarks/compression.py` measures both on tender
+payloads.
+"""
+import gzip
+import os
+import zlib
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Complete bodies at least this large are compressed off the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+# Server-sent events are tiny, long-lived frames; compressing them only adds latency
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick "br", "gzip" or None from an Accept-Encoding header, honouring q-values."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class StreamCompressor:
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        self.coding = coding
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, coding: str, gzip_level: int = COMPRESSION_GZIP_LEVEL,
+             brotli_quality: int = COMPRESSION_BROTLI_QUALITY) -> bytes:
+    if coding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, gzip_level: int = COMPRESSION_GZIP_LEVEL,
+                 brotli_quality: int = COMPRESSION_BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, coding, send).run(scope, receive)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: str, send):
+        self.middleware = middleware
+        self.app = middleware.app
+        self.coding = coding
+        self.send = send
+        self.start_message = None
+        self.compressor: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def run(self, scope, receive) -> None:
+        await self.app(scope, receive, self.on_message)
+
+    def _wants_compression(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or content_type.startswith(UNCOMPRESSED_TYPES):
+            return False
+        length = headers.get("content-length")
+        return length is None or int(length) >= self.middleware.minimum_size
+
+    def _encoded_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["content-encoding"] = self.coding
+        headers.add_vary_header("accept-encoding")
+        return headers
+
+    async def on_message(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=list(message.get("headers", [])))
+            message["headers"] = headers.raw
+            self.passthrough = not self._wants_compression(headers)
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and not more_body:
+            # Whole body in one message
+            if len(body) < self.middleware.minimum_size:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            if len(body) >= OFFLOAD_SIZE:
+                compressed = await run_in_threadpool(
+                    compress, body, self.coding, self.middleware.gzip_level, self.middleware.brotli_quality
+                )
+            else:
+                compressed = compress(body, self.coding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers = self._encoded_headers()
+            headers["content-length"] = str(len(compressed))
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.compressor is None:
+            # First chunk of a streamed body
+            self.compressor = StreamCompressor(self.coding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers = self._encoded_headers()
+            del headers["content-length"]
+            await self.send(self.start_message)
+
+        data = self.compressor.chunk(body) if body else b""
+        if not more_body:
+            data += self.compressor.finish()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
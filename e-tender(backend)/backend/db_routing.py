@@ -0,0 +1,69 @@
+"""
+Primary / read-replica routing.
+
+`get_db` and `get_async_db` hand GET and HEAD requests a session on the
+replica and everything else a session on the primary. Replicas lag, so a
+client that just wrote is pinned to the primary for a short read-your-writes
+window: `ReadYourWritesMiddleware` answers every successful write with a
+`db_primary_until` cookie and an `X-DB-Primary-Until` header (a unix
+timestamp), and reads carrying either one before it expires go to the
+primary. Clients that cannot send cookies (e.g. a cross-origin SPA without
+credentials) can echo the header instead.
+"""
+import os
+import time
+
+from starlette.requests import Request
+
+# How long a client reads from the primary after its last write, in seconds
+READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+PIN_COOKIE = "db_primary_until"
+PIN_HEADER = "x-db-primary-until"
+
+READ_METHODS = {"GET", "HEAD"}
+# Methods that never pin (CORS preflights included)
+SAFE_METHODS = READ_METHODS | {"OPTIONS"}
+
+
+def _pinned_until(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def use_replica(request: Request) -> bool:
+    """True if this request may be served from the replica."""
+    if request.method not in READ_METHODS:
+        return False
+    until = max(
+        _pinned_until(request.cookies.get(PIN_COOKIE)),
+        _pinned_until(request.headers.get(PIN_HEADER)),
+    )
+    return until < time.time()
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary for a while after each successful write."""
+
+    def __init__(self, app, window_seconds: int = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = str(int(time.time()) + self.window_seconds + 1)
+                cookie = f"{PIN_COOKIE}={until}; Max-Age={self.window_seconds}; Path=/; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1")),
+                    (PIN_HEADER.encode("latin-1"), until.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
@@ -0,0 +1,144 @@
+"""
+Append-only change history for tenders and bids.
+
+A `before_flush` listener on every Session turns inserts and updates of
+`Tender` / `Bid` into `TenderHistory` / `BidHistory` rows in the same flush,
+so they go out in the same batched INSERT as any other pending rows.
+Version 1 is a full snapshot; later versions only carry the fields that
+changed, listed in `changed_fields`. Versions are bumped in SQL
+(`version = version + 1`) and the history row reads the bumped value back,
+so two transactions updating the same row get consecutive versions instead
+of both writing the one after the version they loaded.
+
+Bulk `UPDATE` statements bypass the ORM, so set-based code paths use
+`bulk_update_with_history`, which writes the history rows with a single
+INSERT ... SELECT before applying the update.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Model -> (history model, foreign key on the history row, mirrored fields)
+TRACKED = {
+    models.Tender: (
+        models.TenderHistory,
+        "tender_id",
+        ("title", "description", "estimated_cost", "submission_deadline", "status", "is_checked"),
+    ),
+    models.Bid: (
+        models.BidHistory,
+        "bid_id",
+        ("bid_amount", "bid_status"),
+    ),
+}
+
+
+def _changed_fields(obj, fields: Iterable[str]) -> List[str]:
+    state = inspect(obj)
+    return [name for name in fields if state.attrs[name].history.has_changes()]
+
+
+def _initial_value(obj, name: str):
+    """Attribute value of a pending object, falling back to the column's scalar default."""
+    value = getattr(obj, name)
+    if value is None:
+        default = obj.__table__.c[name].default
+        if default is not None and default.is_scalar:
+            value = default.arg
+    return value
+
+
+@event.listens_for(Session, "before_flush")
+def _record_history(session: Session, flush_context, instances) -> None:
+    now = datetime.utcnow()
+
+    for obj in list(session.new):
+        spec = TRACKED.get(type(obj))
+        if not spec:
+            continue
+        history_model, _, fields = spec
+        obj.version = 1
+        entry = history_model(
+            version=1,
+            changed_at=now,
+            changed_fields=",".join(fields),
+            **{name: _initial_value(obj, name) for name in fields}
+        )
+        # Set through the relationship so the FK is filled after the parent INSERT
+        obj.history.append(entry)
+
+    for obj in list(session.dirty):
+        spec = TRACKED.get(type(obj))
+        if not spec or not session.is_modified(obj, include_collections=False):
+            continue
+        history_model, fk, fields = spec
+        changed = _changed_fields(obj, fields)
+        if not changed:
+            continue
+        model, row_id = type(obj), inspect(obj).identity[0]
+        # The history row is inserted after the UPDATE in the same flush
+        # (it depends on the parent), so the subquery sees the bumped version
+        obj.version = model.version + 1
+        session.add(history_model(
+            version=select(model.version).where(getattr(model, fk) == row_id).scalar_subquery(),
+            changed_at=now,
+            changed_fields=",".join(changed),
+            **{fk: row_id},
+            **{name: getattr(obj, name) for name in changed}
+        ))
+
+
+def bulk_update_with_history(db: Session, model, where: list, values: Dict) -> int:
+    """
+    Set-based UPDATE of tracked rows that still records history.
+
+    `where` is the list of criteria selecting the rows and `values` the new
+    column values. History rows are written with INSERT ... SELECT using the
+    same criteria, then the rows are updated and their version bumped.
+    Returns the number of rows the UPDATE matched.
+    Soft-deleted rows are left alone: the global soft-delete criteria only
+    apply to SELECTs (see soft_delete.py), so the filter is added here.
+    """
+    history_model, fk, fields = TRACKED[model]
+    if issubclass(model, models.SoftDeleteMixin):
+        where = [*where, model.is_deleted == False]
+    changed = [name for name in fields if name in values]
+    if not changed:
+        return db.execute(
+            update(model).where(*where).values(**values).execution_options(synchronize_session=False)
+        ).rowcount
+
+    history_table = history_model.__table__
+    columns = ["version", "changed_at", "changed_fields", fk] + changed
+    source = select(
+        model.version + 1,
+        literal(datetime.utcnow(), type_=history_table.c.changed_at.type),
+        literal(",".join(changed), type_=history_table.c.changed_fields.type),
+        getattr(model, fk),
+        *[literal(values[name], type_=history_table.c[name].type) for name in changed]
+    ).where(*where)
+    db.execute(insert(history_table).from_select(columns, source))
+
+    return db.execute(
+        update(model)
+        .where(*where)
+        .values(**values, version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def reconstruct(rows: Iterable) -> Optional[Dict]:
+    """Fold history rows (ordered by version) into the snapshot of the last one."""
+    snapshot = None
+    for row in rows:
+        if snapshot is None:
+            snapshot = {}
+        for name in row.changed_fields.split(","):
+            snapshot[name] = getattr(row, name)
+        snapshot["version"] = row.version
+        snapshot["changed_at"] = row.changed_at
+    return snapshot
@@ -0,0 +1,190 @@
+"""
+Per-route HTTP metrics in Prometheus text format.
+
+`MetricsMiddleware` is a pure ASGI middleware that records, per method and
+route template (`/api/v1/tenders/{tender_id}`, never the raw path, so label
+cardinality stays bounded), the request count by status code, a latency
+histogram and a response size histogram, plus a process-wide in-flight gauge.
+Requests that match no route are counted under `UNMATCHED_ROUTE`.
+
+The middleware runs on the event loop, so counters are plain ints updated
+without locks; recording a request is a dict lookup, two bisects and a few
+increments (under two microseconds, see `benchmarks/metrics_overhead.py`).
+`render()` produces the `/metrics` payload, connection-pool stats included.
+Each worker process keeps its own registry; scrape every worker.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from .pool_metrics import pool_metrics
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Upper bounds of the latency histogram, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the response size histogram, in bytes
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class RouteStats:
+    __slots__ = ("statuses", "latency_buckets", "latency_sum", "size_buckets", "size_sum")
+
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last one is +Inf
+        self.latency_sum = 0.0
+        self.size_buckets = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        stats.latency_sum += seconds
+        stats.size_buckets[bisect_left(SIZE_BUCKETS, size)] += 1
+        stats.size_sum += size
+
+    def reset(self) -> None:
+        self.routes.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and records it against the route that handled it."""
+
+    def __init__(self, app, registry: MetricsRegistry = REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_and_measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            # Set by the router on the shared scope once a route matched
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            registry.observe(scope["method"], route, status, elapsed, size)
+
+
+# --- Prometheus text exposition ---
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histogram(lines: List[str], name: str, labels: str, bounds, counts, total) -> None:
+    cumulative = 0
+    for bound, count in zip([str(b) for b in bounds] + ["+Inf"], counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {total}")
+    lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+def render_http(registry: MetricsRegistry, lines: List[str]) -> None:
+    routes = sorted(registry.routes.items())
+
+    _header(lines, "http_requests_in_flight", "gauge", "Requests currently being served.")
+    lines.append(f"http_requests_in_flight {registry.in_flight}")
+
+    _header(lines, "http_requests_total", "counter", "Requests by method, route and status code.")
+    for (method, route), stats in routes:
+        for status, count in sorted(stats.statuses.items()):
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}")
+
+    _header(lines, "http_request_duration_seconds", "histogram", "Request latency by method and route.")
+    for (method, route), stats in routes:
+        _histogram(
+            lines, "http_request_duration_seconds", _labels(method=method, route=route),
+            LATENCY_BUCKETS, stats.latency_buckets, stats.latency_sum
+        )
+
+    _header(lines, "http_response_size_bytes", "histogram", "Response body size by method and route.")
+    for (method, route), stats in routes:
+        _histogram(
+            lines, "http_response_size_bytes", _labels(method=method, route=route),
+            SIZE_BUCKETS, stats.size_buckets, stats.size_sum
+        )
+
+
+POOL_GAUGES = (
+    ("db_pool_size", "pool_size", "Configured pool size."),
+    ("db_pool_checked_out", "checked_out", "Connections currently checked out."),
+    ("db_pool_checked_in", "checked_in", "Idle connections in the pool."),
+    ("db_pool_overflow", "overflow", "Overflow connections currently open."),
+)
+POOL_COUNTERS = (
+    ("db_pool_checkouts_total", "checkouts", "Successful connection checkouts."),
+    ("db_pool_timeouts_total", "timeouts", "Checkouts that timed out waiting for a connection."),
+    ("db_pool_slow_checkouts_total", "slow_checkouts", "Checkouts over the slow threshold."),
+    ("db_pool_waits_total", "waits", "Checkouts that found the pool exhausted."),
+    ("db_pool_wait_seconds_total", "wait_seconds", "Time spent waiting on an exhausted pool."),
+)
+
+
+def render_pool(snapshots: List[Dict], lines: List[str]) -> None:
+    for name, key, help_text in POOL_GAUGES:
+        _header(lines, name, "gauge", help_text)
+        for snapshot in snapshots:
+            lines.append(f"{name}{{{_labels(pool=snapshot['name'])}}} {snapshot[key]}")
+    for name, key, help_text in POOL_COUNTERS:
+        _header(lines, name, "counter", help_text)
+        for snapshot in snapshots:
+            lines.append(f"{name}{{{_labels(pool=snapshot['name'])}}} {snapshot[key]}")
+
+    _header(lines, "db_pool_checkout_duration_seconds", "histogram", "Connection checkout latency.")
+    for snapshot in snapshots:
+        labels = _labels(pool=snapshot["name"])
+        # Pool histograms are cumulative and in milliseconds
+        for bound, count in snapshot["histogram_ms"].items():
+            le = bound if bound == "+Inf" else str(int(bound) / 1000)
+            lines.append(f'db_pool_checkout_duration_seconds_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"db_pool_checkout_duration_seconds_sum{{{labels}}} {snapshot['checkout_seconds_sum']}")
+        lines.append(
+            f"db_pool_checkout_duration_seconds_count{{{labels}}} {snapshot['checkouts'] + snapshot['timeouts']}"
+        )
+
+
+def render(registry: MetricsRegistry = REGISTRY) -> str:
+    lines: List[str] = []
+    render_http(registry, lines)
+    render_pool(pool_metrics(), lines)
+    return "\n".join(lines) + "\n"
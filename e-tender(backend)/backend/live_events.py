@@ -0,0 +1,313 @@
+"""
+Live tender and bid events for the frontend.
+
+Instead of re-fetching whole tender lists to notice changes, pages subscribe
+to `/api/v1/events/stream` (server-sent events) and receive compact events:
+
+    tender.published    corrigendum.issued    bid.received    award.made
+    clarification.asked    clarification.answered
+
+Every event carries the scopes it is visible in. A subscriber's scopes come
+from its token: `institute:<id>` for institute admins,
+`department:<id>` for departments, and `vendor:<id>` plus `vendors` (public
+tender news) for vendors. An institute admin hears everything about its
+institute's tenders, a department about its own, and a vendor about
+published tenders, corrigenda, answered clarifications and awards plus its
+own bids.
+
+`broker.publish()` is non-blocking and can be called from the event loop or
+from a sync route's worker thread; call it only after the change is
+committed. Each subscriber has a queue of `EVENTS_QUEUE_SIZE` events; a
+subscriber that falls that far behind is disconnected, and reconnects (the
+browser's EventSource does so on its own) to refetch.
+
+Backends, picked by `EVENTS_BROKER_URL`:
+
+* unset: `InProcessBroker`, events reach the subscribers of this worker
+  only. Enough for a single worker.
+* `redis://...`: `RedisBroker`, events go through a Redis pub/sub channel so
+  every worker delivers them to its own subscribers. Needs the optional
+  `redis` package.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+EVENTS_BROKER_URL = os.getenv("EVENTS_BROKER_URL", "")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "etender-events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+
+VENDORS = "vendors"
+
+Dimensions = Tuple[int, int, int]  # institute_id, dept_id, category_id (see services/analytics.py)
+
+
+def institute_scope(institute_id: int) -> str:
+    return f"institute:{institute_id}"
+
+
+def department_scope(dept_id: int) -> str:
+    return f"department:{dept_id}"
+
+
+def vendor_scope(vendor_id: int) -> str:
+    return f"vendor:{vendor_id}"
+
+
+@dataclass(frozen=True)
+class LiveEvent:
+    type: str
+    scopes: Tuple[str, ...]
+    data: dict = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({"type": self.type, "scopes": self.scopes, "data": self.data}, default=_default)
+
+    @classmethod
+    def from_json(cls, raw) -> "LiveEvent":
+        message = json.loads(raw)
+        return cls(message["type"], tuple(message["scopes"]), message["data"])
+
+    def sse(self) -> str:
+        """The event as a text/event-stream frame."""
+        return f"event: {self.type}\ndata: {json.dumps(self.data, default=_default)}\n\n"
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _tender_scopes(dims: Dimensions, *extra: str) -> Tuple[str, ...]:
+    institute_id, dept_id, _ = dims
+    return (institute_scope(institute_id), department_scope(dept_id), *extra)
+
+
+# --- events ---
+def tender_published(tender, dims: Dimensions) -> LiveEvent:
+    return LiveEvent("tender.published", _tender_scopes(dims, VENDORS), {
+        "tender_id": tender.tender_id,
+        "tender_number": tender.tender_number,
+        "title": tender.title,
+        "category_id": tender.category_id,
+        "submission_deadline": tender.submission_deadline,
+    })
+
+
+def corrigendum_issued(corrigendum, dims: Dimensions, published: bool) -> LiveEvent:
+    """Vendors only hear about corrigenda to tenders they can already see."""
+    return LiveEvent("corrigendum.issued", _tender_scopes(dims, *((VENDORS,) if published else ())), {
+        "tender_id": corrigendum.tender_id,
+        "corrigendum_id": corrigendum.corrigendum_id,
+        "title": corrigendum.title,
+    })
+
+
+def clarification_asked(clarification, dims: Dimensions) -> LiveEvent:
+    # For the tender's department and institute; the asking vendor stays private
+    return LiveEvent("clarification.asked", _tender_scopes(dims), {
+        "tender_id": clarification.tender_id,
+        "clarification_id": clarification.clarification_id,
+    })
+
+
+def clarification_answered(clarification, dims: Dimensions) -> LiveEvent:
+    return LiveEvent("clarification.answered", _tender_scopes(dims, VENDORS), {
+        "tender_id": clarification.tender_id,
+        "clarification_id": clarification.clarification_id,
+    })
+
+
+def bid_received(bid, dims: Dimensions) -> LiveEvent:
+    # No amount: bids stay sealed until they are opened
+    return LiveEvent("bid.received", _tender_scopes(dims, vendor_scope(bid.vendor_id)), {
+        "tender_id": bid.tender_id,
+        "bid_id": bid.bid_id,
+        "vendor_id": bid.vendor_id,
+    })
+
+
+def award_made(award, bid, dims: Dimensions) -> LiveEvent:
+    return LiveEvent("award.made", _tender_scopes(dims, VENDORS), {
+        "tender_id": bid.tender_id,
+        "award_id": award.award_id,
+        "bid_id": bid.bid_id,
+        "vendor_id": bid.vendor_id,
+    })
+
+
+# --- brokers ---
+class Subscription:
+    def __init__(self, scopes: Set[str], maxsize: int):
+        self.scopes = scopes
+        self._queue: "asyncio.Queue[Optional[LiveEvent]]" = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def put(self, event: LiveEvent) -> None:
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self) -> None:
+        """End the stream: the consumer gets None once it has drained what is queued."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # Make room for the end marker; the client refetches anyway
+            self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[LiveEvent]:
+        return await self._queue.get()
+
+
+class InProcessBroker:
+    """Fans events out to the subscribers of this process."""
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._listeners: List[Callable[[LiveEvent], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+        self._subscriptions.clear()
+
+    def add_listener(self, listener: Callable[[LiveEvent], None]) -> None:
+        """
+        Call `listener` on the event loop with every event this worker
+        dispatches, whichever worker published it; for keeping per-process
+        caches in step. It must not block.
+        """
+        self._listeners.append(listener)
+
+    def publish(self, event: LiveEvent) -> None:
+        """Hand `event` to the broker; safe to call from any thread."""
+        loop = self._loop
+        if loop is None:
+            return  # nobody has subscribed yet
+        try:
+            loop.call_soon_threadsafe(self._send, event)
+        except RuntimeError:
+            pass  # loop closed: the app is shutting down
+
+    def _send(self, event: LiveEvent) -> None:
+        self._dispatch(event)
+
+    def _dispatch(self, event: LiveEvent) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Live event listener failed on %s", event.type)
+        targets: Set[Subscription] = set()
+        for scope in event.scopes:
+            targets.update(self._subscriptions.get(scope, ()))
+        for subscription in targets:
+            subscription.put(event)
+
+    @asynccontextmanager
+    async def subscribe(self, scopes: Iterable[str]) -> AsyncIterator[Subscription]:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(set(scopes), self.queue_size)
+        for scope in subscription.scopes:
+            self._subscriptions[scope].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscription.closed = True
+            for scope in subscription.scopes:
+                subscribers = self._subscriptions.get(scope)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[scope]
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes events to a Redis channel; every worker relays the channel to its own subscribers."""
+
+    def __init__(self, url: str, channel: str = EVENTS_CHANNEL, queue_size: int = EVENTS_QUEUE_SIZE):
+        if aioredis is None:
+            raise RuntimeError("EVENTS_BROKER_URL points at Redis but the redis package is not installed")
+        super().__init__(queue_size)
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await super().start()
+        self._redis = aioredis.from_url(self.url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        await super().stop()
+
+    def _send(self, event: LiveEvent) -> None:
+        if self._redis is None:
+            self._dispatch(event)
+            return
+        asyncio.ensure_future(self._redis_publish(event))
+
+    async def _redis_publish(self, event: LiveEvent) -> None:
+        try:
+            await self._redis.publish(self.channel, event.to_json())
+        except Exception:
+            logger.exception("Could not publish %s to Redis, delivering locally", event.type)
+            self._dispatch(event)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._dispatch(LiveEvent.from_json(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Redis event listener failed, reconnecting")
+                await asyncio.sleep(1)
+
+
+def create_broker(url: str = EVENTS_BROKER_URL) -> InProcessBroker:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    return InProcessBroker()
+
+
+broker = create_broker()
@@ -1,13 +1,56 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from . import models, schemas
-from .database import engine
-from .routers import auth, department, tenders, tender_category, bids, awards
+from .compression import CompressionMiddleware
+from .database import async_engine, async_replica_engine
+from .db_routing import PIN_HEADER, ReadYourWritesMiddleware
+from .http_metrics import MetricsMiddleware
+from .live_events import broker
+from .profiling import PROFILE_HEADER, PROFILING_ENABLED, ProfilingMiddleware
+from .query_stats import QUERIES_HEADER, TIME_HEADER, QueryStatsMiddleware
+from .routers import auth, department, tenders, tender_category, bids, awards, analytics, payments, system, notifications, events, audit, clarifications
+from .services.archiver import archiver
+from .services.audit import audit_log
+from .services.mailer import email_outbox
+from .services.cold_storage import cold_storage
+from .services.notifications import notifier
+from .services.scheduler import tender_scheduler
+
+# Set TENDER_SCHEDULER_ENABLED=0 to run a worker without the deadline scheduler.
+SCHEDULER_ENABLED = os.getenv("TENDER_SCHEDULER_ENABLED", "1") != "0"
+# Set ARCHIVER_ENABLED=0 to run a worker without the soft-delete archiver and cold storage jobs.
+ARCHIVER_ENABLED = os.getenv("ARCHIVER_ENABLED", "1") != "0"
+
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_log.start()
+    await broker.start()
+    notifier.start()
+    await email_outbox.start()
+    if SCHEDULER_ENABLED:
+        tender_scheduler.start()
+    if ARCHIVER_ENABLED:
+        archiver.start()
+        cold_storage.start()
+    yield
+    tender_scheduler.stop()
+    archiver.stop()
+    cold_storage.stop()
+    notifier.stop()
+    await email_outbox.stop()
+    await broker.stop()
+    # Last, so entries recorded while the other jobs shut down are written too
+    audit_log.stop()
+    await async_engine.dispose()
+    if async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # 👇 Add this section
 origins = [
@@ -26,8 +69,25 @@ app.add_middleware(
     allow_credentials=True,      # Allows cookies to be included in requests
     allow_methods=["*"],         # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],         # Allows all headers
+    expose_headers=[PIN_HEADER, QUERIES_HEADER, TIME_HEADER, PROFILE_HEADER], # read-your-writes pin, SQL stats, profile id
 )
 
+# Pins a client to the primary database for a few seconds after each write
+app.add_middleware(ReadYourWritesMiddleware)
+
+# X-DB-Queries / X-DB-Time on every response; DB_QUERY_STRICT=1 fails N+1 requests in tests
+app.add_middleware(QueryStatsMiddleware)
+
+# Admin-triggered request profiles (X-Profile: 1); not installed at all unless PROFILING_ENABLED=1
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# gzip / brotli for JSON and CSV bodies over COMPRESSION_MIN_SIZE, negotiated via Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so the recorded latency covers every other middleware; exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Tendering API"}
@@ -35,6 +95,14 @@ def read_root():
 app.include_router(auth.router)
 app.include_router(department.router)
 app.include_router(tenders.router)
+app.include_router(clarifications.router)
 app.include_router(tender_category.router)
 app.include_router(bids.router)
-app.include_router(awards.router)
\ No newline at end of file
+app.include_router(awards.router)
+app.include_router(analytics.router)
+app.include_router(payments.router)
+app.include_router(notifications.router)
+app.include_router(events.router)
+app.include_router(audit.router)
+app.include_router(system.router)
+app.include_router(system.metrics_router)
@@ -0,0 +1,331 @@
+"""baseline schema
+
+The schema the app created with metadata.create_all before migrations were
+introduced. Databases created that way are brought under migration control
+with `alembic stamp 0001` and then upgraded as usual.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 13:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('evaluation_committees',
+    sa.Column('committee_id', sa.Integer(), nullable=False),
+    sa.Column('committee_name', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('committee_id')
+    )
+    op.create_index(op.f('ix_evaluation_committees_committee_id'), 'evaluation_committees', ['committee_id'], unique=False)
+    op.create_table('roles',
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('role_name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('role_id'),
+    sa.UniqueConstraint('role_name')
+    )
+    op.create_table('tender_categories',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('category_name', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('category_id'),
+    sa.UniqueConstraint('category_name')
+    )
+    op.create_index(op.f('ix_tender_categories_category_id'), 'tender_categories', ['category_id'], unique=False)
+    op.create_table('users',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_user_id'), 'users', ['user_id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('audit_logs',
+    sa.Column('log_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=255), nullable=False),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('log_id')
+    )
+    op.create_table('committee_members',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('committee_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['committee_id'], ['evaluation_committees.committee_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'committee_id')
+    )
+    op.create_table('institutes',
+    sa.Column('institute_id', sa.Integer(), nullable=False),
+    sa.Column('institute_name', sa.String(length=255), nullable=False),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('contact_email', sa.String(length=255), nullable=False),
+    sa.Column('phone_number', sa.String(length=20), nullable=True),
+    sa.Column('registration_number', sa.String(length=100), nullable=True),
+    sa.Column('verification_status', sa.Enum('PENDING', 'VERIFIED', 'REJECTED', name='verificationstatus'), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('institute_id'),
+    sa.UniqueConstraint('contact_email'),
+    sa.UniqueConstraint('registration_number'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_institutes_institute_id'), 'institutes', ['institute_id'], unique=False)
+    op.create_table('notifications',
+    sa.Column('notification_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('notification_id')
+    )
+    op.create_table('user_roles',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.role_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'role_id')
+    )
+    op.create_table('vendors',
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.Column('company_name', sa.String(length=255), nullable=False),
+    sa.Column('gst_number', sa.String(length=15), nullable=True),
+    sa.Column('pan_number', sa.String(length=10), nullable=True),
+    sa.Column('verification_status', sa.Enum('PENDING', 'VERIFIED', 'REJECTED', name='verificationstatus'), nullable=False),
+    sa.Column('contact_person', sa.String(length=100), nullable=True),
+    sa.Column('address', sa.String(length=255), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('vendor_id'),
+    sa.UniqueConstraint('gst_number'),
+    sa.UniqueConstraint('pan_number'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_vendors_vendor_id'), 'vendors', ['vendor_id'], unique=False)
+    op.create_table('departments',
+    sa.Column('dept_id', sa.Integer(), nullable=False),
+    sa.Column('dept_name', sa.String(length=255), nullable=False),
+    sa.Column('institute_id', sa.Integer(), nullable=True),
+    sa.Column('username', sa.String(length=100), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('department_head_name', sa.String(), nullable=True),
+    sa.Column('plain_password', sa.String(length=100), nullable=True),
+    sa.ForeignKeyConstraint(['institute_id'], ['institutes.institute_id'], ),
+    sa.PrimaryKeyConstraint('dept_id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_index(op.f('ix_departments_dept_id'), 'departments', ['dept_id'], unique=False)
+    op.create_table('tenders',
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.Column('tender_number', sa.String(length=100), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('estimated_cost', sa.Float(), nullable=True),
+    sa.Column('submission_deadline', sa.DateTime(), nullable=False),
+    sa.Column('publish_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.Enum('DRAFT', 'PUBLISHED', 'OPEN', 'EVALUATION', 'AWARDED', 'CANCELLED', 'CLOSED', name='tenderstatus'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('dept_id', sa.Integer(), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('is_checked', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['tender_categories.category_id'], ),
+    sa.ForeignKeyConstraint(['dept_id'], ['departments.dept_id'], ),
+    sa.PrimaryKeyConstraint('tender_id')
+    )
+    op.create_index(op.f('ix_tenders_status'), 'tenders', ['status'], unique=False)
+    op.create_index(op.f('ix_tenders_tender_id'), 'tenders', ['tender_id'], unique=False)
+    op.create_index(op.f('ix_tenders_tender_number'), 'tenders', ['tender_number'], unique=True)
+    op.create_table('bids',
+    sa.Column('bid_id', sa.Integer(), nullable=False),
+    sa.Column('bid_amount', sa.Float(), nullable=False),
+    sa.Column('submission_date', sa.DateTime(), nullable=True),
+    sa.Column('bid_status', sa.Enum('SUBMITTED', 'WITHDRAWN', 'QUALIFIED', 'DISQUALIFIED', 'AWARDED', name='bidstatus'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('tender_id', sa.Integer(), nullable=True),
+    sa.Column('vendor_id', sa.Integer(), nullable=True),
+    sa.Column('committee_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['committee_id'], ['evaluation_committees.committee_id'], ),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.ForeignKeyConstraint(['vendor_id'], ['vendors.vendor_id'], ),
+    sa.PrimaryKeyConstraint('bid_id')
+    )
+    op.create_index(op.f('ix_bids_bid_id'), 'bids', ['bid_id'], unique=False)
+    op.create_index(op.f('ix_bids_bid_status'), 'bids', ['bid_status'], unique=False)
+    op.create_table('clarifications',
+    sa.Column('clarification_id', sa.Integer(), nullable=False),
+    sa.Column('question_text', sa.Text(), nullable=False),
+    sa.Column('answer_text', sa.Text(), nullable=True),
+    sa.Column('question_date', sa.DateTime(), nullable=True),
+    sa.Column('answer_date', sa.DateTime(), nullable=True),
+    sa.Column('tender_id', sa.Integer(), nullable=True),
+    sa.Column('vendor_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.ForeignKeyConstraint(['vendor_id'], ['vendors.vendor_id'], ),
+    sa.PrimaryKeyConstraint('clarification_id')
+    )
+    op.create_index(op.f('ix_clarifications_tender_id'), 'clarifications', ['tender_id'], unique=False)
+    op.create_index(op.f('ix_clarifications_vendor_id'), 'clarifications', ['vendor_id'], unique=False)
+    op.create_table('corrigenda',
+    sa.Column('corrigendum_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('details', sa.Text(), nullable=False),
+    sa.Column('publish_date', sa.DateTime(), nullable=True),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.PrimaryKeyConstraint('corrigendum_id')
+    )
+    op.create_table('emds',
+    sa.Column('emd_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('transaction_id', sa.String(length=255), nullable=True),
+    sa.Column('payment_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED', name='paymentstatus'), nullable=False),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.ForeignKeyConstraint(['vendor_id'], ['vendors.vendor_id'], ),
+    sa.PrimaryKeyConstraint('emd_id'),
+    sa.UniqueConstraint('transaction_id')
+    )
+    op.create_table('evaluation_criteria',
+    sa.Column('criterion_id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('max_score', sa.Integer(), nullable=False),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.PrimaryKeyConstraint('criterion_id')
+    )
+    op.create_table('tender_documents',
+    sa.Column('doc_id', sa.Integer(), nullable=False),
+    sa.Column('document_name', sa.String(length=255), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('upload_date', sa.DateTime(), nullable=True),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.PrimaryKeyConstraint('doc_id')
+    )
+    op.create_table('tender_history',
+    sa.Column('history_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=True),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('submission_deadline', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.Enum('DRAFT', 'PUBLISHED', 'OPEN', 'EVALUATION', 'AWARDED', 'CANCELLED', 'CLOSED', name='tenderstatus'), nullable=True),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.tender_id'], ),
+    sa.PrimaryKeyConstraint('history_id')
+    )
+    op.create_table('awards',
+    sa.Column('award_id', sa.Integer(), nullable=False),
+    sa.Column('award_date', sa.DateTime(), nullable=True),
+    sa.Column('contract_start_date', sa.DateTime(), nullable=True),
+    sa.Column('contract_end_date', sa.DateTime(), nullable=True),
+    sa.Column('bid_id', sa.Integer(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['bid_id'], ['bids.bid_id'], ),
+    sa.PrimaryKeyConstraint('award_id'),
+    sa.UniqueConstraint('bid_id')
+    )
+    op.create_table('bid_documents',
+    sa.Column('doc_id', sa.Integer(), nullable=False),
+    sa.Column('document_name', sa.String(length=255), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('bid_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['bid_id'], ['bids.bid_id'], ),
+    sa.PrimaryKeyConstraint('doc_id')
+    )
+    op.create_table('bid_history',
+    sa.Column('history_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=True),
+    sa.Column('bid_id', sa.Integer(), nullable=False),
+    sa.Column('bid_amount', sa.Float(), nullable=True),
+    sa.Column('bid_status', sa.Enum('SUBMITTED', 'WITHDRAWN', 'QUALIFIED', 'DISQUALIFIED', 'AWARDED', name='bidstatus'), nullable=True),
+    sa.ForeignKeyConstraint(['bid_id'], ['bids.bid_id'], ),
+    sa.PrimaryKeyConstraint('history_id')
+    )
+    op.create_table('payments',
+    sa.Column('payment_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('payment_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED', name='paymentstatus'), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=True),
+    sa.Column('transaction_id', sa.String(length=255), nullable=True),
+    sa.Column('award_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['award_id'], ['awards.award_id'], ),
+    sa.PrimaryKeyConstraint('payment_id'),
+    sa.UniqueConstraint('transaction_id')
+    )
+    op.create_index(op.f('ix_payments_status'), 'payments', ['status'], unique=False)
+    # ### end Alembic commands ###
+
+    # Roles looked up by signup
+    roles = sa.table('roles', sa.column('role_name', sa.String), sa.column('description', sa.Text))
+    op.bulk_insert(roles, [
+        {'role_name': 'VENDOR', 'description': 'Vendor bidding on tenders'},
+        {'role_name': 'INSTITUTE_ADMIN', 'description': 'Administrator of an institute'},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payments_status'), table_name='payments')
+    op.drop_table('payments')
+    op.drop_table('bid_history')
+    op.drop_table('bid_documents')
+    op.drop_table('awards')
+    op.drop_table('tender_history')
+    op.drop_table('tender_documents')
+    op.drop_table('evaluation_criteria')
+    op.drop_table('emds')
+    op.drop_table('corrigenda')
+    op.drop_index(op.f('ix_clarifications_vendor_id'), table_name='clarifications')
+    op.drop_index(op.f('ix_clarifications_tender_id'), table_name='clarifications')
+    op.drop_table('clarifications')
+    op.drop_index(op.f('ix_bids_bid_status'), table_name='bids')
+    op.drop_index(op.f('ix_bids_bid_id'), table_name='bids')
+    op.drop_table('bids')
+    op.drop_index(op.f('ix_tenders_tender_number'), table_name='tenders')
+    op.drop_index(op.f('ix_tenders_tender_id'), table_name='tenders')
+    op.drop_index(op.f('ix_tenders_status'), table_name='tenders')
+    op.drop_table('tenders')
+    op.drop_index(op.f('ix_departments_dept_id'), table_name='departments')
+    op.drop_table('departments')
+    op.drop_index(op.f('ix_vendors_vendor_id'), table_name='vendors')
+    op.drop_table('vendors')
+    op.drop_table('user_roles')
+    op.drop_table('notifications')
+    op.drop_index(op.f('ix_institutes_institute_id'), table_name='institutes')
+    op.drop_table('institutes')
+    op.drop_table('committee_members')
+    op.drop_table('audit_logs')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_user_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_tender_categories_category_id'), table_name='tender_categories')
+    op.drop_table('tender_categories')
+    op.drop_table('roles')
+    op.drop_index(op.f('ix_evaluation_committees_committee_id'), table_name='evaluation_committees')
+    op.drop_table('evaluation_committees')
+    # ### end Alembic commands ###
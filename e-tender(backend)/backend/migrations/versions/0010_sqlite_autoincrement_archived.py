@@ -0,0 +1,56 @@
+"""sqlite autoincrement for archived tables
+
+Archived rows keep their ids, so the live tables they come from must never
+reuse one. SQLite does unless the primary key is AUTOINCREMENT, which can
+only be set by rebuilding the table. Other databases are left as they are:
+PostgreSQL sequences never go back, and services/archiver.py refuses to run
+on MySQL versions whose AUTO_INCREMENT counter is reset on restart.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 15:20:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Live tables with an `<table>_archive` counterpart
+ARCHIVED_TABLES = (
+    'awards',
+    'bid_documents',
+    'bid_history',
+    'bid_opening_results',
+    'bids',
+    'clarifications',
+    'corrigenda',
+    'emds',
+    'evaluation_criteria',
+    'payments',
+    'tender_documents',
+    'tender_history',
+    'tenders',
+)
+
+
+def _rebuild(autoincrement: bool) -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in ARCHIVED_TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+
+
+def upgrade() -> None:
+    _rebuild(True)
+
+
+def downgrade() -> None:
+    _rebuild(False)
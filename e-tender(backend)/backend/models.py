@@ -1,12 +1,27 @@
 import enum
 from sqlalchemy import (
-    Boolean, Column, ForeignKey, Integer, String, DateTime, Float, Text, Enum as SQLAlchemyEnum
+    Boolean, Column, ForeignKey, Index, Integer, String, DateTime, Float, Text, Enum as SQLAlchemyEnum, Table, inspect, text
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import ONETOMANY, relationship
 from sqlalchemy.sql import func
-from sqlalchemy.ext.declarative import declarative_base
 
-Base = declarative_base()
+from .database import Base
+
+# --- Soft delete ---
+class SoftDeleteMixin:
+    """Rows are flagged instead of deleted; soft_delete.py hides flagged rows from ORM SELECTs."""
+    is_deleted = Column(Boolean, default=False, nullable=False)
+    deleted_at = Column(DateTime, nullable=True)
+
+
+def live_index(name, *columns):
+    """Index over rows that are not soft-deleted: partial on SQLite / PostgreSQL, led by is_deleted elsewhere."""
+    return Index(
+        name, 'is_deleted', *columns,
+        sqlite_where=text('is_deleted = 0'),
+        postgresql_where=text('is_deleted = false'),
+    )
+
 
 # --- Enums ---
 class TenderStatus(enum.Enum):
@@ -36,6 +51,11 @@ class VerificationStatus(enum.Enum):
     VERIFIED = "verified"
     REJECTED = "rejected"
 
+class EmailStatus(enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
 # --- Association Tables ---
 class UserRole(Base):
     __tablename__ = 'user_roles'
@@ -70,6 +90,7 @@ class User(Base):
     committee_assignments = relationship("CommitteeMember", back_populates="user")
     vendor = relationship("Vendor", back_populates="user", uselist=False, cascade="all, delete-orphan")
     notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
+    notification_counter = relationship("NotificationCounter", uselist=False, cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="user")
     overlaps="role_associations,user" 
 
@@ -126,6 +147,7 @@ class Vendor(Base):
     bids = relationship("Bid", back_populates="vendor")
     clarifications = relationship("Clarification", back_populates="vendor")
     emds = relationship("EMD", back_populates="vendor")
+    category_subscriptions = relationship("VendorCategory", back_populates="vendor", cascade="all, delete-orphan")
 
 # --- Remaining models unchanged except adding String lengths ---
 class EvaluationCommittee(Base):
@@ -141,8 +163,20 @@ class TenderCategory(Base):
     category_name = Column(String(255), nullable=False, unique=True)
     tenders = relationship("Tender", back_populates="category")
 
-class Tender(Base):
+class VendorCategory(Base):
+    """A vendor's subscription to new tenders of a category."""
+    __tablename__ = 'vendor_categories'
+    vendor_id = Column(Integer, ForeignKey('vendors.vendor_id'), primary_key=True)
+    category_id = Column(Integer, ForeignKey('tender_categories.category_id'), primary_key=True, index=True)
+    vendor = relationship("Vendor", back_populates="category_subscriptions")
+    category = relationship("TenderCategory")
+
+class Tender(SoftDeleteMixin, Base):
     __tablename__ = 'tenders'
+    __table_args__ = (
+        live_index('ix_tenders_live_dept_status', 'dept_id', 'status'),
+        live_index('ix_tenders_live_checked', 'is_checked'),
+    )
     tender_id = Column(Integer, primary_key=True, index=True)
     tender_number = Column(String(100), unique=True, nullable=False, index=True)
     title = Column(String(255), nullable=False)
@@ -151,8 +185,6 @@ class Tender(Base):
     submission_deadline = Column(DateTime, nullable=False)
     publish_date = Column(DateTime, default=func.now())
     status = Column(SQLAlchemyEnum(TenderStatus), default=TenderStatus.DRAFT, nullable=False, index=True)
-    is_deleted = Column(Boolean, default=False, nullable=False)
-    deleted_at = Column(DateTime, nullable=True)
     dept_id = Column(Integer, ForeignKey('departments.dept_id'))
     category_id = Column(Integer, ForeignKey('tender_categories.category_id'))
     department = relationship("Department", back_populates="tenders")
@@ -165,17 +197,25 @@ class Tender(Base):
     clarifications = relationship("Clarification", back_populates="tender")
     history = relationship("TenderHistory", back_populates="tender", cascade="all, delete-orphan")
     is_checked = Column(Boolean, default=False)
+    version = Column(Integer, default=1, nullable=False)  # bumped with every TenderHistory row
+
+    # version is bumped in SQL (history.py); read the new value back in the flush
+    __mapper_args__ = {"eager_defaults": True}
 
 
-class Bid(Base):
+class Bid(SoftDeleteMixin, Base):
     __tablename__ = 'bids'
+    __table_args__ = (
+        live_index('ix_bids_live_tender', 'tender_id'),
+        live_index('ix_bids_live_vendor', 'vendor_id'),
+    )
     bid_id = Column(Integer, primary_key=True, index=True)
     bid_amount = Column(Float, nullable=False)
     submission_date = Column(DateTime, default=func.now())
     bid_status = Column(SQLAlchemyEnum(BidStatus), default=BidStatus.SUBMITTED, nullable=False, index=True)
 
-    is_deleted = Column(Boolean, default=False, nullable=False)
-    deleted_at = Column(DateTime, nullable=True)
+    version = Column(Integer, default=1, nullable=False)  # bumped with every BidHistory row
+    __mapper_args__ = {"eager_defaults": True}  # see Tender
 
     tender_id = Column(Integer, ForeignKey('tenders.tender_id'))
     vendor_id = Column(Integer, ForeignKey('vendors.vendor_id'))
@@ -187,6 +227,7 @@ class Bid(Base):
     documents = relationship("BidDocument", back_populates="bid", cascade="all, delete-orphan")
     award = relationship("Award", back_populates="bid", uselist=False, cascade="all, delete-orphan")
     history = relationship("BidHistory", back_populates="bid", cascade="all, delete-orphan")
+    opening_results = relationship("BidOpeningResult", back_populates="bid", cascade="all, delete-orphan")
 
 class TenderDocument(Base):
     __tablename__ = 'tender_documents'
@@ -203,6 +244,7 @@ class BidDocument(Base):
     doc_id = Column(Integer, primary_key=True)
     document_name = Column(String(255), nullable=False)
     file_path = Column(String(512), nullable=False)
+    checksum = Column(String(64), nullable=True)  # sha256 hex digest taken at upload
     bid_id = Column(Integer, ForeignKey('bids.bid_id'), nullable=False)
     
     bid = relationship("Bid", back_populates="documents")
@@ -233,6 +275,7 @@ class EMD(Base):
     transaction_id = Column(String(255), unique=True)
     payment_date = Column(DateTime, default=func.now())
     status = Column(SQLAlchemyEnum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
+    refund_batch = Column(String(64), nullable=True, index=True)  # set when refunded after award
     
     tender_id = Column(Integer, ForeignKey('tenders.tender_id'), nullable=False)
     vendor_id = Column(Integer, ForeignKey('vendors.vendor_id'), nullable=False)
@@ -241,17 +284,35 @@ class EMD(Base):
     vendor = relationship("Vendor", back_populates="emds")
 
 class AuditLog(Base):
+    """Audit trail, written in batches by services/audit.py."""
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        Index('ix_audit_logs_timestamp', 'timestamp'),
+        Index('ix_audit_logs_institute_time', 'institute_id', 'timestamp'),
+        Index('ix_audit_logs_user_time', 'user_id', 'timestamp'),
+        Index('ix_audit_logs_dept_time', 'dept_id', 'timestamp'),
+        Index('ix_audit_logs_entity', 'entity_type', 'entity_id'),
+    )
     log_id = Column(Integer, primary_key=True)
     action = Column(String(255), nullable=False)
     details = Column(Text)
     timestamp = Column(DateTime, default=func.now())
+    # Actor: a user (vendor / institute admin) or a department login
     user_id = Column(Integer, ForeignKey('users.user_id'), nullable=True)
-    
+    dept_id = Column(Integer, ForeignKey('departments.dept_id'), nullable=True)
+    # Institute whose admins may read the entry
+    institute_id = Column(Integer, ForeignKey('institutes.institute_id'), nullable=True)
+    entity_type = Column(String(50), nullable=True)
+    entity_id = Column(Integer, nullable=True)
+
     user = relationship("User", back_populates="audit_logs")
 
 class Notification(Base):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # A user's (unread) notifications, newest first
+        Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
     notification_id = Column(Integer, primary_key=True)
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
@@ -260,7 +321,39 @@ class Notification(Base):
     
     user = relationship("User", back_populates="notifications")
 
-class Award(Base):
+class NotificationCounter(Base):
+    """Unread notifications per user, kept in step by services/notifications.py."""
+    __tablename__ = 'notification_counters'
+    user_id = Column(Integer, ForeignKey('users.user_id'), primary_key=True)
+    unread = Column(Integer, default=0, nullable=False)
+
+class EmailOutbox(Base):
+    """Emails to send, queued with the change that causes them and sent by services/mailer.py."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # The sender's poll (pending and due) and the purge of old sent rows
+        Index('ix_email_outbox_status_due', 'status', 'next_attempt_at'),
+        # Everything pending for a recipient, combined into one digest
+        Index('ix_email_outbox_to_status', 'to_address', 'status'),
+        # Deadline reminders already queued for a tender
+        Index('ix_email_outbox_tender_kind', 'tender_id', 'kind'),
+    )
+    email_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=True)
+    to_address = Column(String(255), nullable=False)
+    kind = Column(String(50), nullable=False)
+    # Not a foreign key, so queued emails never hold up archiving their tender
+    tender_id = Column(Integer, nullable=True)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(SQLAlchemyEnum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime)
+    last_error = Column(Text)
+
+class Award(SoftDeleteMixin, Base):
     __tablename__ = 'awards'
     award_id = Column(Integer, primary_key=True)
     award_date = Column(DateTime, default=func.now())
@@ -268,10 +361,6 @@ class Award(Base):
     contract_end_date = Column(DateTime)
     bid_id = Column(Integer, ForeignKey('bids.bid_id'), unique=True)
 
-    # Soft Delete fields
-    is_deleted = Column(Boolean, default=False, nullable=False)
-    deleted_at = Column(DateTime, nullable=True)
-    
     bid = relationship("Bid", back_populates="award")
     payments = relationship("Payment", back_populates="award", cascade="all, delete-orphan")
 
@@ -302,30 +391,92 @@ class Clarification(Base):
     vendor = relationship("Vendor", back_populates="clarifications")
 
 
+class BidOpeningResult(Base):
+    """Per-bid outcome recorded when a tender's bids are opened after the deadline."""
+    __tablename__ = 'bid_opening_results'
+    result_id = Column(Integer, primary_key=True)
+    opened_at = Column(DateTime, default=func.now(), nullable=False)
+    bid_status = Column(SQLAlchemyEnum(BidStatus), nullable=False)
+    documents_checked = Column(Integer, default=0, nullable=False)
+    reason = Column(Text)
+
+    tender_id = Column(Integer, ForeignKey('tenders.tender_id'), nullable=False, index=True)
+    bid_id = Column(Integer, ForeignKey('bids.bid_id'), nullable=False, unique=True, index=True)
+
+    bid = relationship("Bid", back_populates="opening_results")
+
+
+class SchedulerLease(Base):
+    """Short-lived lock row so only one app worker runs a scheduled job at a time."""
+    __tablename__ = 'scheduler_leases'
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+# --- Analytics Rollups ---
+# Maintained incrementally by services/analytics.py; category_id 0 means "no category".
+
+class MonthlyRollup(Base):
+    """Activity and spend per institute / department / category / month ('YYYY-MM')."""
+    __tablename__ = 'analytics_monthly_rollups'
+    institute_id = Column(Integer, primary_key=True)
+    dept_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    month = Column(String(7), primary_key=True)
+    tenders_created = Column(Integer, default=0, nullable=False)
+    bids_placed = Column(Integer, default=0, nullable=False)
+    awards_made = Column(Integer, default=0, nullable=False)
+    total_spend = Column(Float, default=0, nullable=False)
+
+class StatusRollup(Base):
+    """Number of tenders currently in each status per institute / department / category."""
+    __tablename__ = 'analytics_status_rollups'
+    institute_id = Column(Integer, primary_key=True)
+    dept_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    status = Column(SQLAlchemyEnum(TenderStatus), primary_key=True)
+    tender_count = Column(Integer, default=0, nullable=False)
+
+
 # --- History Tracking Models ---
 
 class TenderHistory(Base):
-    """Tracks changes to a Tender for audit purposes."""
+    """Tracks changes to a Tender for audit purposes.
+
+    Version 1 holds a full snapshot; later versions only fill the fields
+    listed in `changed_fields` (see history.py).
+    """
     __tablename__ = 'tender_history'
+    __table_args__ = (
+        Index('ix_tender_history_tender_version', 'tender_id', 'version', unique=True),
+    )
     history_id = Column(Integer, primary_key=True)
     version = Column(Integer, nullable=False)
     changed_at = Column(DateTime, default=func.now())
+    changed_fields = Column(String(255), nullable=False)  # comma separated
     tender_id = Column(Integer, ForeignKey('tenders.tender_id'), nullable=False)
     
     # Mirrored fields from Tender
     title = Column(String(255))
     description = Column(Text)
+    estimated_cost = Column(Float)
     submission_deadline = Column(DateTime)
     status = Column(SQLAlchemyEnum(TenderStatus))
+    is_checked = Column(Boolean)
 
     tender = relationship("Tender", back_populates="history")
 
 class BidHistory(Base):
     """Tracks changes to a Bid for audit purposes."""
     __tablename__ = 'bid_history'
+    __table_args__ = (
+        Index('ix_bid_history_bid_version', 'bid_id', 'version', unique=True),
+    )
     history_id = Column(Integer, primary_key=True)
     version = Column(Integer, nullable=False)
     changed_at = Column(DateTime, default=func.now())
+    changed_fields = Column(String(255), nullable=False)  # comma separated
     bid_id = Column(Integer, ForeignKey('bids.bid_id'), nullable=False)
 
     # Mirrored fields from Bid
@@ -333,3 +484,184 @@ class BidHistory(Base):
     bid_status = Column(SQLAlchemyEnum(BidStatus))
 
     bid = relationship("Bid", back_populates="history")
+
+
+# --- Archive tables ---
+# Rows leave the live tables in two ways, both moving them here together with
+# the rows that depend on them:
+# * services/archiver.py: tenders, bids and awards soft-deleted long ago, with
+#   the rows they own (their delete-orphan relationships);
+# * services/cold_storage.py: CLOSED / AWARDED tenders of past years, with
+#   every row that references them (bids, documents, history, EMDs, ...).
+# Archive rows keep their ids but drop the foreign keys, so they outlive the
+# rows they point to. `archive_year` partitions them by the year the tender
+# finished (or the row was deleted). Keeping ids requires that the live
+# tables never hand out an id twice: on SQLite they use AUTOINCREMENT, and
+# services/archiver.py refuses to run on MySQL versions that can reuse ids.
+ARCHIVE_ROOTS = (Award, Bid, Tender)  # archiving order: dependants first
+ARCHIVE_TABLES = {}  # live table name -> archive Table
+
+
+def owned_relationships(model):
+    """One-to-many relationships whose rows are deleted together with `model`."""
+    return [rel for rel in inspect(model).relationships if rel.direction is ONETOMANY and rel.cascade.delete_orphan]
+
+
+def referencing_columns(table):
+    """(table, column, referenced column) for every foreign key of another table pointing at `table`."""
+    return [
+        (other, fk.parent, fk.column)
+        for other in Base.metadata.sorted_tables if other is not table
+        for fk in other.foreign_keys if fk.column.table is table
+    ]
+
+
+def _archive_table(table):
+    columns = [
+        Column(c.name, c.type.copy(), primary_key=c.primary_key, autoincrement=False,
+               nullable=c.nullable, index=bool(c.foreign_keys))
+        for c in table.columns
+    ]
+    return Table(
+        f"{table.name}_archive", Base.metadata, *columns,
+        Column('archived_at', DateTime, nullable=False, server_default=func.now()),
+        Column('archive_year', Integer, nullable=False, index=True)
+    )
+
+
+def _register_archive(table):
+    """Archive `table` and, transitively, every table referencing it."""
+    if table.name in ARCHIVE_TABLES:
+        return
+    # Without AUTOINCREMENT SQLite reuses the ids of deleted (archived) last rows
+    table.dialect_options['sqlite']['autoincrement'] = True
+    ARCHIVE_TABLES[table.name] = _archive_table(table)
+    for other, _, _ in referencing_columns(table):
+        _register_archive(other)
+
+
+_register_archive(Tender.__table__)
+
+
+# --- Archived rows (read-only) ---
+# Mapped with the attributes of their live counterparts, so the read
+# endpoints serialize them with the same code. Archived tenders, bids and
+# awards use SoftDeleteMixin, so soft-deleted ones stay hidden.
+
+class ArchivedTender(SoftDeleteMixin, Base):
+    __table__ = ARCHIVE_TABLES['tenders']
+    department = relationship(Department, primaryjoin="foreign(ArchivedTender.dept_id) == Department.dept_id", viewonly=True)
+    category = relationship(
+        TenderCategory, primaryjoin="foreign(ArchivedTender.category_id) == TenderCategory.category_id", viewonly=True
+    )
+    documents = relationship(
+        "ArchivedTenderDocument", primaryjoin="ArchivedTender.tender_id == foreign(ArchivedTenderDocument.tender_id)",
+        viewonly=True
+    )
+    corrigenda = relationship(
+        "ArchivedCorrigendum", primaryjoin="ArchivedTender.tender_id == foreign(ArchivedCorrigendum.tender_id)",
+        viewonly=True
+    )
+    evaluation_criteria = relationship(
+        "ArchivedEvaluationCriterion",
+        primaryjoin="ArchivedTender.tender_id == foreign(ArchivedEvaluationCriterion.tender_id)", viewonly=True
+    )
+    clarifications = relationship(
+        "ArchivedClarification", primaryjoin="ArchivedTender.tender_id == foreign(ArchivedClarification.tender_id)",
+        viewonly=True
+    )
+    bids = relationship("ArchivedBid", primaryjoin="ArchivedTender.tender_id == foreign(ArchivedBid.tender_id)", viewonly=True)
+
+
+class ArchivedBid(SoftDeleteMixin, Base):
+    __table__ = ARCHIVE_TABLES['bids']
+    tender = relationship(ArchivedTender, primaryjoin="foreign(ArchivedBid.tender_id) == ArchivedTender.tender_id", viewonly=True)
+    vendor = relationship(Vendor, primaryjoin="foreign(ArchivedBid.vendor_id) == Vendor.vendor_id", viewonly=True)
+    documents = relationship(
+        "ArchivedBidDocument", primaryjoin="ArchivedBid.bid_id == foreign(ArchivedBidDocument.bid_id)", viewonly=True
+    )
+    award = relationship(
+        "ArchivedAward", primaryjoin="ArchivedBid.bid_id == foreign(ArchivedAward.bid_id)", uselist=False, viewonly=True
+    )
+
+
+class ArchivedAward(SoftDeleteMixin, Base):
+    __table__ = ARCHIVE_TABLES['awards']
+    bid = relationship(ArchivedBid, primaryjoin="foreign(ArchivedAward.bid_id) == ArchivedBid.bid_id", viewonly=True)
+
+
+class ArchivedTenderDocument(Base):
+    __table__ = ARCHIVE_TABLES['tender_documents']
+
+
+class ArchivedCorrigendum(Base):
+    __table__ = ARCHIVE_TABLES['corrigenda']
+
+
+class ArchivedEvaluationCriterion(Base):
+    __table__ = ARCHIVE_TABLES['evaluation_criteria']
+
+
+class ArchivedClarification(Base):
+    __table__ = ARCHIVE_TABLES['clarifications']
+
+
+class ArchivedBidDocument(Base):
+    __table__ = ARCHIVE_TABLES['bid_documents']
+    bid = relationship(ArchivedBid, primaryjoin="foreign(ArchivedBidDocument.bid_id) == ArchivedBid.bid_id", viewonly=True)
+
+
+class ArchivedBidOpeningResult(Base):
+    __table__ = ARCHIVE_TABLES['bid_opening_results']
+
+
+class ArchivedTenderHistory(Base):
+    __table__ = ARCHIVE_TABLES['tender_history']
+
+
+class ArchivedBidHistory(Base):
+    __table__ = ARCHIVE_TABLES['bid_history']
+
+
+# Live model -> its archived counterpart
+ARCHIVED = {
+    Tender: ArchivedTender,
+    Bid: ArchivedBid,
+    Award: ArchivedAward,
+    TenderDocument: ArchivedTenderDocument,
+    Corrigendum: ArchivedCorrigendum,
+    EvaluationCriterion: ArchivedEvaluationCriterion,
+    Clarification: ArchivedClarification,
+    BidDocument: ArchivedBidDocument,
+    BidOpeningResult: ArchivedBidOpeningResult,
+    TenderHistory: ArchivedTenderHistory,
+    BidHistory: ArchivedBidHistory,
+}
+
+
+def same_storage(row, model):
+    """`model` when `row` is live, its archived counterpart when `row` was read from the archive."""
+    return ARCHIVED[model] if type(row) in ARCHIVED.values() else model
+
+
+class LazyOptions:
+    """
+    Loader options built on first use; unpack with `*` like a tuple.
+
+    Creating a loader option configures every mapper (~70 ms), so routers
+    that keep their options in module constants would pay that at import.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._options = None
+
+    def __iter__(self):
+        if self._options is None:
+            self._options = tuple(self._build())
+        return iter(self._options)
+
+
+# Registers the flush listeners that write TenderHistory / BidHistory and the
+# soft-delete criteria.
+from . import history, soft_delete  # noqa: E402,F401
@@ -0,0 +1,142 @@
+"""
+Connection-pool instrumentation.
+
+`InstrumentedQueuePool` / `InstrumentedAsyncQueuePool` are drop-in pool
+classes that time every checkout (waiting for a free connection, opening an
+overflow connection and the pre-ping included) into a `PoolStats`: counts,
+a cumulative latency histogram, time spent waiting on an exhausted pool and
+timeouts. Checkouts slower than the configured threshold are logged with the
+pool status at that moment.
+
+Stats live in `POOL_STATS`, keyed by the name given to `instrument()`, and
+survive pool re-creation (e.g. `engine.dispose()`).
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the checkout latency histogram, in milliseconds
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    """Checkout counters of one pool. Updated under a lock, read with `snapshot()`."""
+
+    def __init__(self, name: str, slow_threshold_ms: float):
+        self.name = name
+        self.slow_threshold_ms = slow_threshold_ms
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.checkout_seconds_sum = 0.0
+        self.checkout_seconds_max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # last one is +Inf
+
+    def observe(self, seconds: float, waited: bool, timed_out: bool) -> None:
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.checkout_seconds_sum += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            self.buckets[index] += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += seconds
+            slow = ms >= self.slow_threshold_ms
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning(
+                "Slow DB connection checkout on pool '%s': %.1f ms%s (%s)",
+                self.name, ms, " (timed out)" if timed_out else "",
+                self.pool.status() if self.pool is not None else "no pool"
+            )
+
+    def snapshot(self) -> Dict:
+        pool = self.pool
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip([str(b) for b in BUCKETS_MS] + ["+Inf"], self.buckets):
+                cumulative += count
+                histogram[bound] = cumulative
+            return {
+                "name": self.name,
+                "pool_size": pool.size() if pool is not None else 0,
+                "checked_out": pool.checkedout() if pool is not None else 0,
+                "checked_in": pool.checkedin() if pool is not None else 0,
+                "overflow": max(pool.overflow(), 0) if pool is not None else 0,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+                "checkout_seconds_sum": self.checkout_seconds_sum,
+                "checkout_seconds_max": self.checkout_seconds_max,
+                "histogram_ms": histogram,
+            }
+
+
+POOL_STATS: Dict[str, PoolStats] = {}
+
+
+class _InstrumentedPoolMixin:
+    stats: Optional[PoolStats] = None
+
+    def connect(self):
+        stats = self.stats
+        if stats is None:
+            return super().connect()
+        # No idle connection and no overflow room left: this checkout has to wait
+        waited = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            stats.observe(time.perf_counter() - started, waited, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        if self.stats is not None:
+            self.stats.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument(engine, name: str, slow_threshold_ms: float) -> None:
+    """Attach named stats to an engine created with one of the pools above."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    if not isinstance(pool, _InstrumentedPoolMixin):
+        return
+    stats = POOL_STATS.setdefault(name, PoolStats(name, slow_threshold_ms))
+    stats.pool = pool
+    pool.stats = stats
+
+
+def pool_metrics() -> list:
+    return [stats.snapshot() for stats in POOL_STATS.values()]
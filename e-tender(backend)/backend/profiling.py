@@ -0,0 +1,184 @@
+"""
+On-demand request profiling.
+
+With `PROFILING_ENABLED=1` an institute admin can profile one request by
+sending `X-Profile: 1` (or `?profile=1`) with their bearer token; a
+`PROFILING_SAMPLE_RATE` share of such requests is actually profiled. A
+sampler thread records the request's call stack every
+`PROFILING_INTERVAL_MS`:
+
+* while the request's task runs on the event loop, the loop thread's stack;
+* while it is suspended, its chain of awaiting coroutines, ending in
+  `(awaiting)` - time spent waiting on the database or a worker thread;
+* the stacks of busy thread-pool workers (sync routes, bcrypt, bid opening),
+  under a `[worker]` root. Workers are shared, so a busy worker may belong to
+  a concurrent request.
+
+The samples are stored as a folded-stack file (`frame;frame;frame count`,
+the input of flamegraph.pl, speedscope and inferno) in `PROFILING_DIR`; the
+response carries its id in `X-Profile-Id`, and
+`GET /api/v1/system/profiles/{id}` downloads it.
+
+When disabled the middleware is not installed at all, so requests pay
+nothing.
+"""
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from . import security
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "1.0"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "2"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "uploads/profiles")
+
+TRIGGER_HEADER = b"x-profile"
+TRIGGER_PARAM = "profile"
+PROFILE_HEADER = "x-profile-id"
+PROFILE_ID_PATTERN = re.compile(r"^\d+_[0-9a-f]{8}$")
+
+WORKER_THREAD_NAME = "AnyIO worker thread"
+# Leaf functions of a thread-pool worker waiting for work
+IDLE_FUNCTIONS = {"wait", "get", "_wait_for_tstate_lock", "select"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    path = code.co_filename
+    marker = "site-packages" + os.sep
+    if marker in path:
+        path = path.split(marker, 1)[1]
+    return f"{name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _thread_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_chain(task: asyncio.Task) -> List[str]:
+    """Frames of a suspended task, from its coroutine down to the innermost await."""
+    stack, awaitable = [], task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return stack + ["(awaiting)"]
+
+
+class StackSampler:
+    """Samples one asyncio task (and busy worker threads) from a background thread."""
+
+    def __init__(self, task: asyncio.Task, interval_ms: float = PROFILING_INTERVAL_MS):
+        self.task = task
+        self.loop = task.get_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        if asyncio.current_task(self.loop) is self.task:
+            stack = _thread_stack(frames.get(self.loop_thread_id))
+        else:
+            stack = _await_chain(self.task)
+        self.samples[";".join(stack)] += 1
+
+        workers = {thread.ident for thread in threading.enumerate() if thread.name == WORKER_THREAD_NAME}
+        for thread_id in workers:
+            frame = frames.get(thread_id)
+            if frame is not None and frame.f_code.co_name not in IDLE_FUNCTIONS:
+                self.samples[";".join(["[worker]"] + _thread_stack(frame))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _is_admin(authorization: Optional[bytes]) -> bool:
+    if not authorization or not authorization.lower().startswith(b"bearer "):
+        return False
+    try:
+        payload = security.decode_access_token(authorization[7:].decode("latin-1"))
+    except HTTPException:
+        return False
+    return "INSTITUTE_ADMIN" in payload.get("roles", [])
+
+
+def _wants_profile(scope) -> bool:
+    headers = dict(scope["headers"])
+    flagged = (
+        headers.get(TRIGGER_HEADER) == b"1"
+        or parse_qs(scope.get("query_string", b"").decode("latin-1")).get(TRIGGER_PARAM) == ["1"]
+    )
+    return flagged and _is_admin(headers.get(b"authorization")) and random.random() < PROFILING_SAMPLE_RATE
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILING_DIR, f"{profile_id}.folded")
+
+
+def _write_profile(profile_id: str, folded: str) -> None:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    with open(profile_path(profile_id), "w") as f:
+        f.write(folded)
+
+
+class ProfilingMiddleware:
+    """Profiles admin requests that ask for it; install only when PROFILING_ENABLED."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_HEADER.encode("latin-1"), profile_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        sampler = StackSampler(asyncio.current_task())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            await run_in_threadpool(_write_profile, profile_id, sampler.folded())
@@ -0,0 +1,160 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+Cursor-level listeners on every `Engine` (sync engines and the sync side of
+async ones) add each statement and its duration to the `QueryStats` of the
+current request, held in a context variable so it follows the request into
+the thread pool and SQLAlchemy's greenlets. `QueryStatsMiddleware` opens one
+per HTTP request and reports it in the `X-DB-Queries` (statement count) and
+`X-DB-Time` (milliseconds) response headers.
+
+In strict mode (`DB_QUERY_STRICT=1`, or `track_queries(strict=True)` in a
+test) identical SQL executed `N_PLUS_ONE_THRESHOLD` or more times with
+different parameters is reported as an N+1 pattern. A `do_orm_execute`
+listener tags statements issued by relationship loaders with the
+relationship's name (e.g. `Tender.bids`), so the report says which
+relationship to eager load. Strict middleware raises `NPlusOneDetected`
+once the response is sent, which fails the test that made the request.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import RelationshipProperty, Session
+
+logger = logging.getLogger(__name__)
+
+STRICT = os.getenv("DB_QUERY_STRICT", "0") == "1"
+# Executions of one statement, with different parameters, that count as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "3"))
+
+QUERIES_HEADER = "x-db-queries"
+TIME_HEADER = "x-db-time"
+
+
+class NPlusOneDetected(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Statement count and DB time of one request; per-statement detail in strict mode."""
+
+    def __init__(self, strict: bool = False):
+        self.strict = strict
+        self.queries = 0
+        self.seconds = 0.0
+        self.executions: Dict[str, int] = {}
+        self.parameters: Dict[str, Set[str]] = {}
+        self.relationships: Dict[str, str] = {}
+        self.pending_relationship: Optional[str] = None
+
+    def record(self, statement: str, parameters, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        if not self.strict:
+            return
+        self.executions[statement] = self.executions.get(statement, 0) + 1
+        self.parameters.setdefault(statement, set()).add(repr(parameters))
+        if self.pending_relationship is not None:
+            self.relationships.setdefault(statement, self.pending_relationship)
+            self.pending_relationship = None
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Dict]:
+        """Statements repeated `threshold`+ times with different parameters."""
+        return [
+            {
+                "statement": statement,
+                "executions": count,
+                "relationship": self.relationships.get(statement),
+            }
+            for statement, count in self.executions.items()
+            if count >= threshold and len(self.parameters[statement]) > 1
+        ]
+
+    def describe_n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> str:
+        return "; ".join(
+            f"{item['relationship'] or 'query'} loaded {item['executions']} times: "
+            f"{' '.join(item['statement'].split())[:200]}"
+            for item in self.n_plus_one(threshold)
+        )
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(strict: bool = False):
+    """Collect the statements run inside the block, e.g. to assert on them in a test."""
+    stats = QueryStats(strict)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None and _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, parameters, time.perf_counter() - started)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _tag_relationship_load(orm_execute_state) -> None:
+    stats = _current.get()
+    if stats is None or not stats.strict or not orm_execute_state.is_relationship_load:
+        return
+    path = orm_execute_state.loader_strategy_path
+    relationship = next(
+        (token for token in reversed(path.path) if isinstance(token, RelationshipProperty)), None
+    ) if path is not None else None
+    if relationship is not None:
+        stats.pending_relationship = str(relationship)
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL of each HTTP request and reports it in response headers."""
+
+    def __init__(self, app, strict: bool = STRICT, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.strict = strict
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (QUERIES_HEADER.encode("latin-1"), str(stats.queries).encode("latin-1")),
+                    (TIME_HEADER.encode("latin-1"), f"{stats.seconds * 1000:.2f}".encode("latin-1")),
+                ]
+            await send(message)
+
+        with track_queries(self.strict) as stats:
+            await self.app(scope, receive, send_with_stats)
+
+        if self.strict:
+            report = stats.describe_n_plus_one(self.threshold)
+            if report:
+                logger.error("N+1 queries in %s %s: %s", scope["method"], scope["path"], report)
+                raise NPlusOneDetected(f"{scope['method']} {scope['path']}: {report}")
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, null
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+
+from .. import models, schemas
+from ..database import get_db
+from .auth import get_current_institute_admin
+
+router = APIRouter(
+    prefix="/api/v1/analytics",
+    tags=["Analytics"]
+)
+
+MONTH_PATTERN = r"^\d{4}-\d{2}$"
+
+
+def _bucket(key, label, tenders, bids, awards, spend) -> dict:
+    tenders, bids = tenders or 0, bids or 0
+    return {
+        "key": str(key),
+        "label": label,
+        "tenders_created": tenders,
+        "bids_placed": bids,
+        "awards_made": awards or 0,
+        "total_spend": spend or 0,
+        "avg_bids_per_tender": round(bids / tenders, 2) if tenders else 0,
+    }
+
+
+@router.get("/", response_model=schemas.AnalyticsSummary)
+def get_analytics(
+    group_by: Literal["category", "department", "month"] = "category",
+    dept_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    from_month: Optional[str] = Query(None, pattern=MONTH_PATTERN),
+    to_month: Optional[str] = Query(None, pattern=MONTH_PATTERN),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_institute_admin)
+):
+    """
+    Spend, activity and tender-status counts for the admin's institute,
+    answered from the analytics rollup tables.
+    """
+    if not current_admin.institute:
+        raise HTTPException(status_code=404, detail="Admin is not associated with an institute.")
+    institute_id = current_admin.institute.institute_id
+
+    monthly = models.MonthlyRollup
+    filters = [monthly.institute_id == institute_id]
+    status_filters = [models.StatusRollup.institute_id == institute_id]
+    if dept_id:
+        filters.append(monthly.dept_id == dept_id)
+        status_filters.append(models.StatusRollup.dept_id == dept_id)
+    if category_id:
+        filters.append(monthly.category_id == category_id)
+        status_filters.append(models.StatusRollup.category_id == category_id)
+    if from_month:
+        filters.append(monthly.month >= from_month)
+    if to_month:
+        filters.append(monthly.month <= to_month)
+
+    sums = (
+        func.sum(monthly.tenders_created),
+        func.sum(monthly.bids_placed),
+        func.sum(monthly.awards_made),
+        func.sum(monthly.total_spend),
+    )
+    if group_by == "category":
+        key, label = monthly.category_id, models.TenderCategory.category_name
+        query = db.query(key, label, *sums).outerjoin(
+            models.TenderCategory, models.TenderCategory.category_id == monthly.category_id
+        ).group_by(key, label)
+    elif group_by == "department":
+        key, label = monthly.dept_id, models.Department.dept_name
+        query = db.query(key, label, *sums).outerjoin(
+            models.Department, models.Department.dept_id == monthly.dept_id
+        ).group_by(key, label)
+    else:
+        key = monthly.month
+        query = db.query(key, null(), *sums).group_by(key)
+
+    buckets = [_bucket(*row) for row in query.filter(*filters).order_by(key).all()]
+
+    totals = _bucket("total", None, *db.query(*sums).filter(*filters).one())
+
+    status_counts = db.query(
+        models.StatusRollup.status, func.sum(models.StatusRollup.tender_count)
+    ).filter(*status_filters).group_by(models.StatusRollup.status).all()
+
+    return {
+        "group_by": group_by,
+        "buckets": buckets,
+        "totals": totals,
+        "tender_status_counts": {status.value: int(count) for status, count in status_counts if count},
+    }
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models, schemas
+from ..database import get_async_db
+from .auth import get_current_institute_admin
+
+router = APIRouter(
+    prefix="/api/v1/audit",
+    tags=["Audit"]
+)
+
+
+@router.get("/", response_model=List[schemas.AuditLog])
+async def list_audit_logs(
+    from_time: Optional[datetime] = Query(None, alias="from"),
+    to_time: Optional[datetime] = Query(None, alias="to"),
+    user_id: Optional[int] = None,
+    dept_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    before: Optional[int] = Query(None, description="log_id of the last entry of the previous page"),
+    size: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_institute_admin)
+):
+    """
+    Audit entries of the admin's institute, newest first.
+
+    Filter by time range (`from` inclusive, `to` exclusive), actor (`user_id`
+    or `dept_id`), `action` and entity. Keyset paginated like the
+    notification list: pass the last log_id of a page as `before`.
+    Vendor logins belong to no institute and are not listed.
+    """
+    if not current_user.institute:
+        raise HTTPException(status_code=403, detail="No institute linked to this admin")
+    log = models.AuditLog
+    query = select(log).where(log.institute_id == current_user.institute.institute_id)
+    if from_time:
+        query = query.where(log.timestamp >= from_time)
+    if to_time:
+        query = query.where(log.timestamp < to_time)
+    if user_id is not None:
+        query = query.where(log.user_id == user_id)
+    if dept_id is not None:
+        query = query.where(log.dept_id == dept_id)
+    if action:
+        query = query.where(log.action == action)
+    if entity_type:
+        query = query.where(log.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.where(log.entity_id == entity_id)
+    if before is not None:
+        cursor = select(log.timestamp).where(log.log_id == before).scalar_subquery()
+        query = query.where(or_(
+            log.timestamp < cursor,
+            and_(log.timestamp == cursor, log.log_id < before)
+        ))
+    result = await db.execute(query.order_by(log.timestamp.desc(), log.log_id.desc()).limit(size))
+    return result.scalars().all()
@@ -1,36 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import NoResultFound
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import timedelta
+from typing import Optional
 
 from .. import models, schemas, security
-from ..database import get_db
+from ..database import get_async_db
 from ..security import oauth2_scheme, decode_access_token
+from ..services.audit import audit_log
 
 router = APIRouter(
     prefix="/api/v1/auth",
     tags=["Authentication"]
 )
 
+# Relationships the dependencies below hand out pre-loaded: async sessions
+# cannot lazy load, and sync routers read these off the returned user.
+USER_LOAD_OPTIONS = models.LazyOptions(lambda: (
+    selectinload(models.User.roles),
+    selectinload(models.User.institute),
+    selectinload(models.User.vendor),
+))
+
+
+async def get_user_by_id(db: AsyncSession, user_id) -> models.User:
+    result = await db.execute(
+        select(models.User).options(*USER_LOAD_OPTIONS).where(models.User.user_id == user_id)
+    )
+    return result.scalars().first()
+
+
 # --- SIGNUP ---
 @router.post("/signup", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def signup(data: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Sign up a new user (Vendor or Institute Admin)."""
     # Check existing user
-    if db.query(models.User).filter(models.User.username == data.username).first():
+    if (await db.execute(select(models.User.user_id).where(models.User.username == data.username))).first():
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
-    if db.query(models.User).filter(models.User.email == data.email).first():
+    if (await db.execute(select(models.User.user_id).where(models.User.email == data.email))).first():
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
 
-    # Hash password
-    hashed_password = security.get_password_hash(data.password)
+    # Hash password (bcrypt is CPU bound, keep it off the event loop)
+    hashed_password = await run_in_threadpool(security.get_password_hash, data.password)
 
     # Fetch role
-    try:
-        role_name = data.role.upper()
-        user_role = db.query(models.Role).filter(models.Role.role_name == role_name).one()
-    except NoResultFound:
+    role_name = data.role.upper()
+    user_role = (await db.execute(select(models.Role).where(models.Role.role_name == role_name))).scalars().first()
+    if not user_role:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Role '{data.role}' does not exist.")
 
     try:
@@ -42,7 +61,7 @@ def signup(data: schemas.UserCreate, db: Session = Depends(get_db)):
         )
         new_user.roles.append(user_role)
         db.add(new_user)
-        db.flush()  # assign user_id
+        await db.flush()  # assign user_id
 
         # Role-specific logic
         if role_name == "VENDOR":
@@ -71,36 +90,45 @@ def signup(data: schemas.UserCreate, db: Session = Depends(get_db)):
             )
             db.add(new_institute)
 
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user, ["roles"])
         return new_user
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"An error occurred during signup: {str(e)}")
 
 # --- LOGIN ---
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login with email/username for Users OR username for Department. Returns JWT token."""
 
     # Try user login first
-    user = db.query(models.User).filter(
-        (models.User.username == form_data.username) | 
-        (models.User.email == form_data.username)
-    ).first()
+    user = (await db.execute(
+        select(models.User).options(selectinload(models.User.roles), selectinload(models.User.institute)).where(
+            (models.User.username == form_data.username) |
+            (models.User.email == form_data.username)
+        )
+    )).scalars().first()
 
-    if user and security.verify_password(form_data.password, user.hashed_password):
+    if user and await run_in_threadpool(security.verify_password, form_data.password, user.hashed_password):
         token_data = {
             "username": user.username,
             "user_id": user.user_id,
             "roles": [role.role_name for role in user.roles]
         }
+        audit_log.record(
+            "auth.login", user_id=user.user_id,
+            institute_id=user.institute.institute_id if user.institute else None
+        )
 
     else:
         # Try department login independently (no User table required)
-        dept = db.query(models.Department).filter(models.Department.username == form_data.username).first()
-        if not dept or not security.verify_password(form_data.password, dept.hashed_password):
+        dept = (await db.execute(
+            select(models.Department).where(models.Department.username == form_data.username)
+        )).scalars().first()
+        if not dept or not await run_in_threadpool(security.verify_password, form_data.password, dept.hashed_password):
+            audit_log.record("auth.login_failed", username=form_data.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username/email or password",
@@ -113,6 +141,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             "roles": ["DEPARTMENT"],
             "institute_id": dept.institute_id   # optional extra info
         }
+        audit_log.record("auth.login", dept_id=dept.dept_id, institute_id=dept.institute_id)
 
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -123,19 +152,13 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 
 
-from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session
-from .. import models, schemas
-from ..database import get_db
-from ..security import oauth2_scheme, decode_access_token
-
 @router.get("/me", response_model=schemas.TokenData)
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """Return full current user info, including roles and institute/vendor details"""
     try:
         payload = decode_access_token(token)
         user_id = payload.get("user_id")
-        user = db.query(models.User).filter(models.User.user_id == user_id).first()
+        user = await get_user_by_id(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -158,7 +181,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
         # Vendor info
         if any(r.role_name == "VENDOR" for r in user.roles):
-            vendor = db.query(models.Vendor).filter(models.Vendor.user_id == user.user_id).first()
+            vendor = user.vendor
             if vendor:
                 data.update({
                     "company_name": vendor.company_name,
@@ -168,7 +191,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
         # Institute Admin info
         if any(r.role_name == "INSTITUTE_ADMIN" for r in user.roles):
-            institute = db.query(models.Institute).filter(models.Institute.user_id == user.user_id).first()
+            institute = user.institute
             if institute:
                 data.update({
                     "institute_name": institute.institute_name,
@@ -184,16 +207,16 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
 
 # --- DEPENDENCIES ---
-def get_current_institute_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_institute_admin(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     payload = decode_access_token(token)
-    user = db.query(models.User).filter(models.User.user_id == payload['user_id']).first()
+    user = await get_user_by_id(db, payload.get('user_id'))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     if 'INSTITUTE_ADMIN' not in [role.role_name for role in user.roles]:
         raise HTTPException(status_code=403, detail="Not authorized")
     return user
 
-def get_current_department(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_department(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """Get the currently logged-in department from JWT token."""
     payload = decode_access_token(token)
     
@@ -201,7 +224,7 @@ def get_current_department(token: str = Depends(oauth2_scheme), db: Session = De
     if not dept_id:
         raise HTTPException(status_code=401, detail="Invalid token for department")
 
-    dept = db.query(models.Department).filter(models.Department.dept_id == dept_id).first()
+    dept = await db.get(models.Department, dept_id)
     if not dept:
         raise HTTPException(status_code=401, detail="Department not found")
 
@@ -211,10 +234,9 @@ def get_current_department(token: str = Depends(oauth2_scheme), db: Session = De
 from fastapi import Body
 
 @router.post("/verify-admin-password")
-def verify_admin_password(
+async def verify_admin_password(
     password: str = Body(..., embed=True),
-    current_admin: models.User = Depends(get_current_institute_admin),
-    db: Session = Depends(get_db)
+    current_admin: models.User = Depends(get_current_institute_admin)
 ):
     """
     Verify the current institute admin's password.
@@ -223,7 +245,7 @@ def verify_admin_password(
     if not current_admin.hashed_password:
         raise HTTPException(status_code=400, detail="No password set for this admin")
 
-    if not security.verify_password(password, current_admin.hashed_password):
+    if not await run_in_threadpool(security.verify_password, password, current_admin.hashed_password):
         raise HTTPException(status_code=401, detail="Incorrect password")
 
     return {"message": "Password verified successfully"}
@@ -231,7 +253,7 @@ def verify_admin_password(
 
 # --- GET CURRENT VENDOR ---
 @router.get("/vendor/me", response_model=schemas.TokenData)
-def get_current_vendor(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_vendor(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """
     Returns the currently logged-in vendor as a SQLAlchemy Vendor object.
     """
@@ -241,7 +263,9 @@ def get_current_vendor(token: str = Depends(oauth2_scheme), db: Session = Depend
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        vendor = db.query(models.Vendor).filter(models.Vendor.user_id == user_id).first()
+        vendor = (await db.execute(
+            select(models.Vendor).where(models.Vendor.user_id == user_id)
+        )).scalars().first()
         if not vendor:
             raise HTTPException(status_code=404, detail="Vendor not found")
 
@@ -250,17 +274,31 @@ def get_current_vendor(token: str = Depends(oauth2_scheme), db: Session = Depend
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
 
-def get_current_user_model(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+async def get_current_user_model(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> models.User:
     payload = decode_access_token(token)
-    user = db.query(models.User).filter(models.User.user_id == payload['user_id']).first()
+    user = await get_user_by_id(db, payload.get('user_id'))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
-def get_optional_vendor(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Public endpoints that still want to know who is calling
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+
+async def get_token_actor(token: Optional[str] = Depends(optional_oauth2_scheme)) -> dict:
+    """user_id / dept_id of a valid token, without a database lookup; {} for anonymous callers."""
+    if not token:
+        return {}
+    try:
+        payload = decode_access_token(token)
+    except HTTPException:
+        return {}
+    return {"user_id": payload.get("user_id"), "dept_id": payload.get("dept_id")}
+
+async def get_optional_vendor(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     payload = decode_access_token(token)
     user_id = payload.get("user_id")
     if not user_id:
         return None
-    return db.query(models.Vendor).filter(models.Vendor.user_id == user_id).first()
+    return (await db.execute(select(models.Vendor).where(models.Vendor.user_id == user_id))).scalars().first()
 
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session, contains_eager
 from datetime import datetime
-from typing import List
+from typing import Optional
 
-from .. import models, schemas
+from .. import live_events, models, schemas
 from ..database import get_db
+from ..history import bulk_update_with_history
+from ..services import analytics, emd_settlement, notifications
+from ..services.audit import audit_log
 from .auth import get_current_institute_admin
 
 router = APIRouter(
@@ -23,10 +27,10 @@ def create_award(
     Creates an Award for a specific bid. This action can only be performed by an Institute Admin.
     This effectively marks a tender as 'awarded' to a specific vendor.
     """
-    # 1. Fetch the bid and all related data for validation
-    bid_to_award = db.query(models.Bid).join(models.Tender).join(models.Department).filter(
-        models.Bid.bid_id == award_data.bid_id
-    ).first()
+    # 1. Fetch the bid together with its tender and department in one query
+    bid_to_award = db.query(models.Bid).join(models.Bid.tender).join(models.Tender.department).options(
+        contains_eager(models.Bid.tender).contains_eager(models.Tender.department)
+    ).filter(models.Bid.bid_id == award_data.bid_id).first()
 
     if not bid_to_award:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bid not found")
@@ -38,13 +42,29 @@ def create_award(
             detail="You are not authorized to award bids for this institute's tenders"
         )
 
-    # 3. Business Logic Validations
-    if bid_to_award.tender.status == models.TenderStatus.AWARDED:
+    # 3. Lock the tender row so two admins cannot award the same tender at once,
+    #    then re-check its state under the lock
+    tender = db.query(models.Tender).filter(
+        models.Tender.tender_id == bid_to_award.tender_id
+    ).with_for_update().populate_existing().one()
+
+    if tender.status == models.TenderStatus.AWARDED:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="This tender has already been awarded.")
     
-    if bid_to_award.tender.submission_deadline > datetime.utcnow():
+    if tender.submission_deadline > datetime.utcnow():
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot award a bid before the tender's submission deadline has passed.")
 
+    # Bid opening also locks the tender, so this is the bid's settled status
+    db.refresh(bid_to_award, ["bid_status"])
+    if bid_to_award.bid_status not in (models.BidStatus.SUBMITTED, models.BidStatus.QUALIFIED):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only submitted or qualified bids can be awarded; this bid is {bid_to_award.bid_status.value}."
+        )
+
     # 4. Perform the transaction: Create Award, Update Bid & Tender Status
     try:
         new_award = models.Award(
@@ -56,20 +76,42 @@ def create_award(
         db.add(new_award)
 
         # Update bid and tender
+        previous_status = tender.status
         bid_to_award.bid_status = models.BidStatus.AWARDED
-        bid_to_award.tender.status = models.TenderStatus.AWARDED
+        tender.status = models.TenderStatus.AWARDED
+
+        dims = (bid_to_award.tender.department.institute_id, tender.dept_id, tender.category_id)
+        analytics.record_status_change(db, dims, previous_status, models.TenderStatus.AWARDED)
+        analytics.record_award(db, dims, bid_to_award.bid_amount, new_award.award_date)
+
+        # Disqualify every other bid still in the running with one UPDATE,
+        # without loading the losing bids into the session
+        bulk_update_with_history(
+            db,
+            models.Bid,
+            [
+                models.Bid.tender_id == tender.tender_id,
+                models.Bid.bid_id != bid_to_award.bid_id,
+                models.Bid.bid_status.in_([models.BidStatus.SUBMITTED, models.BidStatus.QUALIFIED])
+            ],
+            {"bid_status": models.BidStatus.DISQUALIFIED},
+        )
 
-        # Disqualify losing bids
-        losing_bids = db.query(models.Bid).filter(
-            models.Bid.tender_id == bid_to_award.tender_id,
-            models.Bid.bid_id != bid_to_award.bid_id
-        ).all()
-        for losing_bid in losing_bids:
-            if losing_bid.bid_status == models.BidStatus.SUBMITTED:
-                losing_bid.bid_status = models.BidStatus.DISQUALIFIED
+        # Refund the losing vendors' EMDs in the same transaction
+        db.flush()
+        refund_batch = emd_settlement.mark_refunds(db, tender.tender_id)
+        awarded = notifications.tender_awarded(tender)
+        award_made = live_events.award_made(new_award, bid_to_award, dims)
 
         db.commit()
         db.refresh(new_award)
+        emd_settlement.export_after_commit(db, refund_batch)
+        notifications.notifier.enqueue(awarded)
+        live_events.broker.publish(award_made)
+        audit_log.record(
+            "award.created", user_id=current_admin.user_id, institute_id=dims[0], entity_type="award",
+            entity_id=new_award.award_id, bid_id=new_award.bid_id, tender_id=awarded.tender_id
+        )
 
         # ✅ Convert ORM object to Pydantic model before returning
         return schemas.Award.model_validate(new_award)
@@ -82,20 +124,118 @@ def create_award(
         )
 
 
-@router.get("/", response_model=List[schemas.Award])
+@router.post("/{award_id}/settle-emds", response_model=schemas.EMDSettlement)
+def settle_award_emds(
+    award_id: int,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_institute_admin)
+):
+    """
+    Refund the EMDs of every losing vendor of the awarded tender. Already refunded
+    EMDs are skipped, so this can safely be re-run.
+    """
+    award = db.query(models.Award).join(models.Bid).join(models.Tender).join(models.Department).options(
+        contains_eager(models.Award.bid).contains_eager(models.Bid.tender).contains_eager(models.Tender.department)
+    ).filter(models.Award.award_id == award_id).first()
+    if not award:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Award not found")
+    if not current_admin.institute or award.bid.tender.department.institute_id != current_admin.institute.institute_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to settle EMDs for this award")
+
+    return emd_settlement.settle_emds(db, award.bid.tender_id)
+
+
+@router.get("/", response_model=schemas.AwardPage)
 def get_all_awards_for_institute(
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    dept_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    vendor_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_institute_admin)
 ):
     """
-    Retrieves all awards for the tenders belonging to the current admin's institute.
+    Retrieves a page of awards for the tenders belonging to the current admin's institute,
+    newest first, with bid amount and vendor; awards of tenders in cold storage are
+    included. The page count, grand total and running total of contract value come
+    from window functions in the same query.
     """
     if not current_admin.institute:
         raise HTTPException(status_code=404, detail="Admin is not associated with an institute.")
 
-    awards = db.query(models.Award).join(models.Bid).join(models.Tender).join(models.Department).filter(
-        models.Department.institute_id == current_admin.institute.institute_id
+    def award_rows(award, bid, tender):
+        """The list columns for live awards, or for awards in cold storage."""
+        filters = [models.Department.institute_id == current_admin.institute.institute_id]
+        if from_date:
+            filters.append(award.award_date >= from_date)
+        if to_date:
+            filters.append(award.award_date <= to_date)
+        if dept_id:
+            filters.append(tender.dept_id == dept_id)
+        if category_id:
+            filters.append(tender.category_id == category_id)
+        if vendor_id:
+            filters.append(bid.vendor_id == vendor_id)
+        return select(
+            award.award_id,
+            award.award_date,
+            award.contract_start_date,
+            award.contract_end_date,
+            bid.bid_id,
+            bid.bid_amount,
+            tender.tender_id,
+            tender.tender_number,
+            tender.title.label("tender_title"),
+            models.Department.dept_id,
+            models.Department.dept_name,
+            models.TenderCategory.category_id,
+            models.TenderCategory.category_name,
+            models.Vendor.vendor_id,
+            models.Vendor.company_name,
+        ).select_from(award).join(
+            bid, award.bid_id == bid.bid_id
+        ).join(
+            tender, bid.tender_id == tender.tender_id
+        ).join(
+            models.Department, tender.dept_id == models.Department.dept_id
+        ).join(
+            models.Vendor, bid.vendor_id == models.Vendor.vendor_id
+        ).outerjoin(
+            models.TenderCategory, tender.category_id == models.TenderCategory.category_id
+        ).where(*filters)
+
+    awards = union_all(
+        award_rows(models.Award, models.Bid, models.Tender),
+        award_rows(models.ArchivedAward, models.ArchivedBid, models.ArchivedTender),
+    ).subquery()
+
+    chronological = (awards.c.award_date, awards.c.award_id)
+    rows = db.execute(
+        select(
+            awards,
+            func.sum(awards.c.bid_amount).over(order_by=chronological).label("running_total"),
+            func.sum(awards.c.bid_amount).over().label("total_contract_value"),
+            func.count().over().label("total"),
+        )
+        .order_by(awards.c.award_date.desc(), awards.c.award_id.desc())
+        .offset((page - 1) * size).limit(size)
     ).all()
-    
-    # ✅ Convert ORM list to list of Pydantic models
-    return [schemas.Award.model_validate(award) for award in awards]
+
+    if rows:
+        total, total_value = rows[0].total, rows[0].total_contract_value
+    else:
+        # Past the last page the window columns are unavailable; fall back to one aggregate
+        total, total_value = db.execute(
+            select(func.count(awards.c.award_id), func.coalesce(func.sum(awards.c.bid_amount), 0))
+        ).one()
+
+    return {
+        "items": [schemas.AwardListItem.model_validate(row) for row in rows],
+        "total": total,
+        "page": page,
+        "size": size,
+        "total_contract_value": total_value or 0,
+    }
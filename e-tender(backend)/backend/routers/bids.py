@@ -1,13 +1,19 @@
 # routers/bids.py
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 import os
+import hashlib
 from datetime import datetime
 
-from .. import models, schemas
-from ..database import get_db
-from .auth import get_current_vendor, get_current_user_model
+from .. import history, live_events, models, schemas
+from ..database import get_async_db
+from ..services import analytics
+from ..services.audit import audit_log
+from .auth import USER_LOAD_OPTIONS, get_current_vendor, get_current_user_model
 
 router = APIRouter(
     prefix="/api/v1/bids",
@@ -15,35 +21,78 @@ router = APIRouter(
 )
 
 UPLOAD_DIR = "uploads/bids"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# What the schemas.Bid response model reads
+BID_SCHEMA_OPTIONS = models.LazyOptions(lambda: (
+    selectinload(models.Bid.vendor).selectinload(models.Vendor.user).selectinload(models.User.roles),
+    selectinload(models.Bid.documents),
+    selectinload(models.Bid.award),
+))
+ARCHIVED_BID_SCHEMA_OPTIONS = models.LazyOptions(lambda: (
+    selectinload(models.ArchivedBid.vendor).selectinload(models.Vendor.user).selectinload(models.User.roles),
+    selectinload(models.ArchivedBid.documents),
+    selectinload(models.ArchivedBid.award),
+))
+
+
+async def get_vendor_bid(db: AsyncSession, bid_id: int, vendor: models.Vendor, options=(),
+                         archived_options: Optional[tuple] = None) -> models.Bid:
+    """
+    Fetch one of the vendor's live bids or raise 404.
+
+    With `archived_options` a bid in cold storage is returned too, as a
+    `models.ArchivedBid` loaded with those options.
+    """
+    candidates = [(models.Bid, options)]
+    if archived_options is not None:
+        candidates.append((models.ArchivedBid, archived_options))
+    bid = None
+    for model, model_options in candidates:
+        bid = (await db.execute(
+            select(model).options(*model_options).where(
+                model.bid_id == bid_id,
+                model.vendor_id == vendor.vendor_id
+            )
+        )).scalars().first()
+        if bid:
+            break
+    if not bid:
+        raise HTTPException(status_code=404, detail="Bid not found")
+    return bid
 
 
 # --- CREATE A BID AND UPDATE TENDER ---
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_bid(
+async def create_bid(
     bid: schemas.BidCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     vendor: models.Vendor = Depends(get_current_vendor)
 ):
     """
     Create a bid for the logged-in vendor and update the Tender table.
     """
     # Step 1: Fetch the tender
-    tender = db.query(models.Tender).filter(
-        models.Tender.tender_id == bid.tender_id,
-        models.Tender.is_checked == True,
-        models.Tender.is_deleted == False
-    ).first()
+    tender = (await db.execute(
+        select(models.Tender).where(
+            models.Tender.tender_id == bid.tender_id,
+            models.Tender.is_checked == True
+        )
+    )).scalars().first()
 
     if not tender:
         raise HTTPException(status_code=404, detail="Tender not found or not open for bidding")
 
+    # The deadline scheduler moves the tender out of OPEN once bidding closes
+    if tender.status != models.TenderStatus.OPEN:
+        raise HTTPException(status_code=400, detail="Tender is no longer open for bidding")
+
     # Step 2: Check if vendor already submitted a bid
-    existing_bid = db.query(models.Bid).filter(
-        models.Bid.tender_id == bid.tender_id,
-        models.Bid.vendor_id == vendor.vendor_id,
-        models.Bid.is_deleted == False
-    ).first()
+    existing_bid = (await db.execute(
+        select(models.Bid.bid_id).where(
+            models.Bid.tender_id == bid.tender_id,
+            models.Bid.vendor_id == vendor.vendor_id
+        )
+    )).first()
     if existing_bid:
         raise HTTPException(status_code=400, detail="You have already submitted a bid for this tender")
 
@@ -54,13 +103,21 @@ def create_bid(
         vendor_id=vendor.vendor_id
     )
     db.add(new_bid)
-    db.commit()
-    db.refresh(new_bid)
+    dims = await db.run_sync(lambda session: analytics.tender_dimensions(session, tender.tender_id))
+    await db.run_sync(lambda session: analytics.record_bid_placed(session, dims))
+    await db.commit()
+    await db.refresh(new_bid)
+    # No amount: bids stay sealed until they are opened
+    audit_log.record(
+        "bid.submitted", user_id=vendor.user_id, institute_id=dims[0],
+        entity_type="bid", entity_id=new_bid.bid_id, tender_id=tender.tender_id
+    )
+    live_events.broker.publish(live_events.bid_received(new_bid, dims))
 
-    # Step 4: Update tender info (optional: you can track bid count, last bid, etc.)
-    tender.bids.append(new_bid)  # if Tender has relationship with Bid
-    db.commit()
-    db.refresh(tender)
+    # Step 4: Updated tender info (bid count)
+    bids_received = await db.scalar(
+        select(func.count(models.Bid.bid_id)).where(models.Bid.tender_id == tender.tender_id)
+    )
 
     # Step 5: Return response including updated tender info
     return {
@@ -73,123 +130,156 @@ def create_bid(
             "submission_deadline": tender.submission_deadline,
             "status": tender.status,
             "userBidSubmitted": True,
-            "bids_received": len(tender.bids)
+            "bids_received": bids_received
         }
     }
 
 # --- GET ALL BIDS FOR LOGGED-IN VENDOR ---
 @router.get("/", response_model=List[schemas.Bid])
-def get_bids(
-    db: Session = Depends(get_db),
+async def get_bids(
+    db: AsyncSession = Depends(get_async_db),
     vendor: models.Vendor = Depends(get_current_vendor)
 ):
     """
     Get all bids submitted by the logged-in vendor.
     """
-    bids = db.query(models.Bid).filter(
-        models.Bid.vendor_id == vendor.vendor_id,
-        models.Bid.is_deleted == False
-    ).all()
+    bids = []
+    for model, options in ((models.Bid, BID_SCHEMA_OPTIONS), (models.ArchivedBid, ARCHIVED_BID_SCHEMA_OPTIONS)):
+        bids += (await db.execute(
+            select(model).options(*options).where(model.vendor_id == vendor.vendor_id)
+        )).scalars().all()
     return bids
 
 
 # --- GET SINGLE BID ---
 @router.get("/{bid_id}", response_model=schemas.Bid)
-def get_bid(
+async def get_bid(
     bid_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     vendor: models.Vendor = Depends(get_current_vendor)
 ):
-    bid = db.query(models.Bid).filter(
-        models.Bid.bid_id == bid_id,
-        models.Bid.vendor_id == vendor.vendor_id,
-        models.Bid.is_deleted == False
-    ).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
-    return bid
+    return await get_vendor_bid(db, bid_id, vendor, BID_SCHEMA_OPTIONS, ARCHIVED_BID_SCHEMA_OPTIONS)
+
+
+# --- BID CHANGE HISTORY ---
+@router.get("/{bid_id}/history", response_model=List[schemas.BidHistory])
+async def get_bid_history(
+    bid_id: int,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    """Stored history versions of one of the vendor's bids, newest first."""
+    bid = await get_vendor_bid(db, bid_id, vendor, archived_options=())
+    history_model = models.same_storage(bid, models.BidHistory)
+    result = await db.execute(
+        select(history_model)
+        .where(history_model.bid_id == bid_id)
+        .order_by(history_model.version.desc())
+        .offset((page - 1) * size).limit(size)
+    )
+    return result.scalars().all()
+
+
+@router.get("/{bid_id}/history/{version}", response_model=schemas.BidSnapshot)
+async def get_bid_version(
+    bid_id: int,
+    version: int,
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    """Rebuild the bid as it was at the given version."""
+    bid = await get_vendor_bid(db, bid_id, vendor, archived_options=())
+    history_model = models.same_storage(bid, models.BidHistory)
+    rows = (await db.execute(
+        select(history_model)
+        .where(history_model.bid_id == bid_id, history_model.version <= version)
+        .order_by(history_model.version)
+    )).scalars().all()
+    snapshot = history.reconstruct(rows)
+    if not snapshot or snapshot["version"] != version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {**snapshot, "bid_id": bid_id}
 
 
 # --- UPDATE BID STATUS (restricted to vendor) ---
 @router.patch("/{bid_id}/status", response_model=schemas.Bid)
-def update_bid_status(
+async def update_bid_status(
     bid_id: int,
     status_update: schemas.Bid,  # or create a BidStatusUpdate schema
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     vendor: models.Vendor = Depends(get_current_vendor)
 ):
-    bid = db.query(models.Bid).filter(
-        models.Bid.bid_id == bid_id,
-        models.Bid.vendor_id == vendor.vendor_id,
-        models.Bid.is_deleted == False
-    ).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
+    bid = await get_vendor_bid(db, bid_id, vendor, BID_SCHEMA_OPTIONS)
 
+    previous_status = bid.bid_status
     bid.bid_status = status_update.bid_status
-    db.commit()
-    db.refresh(bid)
+    await db.commit()
+    institute_id, _, _ = await db.run_sync(lambda session: analytics.tender_dimensions(session, bid.tender_id))
+    audit_log.record(
+        "bid.status_changed", user_id=vendor.user_id, institute_id=institute_id, entity_type="bid", entity_id=bid_id,
+        old_status=previous_status, new_status=bid.bid_status
+    )
     return bid
 
 
 # --- ADD BID DOCUMENT ---
 @router.post("/{bid_id}/documents/", response_model=schemas.BidDocument)
-def add_bid_document(
+async def add_bid_document(
     bid_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     vendor: models.Vendor = Depends(get_current_vendor)
 ):
-    bid = db.query(models.Bid).filter(
-        models.Bid.bid_id == bid_id,
-        models.Bid.vendor_id == vendor.vendor_id,
-        models.Bid.is_deleted == False
-    ).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
+    bid = await get_vendor_bid(db, bid_id, vendor)
 
-    # Save file
+    # Save file, hashing it on the way so bid opening can verify it later
     filename = f"{datetime.utcnow().timestamp()}_{file.filename}"
     file_path = os.path.join(UPLOAD_DIR, filename)
-    with open(file_path, "wb+") as f:
-        f.write(file.file.read())
+    checksum = await run_in_threadpool(_save_and_hash, file.file, file_path)
 
     bid_doc = models.BidDocument(
         document_name=file.filename,
         file_path=file_path,
+        checksum=checksum,
         bid_id=bid.bid_id
     )
     db.add(bid_doc)
-    db.commit()
-    db.refresh(bid_doc)
+    await db.commit()
+    await db.refresh(bid_doc)
     return bid_doc
 
 
+def _save_and_hash(source, file_path: str) -> str:
+    digest = hashlib.sha256()
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb+") as f:
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(block)
+            f.write(block)
+    return digest.hexdigest()
+
+
 # --- GET ALL DOCUMENTS OF A BID ---
 @router.get("/{bid_id}/documents/", response_model=List[schemas.BidDocument])
-def get_bid_documents(
+async def get_bid_documents(
     bid_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     vendor: models.Vendor = Depends(get_current_vendor)
 ):
-    bid = db.query(models.Bid).filter(
-        models.Bid.bid_id == bid_id,
-        models.Bid.vendor_id == vendor.vendor_id,
-        models.Bid.is_deleted == False
-    ).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
+    bid = await get_vendor_bid(
+        db, bid_id, vendor, (selectinload(models.Bid.documents),), (selectinload(models.ArchivedBid.documents),)
+    )
     return bid.documents
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
 from typing import Optional
 import os
 
 from .. import models
-from ..database import get_db
 from ..security import decode_access_token
 
 # Note: The 'router' variable should be defined in your file, for example:
@@ -203,7 +293,7 @@ from ..security import decode_access_token
 # This security scheme does NOT automatically raise an error if a token is missing.
 optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
-def get_optional_current_user(token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)) -> Optional[models.User]:
+async def get_optional_current_user(token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Optional[models.User]:
     """
     Tries to get a User from the token. Returns None if the token is missing,
     invalid, or is not for a standard User (i.e., missing 'user_id').
@@ -215,12 +305,13 @@ def get_optional_current_user(token: Optional[str] = Depends(optional_oauth2_sch
         user_id = payload.get("user_id")
         if not user_id:
             return None
-        return db.query(models.User).filter(models.User.user_id == user_id).first()
+        result = await db.execute(select(models.User).options(*USER_LOAD_OPTIONS).where(models.User.user_id == user_id))
+        return result.scalars().first()
     except Exception:
         # If token is invalid or expired, simply return None
         return None
 
-def get_optional_current_department(token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)) -> Optional[models.Department]:
+async def get_optional_current_department(token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Optional[models.Department]:
     """
     Tries to get a Department from the token. Returns None if the token is missing,
     invalid, or is not for a Department (i.e., missing 'dept_id').
@@ -232,7 +323,7 @@ def get_optional_current_department(token: Optional[str] = Depends(optional_oaut
         dept_id = payload.get("dept_id")
         if not dept_id:
             return None
-        return db.query(models.Department).filter(models.Department.dept_id == dept_id).first()
+        return await db.get(models.Department, dept_id)
     except Exception:
         # If token is invalid or expired, simply return None
         return None
@@ -241,9 +332,9 @@ def get_optional_current_department(token: Optional[str] = Depends(optional_oaut
 # --- API Endpoint ---
 
 @router.get("/documents/{doc_id}/download")
-def download_bid_document(
+async def download_bid_document(
     doc_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # Use the flexible, optional dependencies defined above
     current_user: Optional[models.User] = Depends(get_optional_current_user),
     current_dept: Optional[models.Department] = Depends(get_optional_current_department)
@@ -252,11 +343,21 @@ def download_bid_document(
     Downloads a bid document. Authorizes the document owner (Vendor), the tender
     owner (Department), or an admin of the institute.
     """
-    # 1. Find the document and its related tender data
-    doc = db.query(models.BidDocument).join(models.Bid).join(models.Tender).filter(
-        models.BidDocument.doc_id == doc_id,
-        models.Bid.is_deleted == False
-    ).first()
+    # 1. Find the document and its related tender data (live or in cold storage)
+    doc = (await db.execute(
+        select(models.BidDocument).join(models.Bid).join(models.Tender)
+        .options(selectinload(models.BidDocument.bid).selectinload(models.Bid.tender).selectinload(models.Tender.department))
+        .where(models.BidDocument.doc_id == doc_id)
+    )).scalars().first()
+    if not doc:
+        doc = (await db.execute(
+            select(models.ArchivedBidDocument).join(models.ArchivedBidDocument.bid)
+            .options(
+                selectinload(models.ArchivedBidDocument.bid).selectinload(models.ArchivedBid.tender)
+                .selectinload(models.ArchivedTender.department)
+            )
+            .where(models.ArchivedBidDocument.doc_id == doc_id)
+        )).scalars().first()
 
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -288,6 +389,14 @@ def download_bid_document(
     if not os.path.exists(doc.file_path):
         raise HTTPException(status_code=404, detail="File does not exist on the server")
 
+    audit_log.record(
+        "bid.document_downloaded",
+        user_id=current_user.user_id if current_user else None,
+        dept_id=current_dept.dept_id if current_dept else None,
+        institute_id=doc.bid.tender.department.institute_id,
+        entity_type="bid_document", entity_id=doc_id, bid_id=doc.bid_id
+    )
+
     return FileResponse(
         path=doc.file_path,
         filename=doc.document_name,
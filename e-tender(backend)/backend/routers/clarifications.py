@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import live_events, models, schemas
+from ..database import AsyncSessionLocal, get_async_db
+from ..services import clarifications
+from ..services.audit import audit_log
+from .auth import get_current_department, get_current_vendor
+
+router = APIRouter(
+    prefix="/api/v1/tenders",
+    tags=["Clarifications"]
+)
+
+
+async def _department_tender(db: AsyncSession, tender_id: int, department: models.Department) -> models.Tender:
+    tender = await db.get(models.Tender, tender_id)
+    if not tender:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tender not found")
+    if tender.dept_id != department.dept_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this tender")
+    return tender
+
+
+async def _institute_id(db: AsyncSession, dept_id: int) -> int:
+    return await db.scalar(select(models.Department.institute_id).where(models.Department.dept_id == dept_id))
+
+
+# --- Answered Q&A (public) ---
+@router.get("/{tender_id}/clarifications", response_model=schemas.AnsweredClarificationPage)
+async def list_clarifications(
+    tender_id: int,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100)
+):
+    """
+    Answered clarifications of a published tender, in the order they were asked.
+
+    The asking vendor is not shown. Served from a per-tender cache that is
+    dropped when an answer is posted (see services/clarifications.py).
+    """
+    answered = clarifications.answered_qa.get(tender_id)
+    if answered is None:
+        version = clarifications.answered_qa.version()
+        # From the primary: a lagging replica could miss the answer that just
+        # dropped the entry, and the stale list would be cached for the TTL
+        async with AsyncSessionLocal() as db:
+            tender = await db.get(models.Tender, tender_id) or await db.get(models.ArchivedTender, tender_id)
+            if not tender or not tender.is_checked:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tender not found")
+            model = models.same_storage(tender, models.Clarification)
+            result = await db.execute(clarifications.answered_query(model, tender_id))
+            answered = clarifications.as_dicts(result.scalars().all())
+        clarifications.answered_qa.set(tender_id, answered, version)
+    start = (page - 1) * size
+    return {"items": answered[start:start + size], "total": len(answered), "page": page, "size": size}
+
+
+# --- Vendor questions ---
+@router.post("/{tender_id}/clarifications", response_model=schemas.Clarification, status_code=status.HTTP_201_CREATED)
+async def ask_clarification(
+    tender_id: int,
+    question: schemas.ClarificationQuestion,
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    """Ask the department a question about a published tender that is still open for bidding."""
+    tender = await db.get(models.Tender, tender_id)
+    if not tender or not tender.is_checked:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tender not found")
+    if tender.status != models.TenderStatus.OPEN or tender.submission_deadline <= datetime.utcnow():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tender is closed for clarifications")
+
+    clarification = models.Clarification(
+        question_text=question.question_text,
+        question_date=datetime.utcnow(),
+        tender_id=tender_id,
+        vendor_id=vendor.vendor_id
+    )
+    db.add(clarification)
+    await db.commit()
+    await db.refresh(clarification)
+
+    institute_id = await _institute_id(db, tender.dept_id)
+    audit_log.record(
+        "clarification.asked", user_id=vendor.user_id, institute_id=institute_id,
+        entity_type="tender", entity_id=tender_id, clarification_id=clarification.clarification_id
+    )
+    dims = (institute_id, tender.dept_id, tender.category_id)
+    live_events.broker.publish(live_events.clarification_asked(clarification, dims))
+    return clarification
+
+
+@router.get("/{tender_id}/clarifications/mine", response_model=List[schemas.Clarification])
+async def list_my_clarifications(
+    tender_id: int,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    """The current vendor's questions on a tender, answered or not, oldest first."""
+    result = await db.execute(
+        select(models.Clarification)
+        .where(models.Clarification.tender_id == tender_id, models.Clarification.vendor_id == vendor.vendor_id)
+        .order_by(models.Clarification.question_date, models.Clarification.clarification_id)
+        .offset((page - 1) * size).limit(size)
+    )
+    return result.scalars().all()
+
+
+# --- Department answers ---
+@router.get("/{tender_id}/clarifications/pending", response_model=List[schemas.Clarification])
+async def list_pending_clarifications(
+    tender_id: int,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_department: models.Department = Depends(get_current_department)
+):
+    """Unanswered questions on one of the department's tenders, oldest first."""
+    await _department_tender(db, tender_id, current_department)
+    result = await db.execute(
+        select(models.Clarification)
+        .where(models.Clarification.tender_id == tender_id, models.Clarification.answer_text.is_(None))
+        .order_by(models.Clarification.question_date, models.Clarification.clarification_id)
+        .offset((page - 1) * size).limit(size)
+    )
+    return result.scalars().all()
+
+
+@router.put("/{tender_id}/clarifications/{clarification_id}/answer", response_model=schemas.Clarification)
+async def answer_clarification(
+    tender_id: int,
+    clarification_id: int,
+    answer: schemas.ClarificationAnswer,
+    db: AsyncSession = Depends(get_async_db),
+    current_department: models.Department = Depends(get_current_department)
+):
+    """Answer a question on one of the department's tenders, or revise an earlier answer."""
+    tender = await _department_tender(db, tender_id, current_department)
+    clarification = await db.get(models.Clarification, clarification_id)
+    if not clarification or clarification.tender_id != tender_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Clarification not found")
+
+    clarification.answer_text = answer.answer_text
+    clarification.answer_date = datetime.utcnow()
+    await db.commit()
+    # Here at once; other workers drop their copy on the clarification.answered event below
+    clarifications.answered_qa.invalidate(tender_id)
+
+    audit_log.record(
+        "clarification.answered", dept_id=current_department.dept_id, institute_id=current_department.institute_id,
+        entity_type="tender", entity_id=tender_id, clarification_id=clarification_id
+    )
+    dims = (current_department.institute_id, tender.dept_id, tender.category_id)
+    live_events.broker.publish(live_events.clarification_answered(clarification, dims))
+    return clarification
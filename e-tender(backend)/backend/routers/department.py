@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import get_db
+from ..security import get_password_hash
 from .auth import get_current_institute_admin, get_current_department
-from passlib.context import CryptContext
 import random, string
 
 router = APIRouter(
@@ -11,11 +11,6 @@ router = APIRouter(
     tags=["Departments"]
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
-
 def generate_random_password(length=8):
     chars = string.ascii_letters + string.digits
     return ''.join(random.choice(chars) for _ in range(length))
@@ -0,0 +1,78 @@
+import asyncio
+import os
+from typing import Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from .. import live_events
+from ..database import AsyncSessionLocal
+from ..security import decode_access_token
+from .auth import get_user_by_id
+
+router = APIRouter(
+    prefix="/api/v1/events",
+    tags=["Live Events"]
+)
+
+# Comment line sent when nothing happened, so proxies keep the connection open
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# EventSource cannot send an Authorization header, so the token may also come as ?access_token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+
+async def event_scopes(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = None
+) -> Set[str]:
+    """Scopes the caller may listen to, from its department or user token."""
+    if not (token or access_token):
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    payload = decode_access_token(token or access_token)
+    if payload.get("dept_id"):
+        return {live_events.department_scope(payload["dept_id"])}
+
+    # Own session rather than get_async_db: the stream outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_id(db, payload.get("user_id"))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    scopes = set()
+    if user.institute and "INSTITUTE_ADMIN" in [role.role_name for role in user.roles]:
+        scopes.add(live_events.institute_scope(user.institute.institute_id))
+    if user.vendor:
+        scopes.update((live_events.vendor_scope(user.vendor.vendor_id), live_events.VENDORS))
+    if not scopes:
+        raise HTTPException(status_code=403, detail="No live events for this account")
+    return scopes
+
+
+async def event_stream(request: Request, scopes: Set[str]):
+    async with live_events.broker.subscribe(scopes) as subscription:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield event.sse()
+
+
+@router.get("/stream")
+async def stream_events(request: Request, scopes: Set[str] = Depends(event_scopes)):
+    """
+    Server-sent events for the caller's institute, department or vendor account.
+
+    Each event is `event: <type>` plus one JSON `data:` line. Nothing is
+    replayed on reconnect: refetch the page's list when the stream reopens.
+    """
+    return StreamingResponse(
+        event_stream(request, scopes),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import models, schemas
+from ..database import get_async_db
+from ..services import notifications
+from .auth import get_current_user_model, get_current_vendor
+
+router = APIRouter(
+    prefix="/api/v1/notifications",
+    tags=["Notifications"]
+)
+
+
+@router.get("/", response_model=List[schemas.Notification])
+async def list_notifications(
+    unread: bool = False,
+    before: Optional[int] = Query(None, description="notification_id of the last notification of the previous page"),
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_model)
+):
+    """
+    The current user's notifications, newest first; only unread ones with `unread=true`.
+
+    Keyset paginated on (created_at, notification_id): pass the last
+    notification_id of a page as `before` to get the next one, so deep pages
+    cost no more than the first.
+    """
+    query = select(models.Notification).where(models.Notification.user_id == current_user.user_id)
+    if unread:
+        query = query.where(models.Notification.is_read == False)
+    if before is not None:
+        cursor = select(models.Notification.created_at).where(
+            models.Notification.notification_id == before,
+            models.Notification.user_id == current_user.user_id
+        ).scalar_subquery()
+        query = query.where(or_(
+            models.Notification.created_at < cursor,
+            and_(models.Notification.created_at == cursor, models.Notification.notification_id < before)
+        ))
+    result = await db.execute(
+        query.order_by(models.Notification.created_at.desc(), models.Notification.notification_id.desc())
+        .limit(size)
+    )
+    return result.scalars().all()
+
+
+@router.get("/unread-count", response_model=schemas.UnreadCount)
+async def get_unread_count(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_model)
+):
+    """Unread notifications of the current user, from the per-user counter (cached briefly in the worker)."""
+    count = notifications.unread_counts.get(current_user.user_id)
+    if count is None:
+        count = await db.scalar(notifications.unread_count_query(current_user.user_id)) or 0
+        notifications.unread_counts.set(current_user.user_id, count)
+    return {"unread": count}
+
+
+async def _mark_read(db: AsyncSession, user_id: int, *criteria) -> int:
+    """Mark the user's unread notifications matching `criteria` read and keep the counter in step."""
+    result = await db.execute(
+        update(models.Notification)
+        .where(models.Notification.user_id == user_id, models.Notification.is_read == False, *criteria)
+        .values(is_read=True)
+    )
+    if result.rowcount:
+        await db.execute(notifications.subtract_unread(user_id, result.rowcount))
+    await db.commit()
+    count = await db.scalar(notifications.unread_count_query(user_id)) or 0
+    notifications.unread_counts.set(user_id, count)
+    return count
+
+
+@router.post("/read-all", response_model=schemas.UnreadCount)
+async def mark_all_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_model)
+):
+    """Mark every notification of the current user read, with one UPDATE."""
+    return {"unread": await _mark_read(db, current_user.user_id)}
+
+
+@router.post("/{notification_id}/read", response_model=schemas.UnreadCount)
+async def mark_read(
+    notification_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_model)
+):
+    """Mark one notification read; returns the remaining unread count."""
+    owned = await db.scalar(select(models.Notification.notification_id).where(
+        models.Notification.notification_id == notification_id,
+        models.Notification.user_id == current_user.user_id
+    ))
+    if not owned:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"unread": await _mark_read(db, current_user.user_id, models.Notification.notification_id == notification_id)}
+
+
+# --- CATEGORY SUBSCRIPTIONS ---
+# Vendors are notified of every tender published in the categories they subscribe to.
+@router.get("/subscriptions", response_model=List[schemas.TenderCategory])
+async def list_subscriptions(
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    result = await db.execute(
+        select(models.TenderCategory)
+        .join(models.VendorCategory, models.VendorCategory.category_id == models.TenderCategory.category_id)
+        .where(models.VendorCategory.vendor_id == vendor.vendor_id)
+        .order_by(models.TenderCategory.category_name)
+    )
+    return result.scalars().all()
+
+
+@router.put("/subscriptions/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def subscribe(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    if not await db.get(models.TenderCategory, category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    if not await db.get(models.VendorCategory, (vendor.vendor_id, category_id)):
+        db.add(models.VendorCategory(vendor_id=vendor.vendor_id, category_id=category_id))
+        await db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.delete("/subscriptions/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unsubscribe(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    vendor: models.Vendor = Depends(get_current_vendor)
+):
+    subscription = await db.get(models.VendorCategory, (vendor.vendor_id, category_id))
+    if subscription:
+        await db.delete(subscription)
+        await db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from dataclasses import asdict
+from datetime import datetime
+import os
+import re
+import uuid
+
+from .. import models, schemas
+from ..database import get_db
+from ..services import reconciliation
+from .auth import get_current_institute_admin
+
+router = APIRouter(
+    prefix="/api/v1/payments",
+    tags=["Payments"]
+)
+
+REPORT_DIR = "uploads/reconciliation"
+REPORT_ID_PATTERN = re.compile(r"^\d+_\d+_[0-9a-f]{8}$")
+
+
+def _institute_id(current_admin: models.User) -> int:
+    if not current_admin.institute:
+        raise HTTPException(status_code=404, detail="Admin is not associated with an institute.")
+    return current_admin.institute.institute_id
+
+
+# --- Reconcile a bank statement ---
+@router.post("/reconcile", response_model=schemas.ReconciliationResult)
+def reconcile_bank_statement(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_institute_admin)
+):
+    """
+    Match a bank statement CSV (needs `transaction_id` and `amount` columns) against the
+    institute's pending payments and EMDs. Matched records become COMPLETED; everything
+    that does not reconcile goes to a downloadable mismatch report.
+    """
+    institute_id = _institute_id(current_admin)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    report_id = f"{institute_id}_{int(datetime.utcnow().timestamp())}_{uuid.uuid4().hex[:8]}"
+    report_path = os.path.join(REPORT_DIR, f"{report_id}.csv")
+
+    try:
+        with open(report_path, "w", newline="") as report:
+            summary = reconciliation.reconcile_statement(db, file.file, institute_id, report)
+    except reconciliation.ReconciliationError as e:
+        os.remove(report_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        os.remove(report_path)
+        raise
+    finally:
+        file.file.close()
+
+    return {"report_id": report_id, **asdict(summary)}
+
+
+@router.get("/reconcile/{report_id}/report", response_class=FileResponse)
+def download_reconciliation_report(
+    report_id: str,
+    current_admin: models.User = Depends(get_current_institute_admin)
+):
+    """Download the mismatch report of an earlier reconciliation run."""
+    institute_id = _institute_id(current_admin)
+    if not REPORT_ID_PATTERN.match(report_id) or not report_id.startswith(f"{institute_id}_"):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    report_path = os.path.join(REPORT_DIR, f"{report_id}.csv")
+    if not os.path.exists(report_path):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return FileResponse(path=report_path, filename=f"reconciliation_{report_id}.csv", media_type="text/csv")
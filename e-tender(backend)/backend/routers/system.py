@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import List
+import os
+
+from .. import models, schemas
+from ..http_metrics import render
+from ..pool_metrics import pool_metrics
+from ..profiling import PROFILE_ID_PATTERN, profile_path
+from .auth import get_current_institute_admin
+
+router = APIRouter(
+    prefix="/api/v1/system",
+    tags=["System"]
+)
+
+# Prometheus scrapes a fixed path at the root, outside the API prefix
+metrics_router = APIRouter(tags=["System"])
+
+
+# --- DB connection pool metrics ---
+@router.get("/pool", response_model=List[schemas.PoolMetrics])
+def get_pool_metrics(current_admin: models.User = Depends(get_current_institute_admin)):
+    """Checkout counts, wait time and latency histogram of every instrumented pool."""
+    return pool_metrics()
+
+
+# --- Request profiles (see profiling.py) ---
+@router.get("/profiles/{profile_id}", response_class=FileResponse)
+def download_profile(
+    profile_id: str,
+    current_admin: models.User = Depends(get_current_institute_admin)
+):
+    """Download a stored request profile as a folded-stack file for flamegraph tools."""
+    path = profile_path(profile_id)
+    if not PROFILE_ID_PATTERN.match(profile_id) or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path=path, filename=f"profile_{profile_id}.folded", media_type="text/plain")
+
+
+# --- Prometheus scrape endpoint ---
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-route request counts, latency and response size histograms, plus pool stats."""
+    # Rendered on the event loop, the same thread the middleware records from
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 from typing import List
-from .. import models, schemas
-from ..database import get_db
-from .auth import get_current_department, get_current_institute_admin, get_current_user_model, get_optional_vendor
+from .. import history, live_events, models, schemas
+from ..services import analytics, bid_opening, notifications
+from ..services.audit import audit_log
+from ..services.scheduler import tender_scheduler
+from ..database import SessionLocal, get_async_db
+from .auth import get_current_department, get_current_institute_admin, get_current_user_model, get_optional_vendor, get_token_actor
 
 router = APIRouter(
     prefix="/api/v1/tenders",
@@ -12,27 +18,73 @@ router = APIRouter(
 )
 import os
 UPLOAD_DIR="uploads/tender"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Everything serialize_tender_with_bids touches, loaded up front with one
+# SELECT ... IN per relationship (async sessions cannot lazy load).
+TENDER_LIST_OPTIONS = models.LazyOptions(lambda: (
+    selectinload(models.Tender.department).selectinload(models.Department.institute),
+    selectinload(models.Tender.category),
+    selectinload(models.Tender.documents),
+    selectinload(models.Tender.corrigenda),
+    selectinload(models.Tender.evaluation_criteria),
+    selectinload(models.Tender.bids).selectinload(models.Bid.vendor).selectinload(models.Vendor.user),
+    selectinload(models.Tender.bids).selectinload(models.Bid.documents),
+    selectinload(models.Tender.bids).selectinload(models.Bid.award),
+))
+
+# The same for tenders in cold storage (services/cold_storage.py)
+ARCHIVED_TENDER_LIST_OPTIONS = models.LazyOptions(lambda: (
+    selectinload(models.ArchivedTender.department).selectinload(models.Department.institute),
+    selectinload(models.ArchivedTender.category),
+    selectinload(models.ArchivedTender.documents),
+    selectinload(models.ArchivedTender.corrigenda),
+    selectinload(models.ArchivedTender.evaluation_criteria),
+    selectinload(models.ArchivedTender.bids).selectinload(models.ArchivedBid.vendor).selectinload(models.Vendor.user),
+    selectinload(models.ArchivedTender.bids).selectinload(models.ArchivedBid.documents),
+    selectinload(models.ArchivedTender.bids).selectinload(models.ArchivedBid.award),
+))
+
+# What the schemas.Tender response model reads
+TENDER_SCHEMA_OPTIONS = models.LazyOptions(lambda: (
+    selectinload(models.Tender.department).selectinload(models.Department.institute)
+        .selectinload(models.Institute.user).selectinload(models.User.roles),
+    selectinload(models.Tender.category),
+    selectinload(models.Tender.documents),
+    selectinload(models.Tender.corrigenda),
+    selectinload(models.Tender.evaluation_criteria),
+    selectinload(models.Tender.bids).selectinload(models.Bid.vendor).selectinload(models.Vendor.user)
+        .selectinload(models.User.roles),
+    selectinload(models.Tender.bids).selectinload(models.Bid.documents),
+    selectinload(models.Tender.bids).selectinload(models.Bid.award),
+))
+
+
+async def load_tender(db: AsyncSession, tender_id: int, options=TENDER_SCHEMA_OPTIONS) -> models.Tender:
+    result = await db.execute(
+        select(models.Tender).options(*options)
+        .where(models.Tender.tender_id == tender_id)
+    )
+    return result.scalars().first()
 
 # --- Create Tender ---
 @router.post("/", response_model=schemas.Tender, status_code=status.HTTP_201_CREATED)
-def create_tender(
+async def create_tender(
     tender_in: schemas.TenderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_department: models.Department = Depends(get_current_department)
 ):
     """Create a new tender. Only department users can create tenders."""
     # Check if category exists; create if not
-    category = db.query(models.TenderCategory).filter(
-        models.TenderCategory.category_name == tender_in.category_name
-    ).first()
+    category = (await db.execute(
+        select(models.TenderCategory).where(models.TenderCategory.category_name == tender_in.category_name)
+    )).scalars().first()
     if not category:
         category = models.TenderCategory(category_name=tender_in.category_name)
         db.add(category)
-        db.commit()
-        db.refresh(category)
+        await db.commit()
 
     # Create tender
+    publish_date = datetime.utcnow()
     new_tender = models.Tender(
         tender_number=tender_in.tender_number,
         title=tender_in.title,
@@ -41,15 +93,27 @@ def create_tender(
         submission_deadline=tender_in.submission_deadline,
         dept_id=current_department.dept_id,
         category_id=category.category_id,
-        publish_date=datetime.utcnow(),
+        publish_date=publish_date,
         status=models.TenderStatus.OPEN,
         is_deleted=False,
         is_checked=False
     )
     db.add(new_tender)
-    db.commit()
-    db.refresh(new_tender)
-    return new_tender
+    await db.run_sync(
+        analytics.record_tender_created,
+        (current_department.institute_id, current_department.dept_id, category.category_id),
+        models.TenderStatus.OPEN,
+        publish_date
+    )
+    await db.commit()
+    audit_log.record(
+        "tender.created", dept_id=current_department.dept_id, institute_id=current_department.institute_id,
+        entity_type="tender", entity_id=new_tender.tender_id, tender_number=new_tender.tender_number
+    )
+
+    # Moves the tender to EVALUATION once the deadline passes
+    tender_scheduler.schedule(new_tender.tender_id, new_tender.submission_deadline)
+    return await load_tender(db, new_tender.tender_id)
 
 
 # --- Helper function to serialize tender with bids ---
@@ -110,13 +174,6 @@ def serialize_tender_with_bids(tender):
                 "max_score": e.max_score if hasattr(e, "max_score") else None
             } for e in tender.evaluation_criteria
         ],
-        "clarifications": [
-            {
-                "id": c.clarification_id if hasattr(c, "clarification_id") else None,
-                "question": c.question_text if hasattr(c, "question_text") else None,
-                "answer": c.answer_text if hasattr(c, "answer_text") else None
-            } for c in tender.clarifications
-        ],
         "bids": [
             {
                 "bid_id": b.bid_id,
@@ -142,73 +199,73 @@ def serialize_tender_with_bids(tender):
                     } for d in b.documents
                 ],
                 "award": serialize_award(b.award) if hasattr(b, "award") and b.award else None
-            } for b in tender.bids if not b.is_deleted
+            } for b in tender.bids
         ]
     }
 
 
+async def tenders_with_bids(db: AsyncSession, query) -> List[dict]:
+    """
+    Serialized live tenders followed by archived ones.
+
+    `query(model)` builds the SELECT for `models.Tender` and for
+    `models.ArchivedTender`.
+    """
+    serialized = []
+    for model, options in ((models.Tender, TENDER_LIST_OPTIONS), (models.ArchivedTender, ARCHIVED_TENDER_LIST_OPTIONS)):
+        tenders = (await db.execute(query(model).options(*options))).scalars().all()
+        serialized += [serialize_tender_with_bids(t) for t in tenders]
+    return serialized
+
 
 # --- Fetch tenders by department ---
 @router.get("/department/{dept_id}", response_model=List[dict])
-def get_tenders_by_department(
+async def get_tenders_by_department(
     dept_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_institute_admin)
 ):
     """Fetch all tenders from a specific department under your institute (only institute admin)."""
-    department = db.query(models.Department).filter(models.Department.dept_id == dept_id).first()
+    department = await db.get(models.Department, dept_id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     if department.institute_id != current_user.institute.institute_id:
         raise HTTPException(status_code=403, detail="Unauthorized access to this department")
 
-    tenders = db.query(models.Tender).filter(
-        models.Tender.dept_id == dept_id,
-        models.Tender.is_deleted == False
-    ).all()
-
-    return [serialize_tender_with_bids(t) for t in tenders]
+    return await tenders_with_bids(db, lambda model: select(model).where(model.dept_id == dept_id))
 
 
 # --- Fetch all tenders for an institute ---
 @router.get("/institute", response_model=List[dict])
-def get_all_tenders_for_institute(
-    db: Session = Depends(get_db),
+async def get_all_tenders_for_institute(
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_institute_admin)
 ):
     """Fetch all tenders across all departments under the institute (only institute admin)."""
-    tenders = db.query(models.Tender).join(models.Department).filter(
-        models.Department.institute_id == current_user.institute.institute_id,
-        models.Tender.is_deleted == False
-    ).all()
-    return [serialize_tender_with_bids(t) for t in tenders]
+    return await tenders_with_bids(db, lambda model: (
+        select(model).join(models.Department, model.dept_id == models.Department.dept_id)
+        .where(models.Department.institute_id == current_user.institute.institute_id)
+    ))
 
 
 # --- Fetch all published tenders (public) ---
 @router.get("/all", response_model=List[dict])
-def get_all_tenders(
-    db: Session = Depends(get_db)
+async def get_all_tenders(
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Fetch all published tenders in the system with bids info."""
-    tenders = db.query(models.Tender).filter(
-        models.Tender.is_deleted == False,
-        models.Tender.is_checked == True
-    ).all()
-    return [serialize_tender_with_bids(t) for t in tenders]
+    return await tenders_with_bids(db, lambda model: select(model).where(model.is_checked == True))
 
 
 # --- Publish Tender ---
 @router.patch("/{tender_id}/publish", response_model=schemas.Tender)
-def publish_tender(
+async def publish_tender(
     tender_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_institute_admin)
 ):
     """Publish a tender (set is_checked=True) by Institute Admin"""
-    tender = db.query(models.Tender).join(models.Department).filter(
-        models.Tender.tender_id == tender_id,
-        models.Tender.is_deleted == False
-    ).first()
+    tender = await load_tender(db, tender_id)
     if not tender:
         raise HTTPException(status_code=404, detail="Tender not found")
     if not tender.department:
@@ -216,34 +273,141 @@ def publish_tender(
     if tender.department.institute_id != current_user.institute.institute_id:
         raise HTTPException(status_code=403, detail="Unauthorized to publish this tender")
 
+    newly_published = not tender.is_checked
     tender.is_checked = True
-    db.commit()
-    db.refresh(tender)
+    await db.commit()
+    if newly_published:
+        audit_log.record(
+            "tender.published", user_id=current_user.user_id, institute_id=tender.department.institute_id,
+            entity_type="tender", entity_id=tender.tender_id
+        )
+        notifications.notifier.enqueue(notifications.tender_published(tender))
+        dims = (tender.department.institute_id, tender.dept_id, tender.category_id)
+        live_events.broker.publish(live_events.tender_published(tender, dims))
+    return tender
+
+
+async def get_institute_tender(db: AsyncSession, tender_id: int, current_user: models.User,
+                               include_archived: bool = False) -> models.Tender:
+    """
+    Fetch a live tender and make sure it belongs to the admin's institute.
+
+    With `include_archived` a tender in cold storage is returned too, as a
+    `models.ArchivedTender`.
+    """
+    candidates = (models.Tender, models.ArchivedTender) if include_archived else (models.Tender,)
+    tender = None
+    for model in candidates:
+        tender = (await db.execute(
+            select(model).options(selectinload(model.department)).where(model.tender_id == tender_id)
+        )).scalars().first()
+        if tender:
+            break
+    if not tender:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    if not current_user.institute or tender.department.institute_id != current_user.institute.institute_id:
+        raise HTTPException(status_code=403, detail="Unauthorized access to this tender")
     return tender
 
 
+# --- Open bids after the deadline ---
+@router.post("/{tender_id}/open-bids", response_model=schemas.BidOpeningSummary)
+async def open_bids(
+    tender_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_institute_admin)
+):
+    """Validate every submitted bid of a tender and mark it qualified or disqualified."""
+    await get_institute_tender(db, tender_id, current_user)
+    try:
+        # Hashes every document on a thread pool; keep it off the event loop
+        return await run_in_threadpool(_open_tender_bids, tender_id)
+    except bid_opening.BidOpeningError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _open_tender_bids(tender_id: int) -> dict:
+    with SessionLocal() as db:
+        return bid_opening.open_tender_bids(db, tender_id)
+
+
+@router.get("/{tender_id}/opening-report", response_model=List[schemas.BidOpeningResult])
+async def get_opening_report(
+    tender_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_institute_admin)
+):
+    """Per-bid results of the bid opening for a tender."""
+    tender = await get_institute_tender(db, tender_id, current_user, include_archived=True)
+    result_model = models.same_storage(tender, models.BidOpeningResult)
+    result = await db.execute(
+        select(result_model).where(result_model.tender_id == tender_id).order_by(result_model.bid_id)
+    )
+    return result.scalars().all()
+
+
+# --- Tender change history ---
+@router.get("/{tender_id}/history", response_model=List[schemas.TenderHistory])
+async def get_tender_history(
+    tender_id: int,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_institute_admin)
+):
+    """Stored history versions of a tender, newest first."""
+    tender = await get_institute_tender(db, tender_id, current_user, include_archived=True)
+    history_model = models.same_storage(tender, models.TenderHistory)
+    result = await db.execute(
+        select(history_model)
+        .where(history_model.tender_id == tender_id)
+        .order_by(history_model.version.desc())
+        .offset((page - 1) * size).limit(size)
+    )
+    return result.scalars().all()
+
+
+@router.get("/{tender_id}/history/{version}", response_model=schemas.TenderSnapshot)
+async def get_tender_version(
+    tender_id: int,
+    version: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_institute_admin)
+):
+    """Rebuild the full tender as it was at the given version."""
+    tender = await get_institute_tender(db, tender_id, current_user, include_archived=True)
+    history_model = models.same_storage(tender, models.TenderHistory)
+    rows = (await db.execute(
+        select(history_model)
+        .where(history_model.tender_id == tender_id, history_model.version <= version)
+        .order_by(history_model.version)
+    )).scalars().all()
+    snapshot = history.reconstruct(rows)
+    if not snapshot or snapshot["version"] != version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {**snapshot, "tender_id": tender_id}
+
+
 # --- Fetch tenders of the logged-in department ---
 @router.get("/my-department", response_model=List[dict])
-def get_tenders_of_current_department(
-    db: Session = Depends(get_db),
+async def get_tenders_of_current_department(
+    db: AsyncSession = Depends(get_async_db),
     current_department: models.Department = Depends(get_current_department)
 ):
     """Fetch all tenders created by the currently logged-in department with bids info."""
-    tenders = db.query(models.Tender).filter(
-        models.Tender.dept_id == current_department.dept_id,
-        models.Tender.is_deleted == False
-    ).all()
-    return [serialize_tender_with_bids(t) for t in tenders]
+    return await tenders_with_bids(
+        db, lambda model: select(model).where(model.dept_id == current_department.dept_id)
+    )
 
 from fastapi import UploadFile, File
 import shutil
 # ... other imports
 
 @router.post("/{tender_id}/documents/", response_model=schemas.TenderDocument)
-def upload_tender_document(
+async def upload_tender_document(
     tender_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_department: models.Department = Depends(get_current_department)
 ):
     """
@@ -251,7 +415,7 @@ def upload_tender_document(
     This is secure and prevents file overwrites.
     """
     # 1. Authorize the user: Check if the tender exists and belongs to the department.
-    tender = db.query(models.Tender).filter(models.Tender.tender_id == tender_id).first()
+    tender = await db.get(models.Tender, tender_id)
 
     if not tender:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tender not found")
@@ -267,13 +431,12 @@ def upload_tender_document(
     unique_filename = f"{int(datetime.utcnow().timestamp())}_{file.filename}"
     file_path = os.path.join(UPLOAD_DIR, unique_filename)
 
-    # 3. Save the file to disk efficiently and safely.
+    # 3. Save the file to disk efficiently and safely (in a worker thread, off the event loop).
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await run_in_threadpool(_save_upload, file.file, file_path)
     finally:
         # Ensure the uploaded file's buffer is always closed.
-        file.file.close()
+        await file.close()
 
     # 4. Create the database record for the document.
     new_document = models.TenderDocument(
@@ -282,11 +445,51 @@ def upload_tender_document(
         tender_id=tender_id
     )
     db.add(new_document)
-    db.commit()
-    db.refresh(new_document)
+    await db.commit()
+    await db.refresh(new_document)
 
     return new_document # FastAPI will serialize this using your TenderDocument schema
 
+
+# --- ISSUE CORRIGENDUM ---
+@router.post("/{tender_id}/corrigenda", response_model=schemas.Corrigendum, status_code=status.HTTP_201_CREATED)
+async def issue_corrigendum(
+    tender_id: int,
+    corrigendum_in: schemas.CorrigendumBase,
+    db: AsyncSession = Depends(get_async_db),
+    current_department: models.Department = Depends(get_current_department)
+):
+    """Issue a corrigendum to one of the department's tenders."""
+    tender = await db.get(models.Tender, tender_id)
+    if not tender:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tender not found")
+    if tender.dept_id != current_department.dept_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to amend this tender")
+
+    corrigendum = models.Corrigendum(
+        title=corrigendum_in.title,
+        details=corrigendum_in.details,
+        publish_date=datetime.utcnow(),
+        tender_id=tender_id
+    )
+    db.add(corrigendum)
+    await db.commit()
+    await db.refresh(corrigendum)
+
+    audit_log.record(
+        "tender.corrigendum_issued", dept_id=current_department.dept_id, institute_id=current_department.institute_id,
+        entity_type="tender", entity_id=tender_id, corrigendum_id=corrigendum.corrigendum_id
+    )
+    dims = (current_department.institute_id, tender.dept_id, tender.category_id)
+    live_events.broker.publish(live_events.corrigendum_issued(corrigendum, dims, tender.is_checked))
+    return corrigendum
+
+
+def _save_upload(source, file_path: str) -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+
 from fastapi.responses import FileResponse
 import os
 # ... other imports
@@ -294,12 +497,16 @@ import os
 # (This would be in the same file as your upload function)
 
 @router.get("/documents/{doc_id}/download", response_class=FileResponse)
-def download_tender_document(doc_id: int, db: Session = Depends(get_db)):
+async def download_tender_document(
+    doc_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    actor: dict = Depends(get_token_actor)
+):
     """
     Downloads a specific tender document by its unique document ID.
     """
-    # 1. Find the document record in the database using its ID.
-    document = db.query(models.TenderDocument).filter(models.TenderDocument.doc_id == doc_id).first()
+    # 1. Find the document record in the database using its ID (live or in cold storage).
+    document = await db.get(models.TenderDocument, doc_id) or await db.get(models.ArchivedTenderDocument, doc_id)
 
     if not document:
         raise HTTPException(
@@ -314,6 +521,16 @@ def download_tender_document(doc_id: int, db: Session = Depends(get_db)):
             detail="File not found on the server. It may have been deleted."
         )
 
+    institute_id = await db.scalar(
+        select(models.Department.institute_id)
+        .join(models.Tender, models.Tender.dept_id == models.Department.dept_id)
+        .where(models.Tender.tender_id == document.tender_id)
+    )
+    audit_log.record(
+        "tender.document_downloaded", **actor, institute_id=institute_id,
+        entity_type="tender_document", entity_id=doc_id, tender_id=document.tender_id
+    )
+
     # 3. Stream the file as a response.
     # The 'filename' parameter sets the name the user will see in their download prompt.
     return FileResponse(
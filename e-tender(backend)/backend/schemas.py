@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # Import Enums from models to ensure consistency
@@ -320,6 +320,34 @@ class Clarification(ClarificationBase):
         from_attributes = True
 
 
+class ClarificationQuestion(BaseModel):
+    question_text: str = Field(..., min_length=1)
+
+
+class ClarificationAnswer(BaseModel):
+    answer_text: str = Field(..., min_length=1)
+
+
+class AnsweredClarification(BaseModel):
+    """A clarification as every bidder sees it: without the vendor who asked."""
+    clarification_id: int
+    tender_id: int
+    question_text: str
+    answer_text: str
+    question_date: datetime
+    answer_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AnsweredClarificationPage(BaseModel):
+    items: List[AnsweredClarification] = []
+    total: int
+    page: int
+    size: int
+
+
 # --- EMD ---
 class EMDBase(BaseModel):
     amount: float
@@ -364,7 +392,6 @@ class Tender(TenderBase):
     documents: List[TenderDocument] = []
     corrigenda: List[Corrigendum] = []
     evaluation_criteria: List[EvaluationCriterion] = []
-    clarifications: List[Clarification] = []
     bids: List["Bid"] = []
 
     class Config:
@@ -434,6 +461,42 @@ class Award(AwardBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AwardListItem(BaseModel):
+    """Award row for the institute listing, flattened with its bid, tender and vendor."""
+    award_id: int
+    award_date: datetime
+    contract_start_date: Optional[datetime] = None
+    contract_end_date: Optional[datetime] = None
+    bid_id: int
+    bid_amount: float
+    tender_id: int
+    tender_number: str
+    tender_title: str
+    dept_id: int
+    dept_name: str
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    vendor_id: int
+    company_name: str
+    running_total: float = Field(description="Contract value of all matching awards up to and including this one")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AwardPage(BaseModel):
+    items: List[AwardListItem] = []
+    total: int
+    page: int
+    size: int
+    total_contract_value: float
+
+
+class EMDSettlement(BaseModel):
+    batch_id: Optional[str] = None
+    refunded: int
+    total_amount: float
+
+
 # --- BID DOCUMENT ---
 class BidDocumentBase(BaseModel):
     document_name: str
@@ -472,6 +535,61 @@ class Bid(BidBase):
         from_attributes = True
 
 
+# --- BID OPENING ---
+class BidOpeningResult(BaseModel):
+    result_id: int
+    bid_id: int
+    tender_id: int
+    bid_status: BidStatus
+    documents_checked: int
+    reason: Optional[str] = None
+    opened_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BidOpeningSummary(BaseModel):
+    tender_id: int
+    opened: int
+    qualified: int
+    disqualified: int
+
+
+# --- ANALYTICS ---
+class AnalyticsBucket(BaseModel):
+    key: str
+    label: Optional[str] = None
+    tenders_created: int = 0
+    bids_placed: int = 0
+    awards_made: int = 0
+    total_spend: float = 0
+    avg_bids_per_tender: float = 0
+
+
+class AnalyticsSummary(BaseModel):
+    group_by: str
+    buckets: List[AnalyticsBucket] = []
+    totals: AnalyticsBucket
+    tender_status_counts: dict = {}
+
+
+# --- SYSTEM ---
+class PoolMetrics(BaseModel):
+    name: str
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    slow_checkouts: int
+    waits: int
+    wait_seconds: float
+    checkout_seconds_sum: float
+    checkout_seconds_max: float
+    histogram_ms: Dict[str, int] = {}  # upper bound (ms) -> cumulative checkouts
+
+
 # --- PAYMENT ---
 class PaymentBase(BaseModel):
     amount: float
@@ -493,6 +611,15 @@ class Payment(PaymentBase):
         from_attributes = True
 
 
+class ReconciliationResult(BaseModel):
+    report_id: str
+    lines: int
+    matched_payments: int
+    matched_emds: int
+    mismatches: int
+    not_in_statement: int
+
+
 # --- COMMITTEE MEMBER ---
 class CommitteeMember(BaseModel):
     user_id: int
@@ -509,12 +636,15 @@ class AuditLogBase(BaseModel):
     action: str
     details: Optional[str] = None
     user_id: Optional[int] = None
+    dept_id: Optional[int] = None
+    institute_id: Optional[int] = None
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
 
 
 class AuditLog(AuditLogBase):
     log_id: int
     timestamp: datetime
-    user: Optional[User] = None
 
     class Config:
         from_attributes = True
@@ -535,24 +665,44 @@ class Notification(NotificationBase):
         from_attributes = True
 
 
+class UnreadCount(BaseModel):
+    unread: int
+
+
 # --- TENDER HISTORY ---
+def _split_fields(value):
+    return value.split(",") if isinstance(value, str) else value
+
+
 class TenderHistoryBase(BaseModel):
     version: int
     title: Optional[str] = None
     description: Optional[str] = None
+    estimated_cost: Optional[float] = None
     submission_deadline: Optional[datetime] = None
     status: Optional[TenderStatus] = None
+    is_checked: Optional[bool] = None
 
 
 class TenderHistory(TenderHistoryBase):
+    """One stored version; only `changed_fields` are populated after version 1."""
     history_id: int
     tender_id: int
     changed_at: datetime
+    changed_fields: List[str] = []
+
+    _split_changed_fields = field_validator("changed_fields", mode="before")(_split_fields)
 
     class Config:
         from_attributes = True
 
 
+class TenderSnapshot(TenderHistoryBase):
+    """A tender as it was at `version`, rebuilt from its history."""
+    tender_id: int
+    changed_at: datetime
+
+
 # --- BID HISTORY ---
 class BidHistoryBase(BaseModel):
     version: int
@@ -561,13 +711,23 @@ class BidHistoryBase(BaseModel):
 
 
 class BidHistory(BidHistoryBase):
+    """One stored version; only `changed_fields` are populated after version 1."""
     history_id: int
     bid_id: int
     changed_at: datetime
+    changed_fields: List[str] = []
+
+    _split_changed_fields = field_validator("changed_fields", mode="before")(_split_fields)
 
     class Config:
         from_attributes = True
 
+
+class BidSnapshot(BidHistoryBase):
+    """A bid as it was at `version`, rebuilt from its history."""
+    bid_id: int
+    changed_at: datetime
+
 # ... (all your other existing schema classes) ...
 
 # --- SCHEMAS FOR DETAILED TENDER RESPONSES ---
@@ -607,11 +767,4 @@ class TenderWithDetails(Tender): # Inherits from your existing Tender schema
 
     class Config:
         from_attributes = True
-    
 
-# --- Forward references for nested models ---
-Tender.update_forward_refs()
-Department.update_forward_refs()
-Tender.model_rebuild()
-Bid.model_rebuild()
-Department.model_rebuild()
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Spend-analytics rollups.
+
+Dashboards read `analytics_monthly_rollups` and `analytics_status_rollups`
+instead of scanning tenders, bids and awards. The rows are bumped in the
+same transaction as the write they describe (tender created, bid placed,
+tender status changed, award made) using an upsert that adds the delta, so
+concurrent writers never lose an increment.
+
+A full rebuild recomputes both tables from the source tables:
+
+    python -m backend.services.analytics rebuild
+"""
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, extract, func, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# (institute_id, dept_id, category_id)
+Dimensions = Tuple[int, int, int]
+
+
+def _month(value: Optional[datetime]) -> str:
+    return (value or datetime.utcnow()).strftime("%Y-%m")
+
+
+def increment_rows(db: Session, model, rows: List[Dict], deltas: Iterable[str]) -> None:
+    """
+    INSERT each of `rows`, or add its `deltas` columns to the existing row.
+
+    One executemany for all of them; every row must carry the same keys.
+    """
+    dialect = db.get_bind().dialect.name
+    table = model.__table__
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_duplicate_key_update({k: table.c[k] + stmt.inserted[k] for k in deltas})
+    else:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key],
+            set_={k: table.c[k] + stmt.excluded[k] for k in deltas}
+        )
+    db.execute(stmt, rows)
+
+
+def _increment(db: Session, model, keys: Dict, deltas: Dict) -> None:
+    """INSERT the row with `deltas` as values, or add them to the existing row."""
+    increment_rows(db, model, [{**keys, **deltas}], deltas)
+
+
+def _keys(dims: Dimensions) -> Dict:
+    institute_id, dept_id, category_id = dims
+    return {"institute_id": institute_id, "dept_id": dept_id, "category_id": category_id or 0}
+
+
+def tender_dimensions(db: Session, tender_id: int) -> Dimensions:
+    """Look up the rollup dimensions of a tender with one query."""
+    return tuple(db.execute(
+        select(models.Department.institute_id, models.Tender.dept_id, models.Tender.category_id)
+        .select_from(models.Tender)
+        .join(models.Department, models.Tender.dept_id == models.Department.dept_id)
+        .where(models.Tender.tender_id == tender_id)
+    ).one())
+
+
+# --- incremental updates, called before the surrounding commit ---
+def record_tender_created(db: Session, dims: Dimensions, status: models.TenderStatus, when: Optional[datetime] = None) -> None:
+    _increment(db, models.MonthlyRollup, {**_keys(dims), "month": _month(when)}, {"tenders_created": 1})
+    _increment(db, models.StatusRollup, {**_keys(dims), "status": status}, {"tender_count": 1})
+
+
+def record_bid_placed(db: Session, dims: Dimensions, when: Optional[datetime] = None) -> None:
+    _increment(db, models.MonthlyRollup, {**_keys(dims), "month": _month(when)}, {"bids_placed": 1})
+
+
+def record_award(db: Session, dims: Dimensions, amount: float, when: Optional[datetime] = None) -> None:
+    _increment(db, models.MonthlyRollup, {**_keys(dims), "month": _month(when)}, {"awards_made": 1, "total_spend": amount})
+
+
+def record_status_change(db: Session, dims: Dimensions, old: models.TenderStatus, new: models.TenderStatus, count: int = 1) -> None:
+    if old == new or not count:
+        return
+    _increment(db, models.StatusRollup, {**_keys(dims), "status": old}, {"tender_count": -count})
+    _increment(db, models.StatusRollup, {**_keys(dims), "status": new}, {"tender_count": count})
+
+
+def record_bulk_status_change(db: Session, tender_ids: Iterable[int], old: models.TenderStatus, new: models.TenderStatus) -> None:
+    """Status change for many tenders at once: one grouped query, one upsert pair per group."""
+    tender_ids = list(tender_ids)
+    if not tender_ids:
+        return
+    groups = db.execute(
+        select(models.Department.institute_id, models.Tender.dept_id, models.Tender.category_id, func.count())
+        .select_from(models.Tender)
+        .join(models.Department, models.Tender.dept_id == models.Department.dept_id)
+        .where(models.Tender.tender_id.in_(tender_ids))
+        .group_by(models.Department.institute_id, models.Tender.dept_id, models.Tender.category_id)
+    ).all()
+    for institute_id, dept_id, category_id, count in groups:
+        record_status_change(db, (institute_id, dept_id, category_id), old, new, count)
+
+
+# --- full rebuild ---
+# Tenders, bids and awards are counted in the live tables and in cold storage
+STORAGES = (
+    (models.Tender, models.Bid, models.Award),
+    (models.ArchivedTender, models.ArchivedBid, models.ArchivedAward),
+)
+
+
+def _grouped_by_month(db: Session, tender, source, date_column, joins, value=None):
+    """Rows of (institute, dept, category, year, month, count[, sum]) for one source table, soft-deleted rows excluded."""
+    year, month = extract("year", date_column), extract("month", date_column)
+    group = [models.Department.institute_id, tender.dept_id, tender.category_id, year, month]
+    columns = group + [func.count()] + ([func.sum(value)] if value is not None else [])
+    query = select(*columns).select_from(source)
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return db.execute(query.where(date_column.isnot(None)).group_by(*group)).all()
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """Recompute every rollup row from tenders, bids and awards (archived ones included), then commit."""
+    monthly = defaultdict(lambda: {"tenders_created": 0, "bids_placed": 0, "awards_made": 0, "total_spend": 0.0})
+    statuses = defaultdict(int)
+
+    def bucket(row):
+        return monthly[(row[0], row[1], row[2] or 0, f"{int(row[3]):04d}-{int(row[4]):02d}")]
+
+    for tender, bid, award in STORAGES:
+        to_department = (models.Department, tender.dept_id == models.Department.dept_id)
+        to_tender = (tender, bid.tender_id == tender.tender_id)
+        to_bid = (bid, award.bid_id == bid.bid_id)
+
+        for row in _grouped_by_month(db, tender, tender, tender.publish_date, [to_department]):
+            bucket(row)["tenders_created"] += row[5]
+
+        for row in _grouped_by_month(db, tender, bid, bid.submission_date, [to_tender, to_department]):
+            bucket(row)["bids_placed"] += row[5]
+
+        for row in _grouped_by_month(
+            db, tender, award, award.award_date, [to_bid, to_tender, to_department], value=bid.bid_amount
+        ):
+            bucket(row)["awards_made"] += row[5]
+            bucket(row)["total_spend"] += row[6] or 0.0
+
+        for i, d, c, status, n in db.execute(
+            select(models.Department.institute_id, tender.dept_id, tender.category_id, tender.status, func.count())
+            .select_from(tender)
+            .join(*to_department)
+            .group_by(models.Department.institute_id, tender.dept_id, tender.category_id, tender.status)
+        ).all():
+            statuses[(i, d, c or 0, status)] += n
+
+    db.execute(delete(models.MonthlyRollup))
+    db.execute(delete(models.StatusRollup))
+    monthly_rows = [
+        {"institute_id": i, "dept_id": d, "category_id": c, "month": m, **values}
+        for (i, d, c, m), values in monthly.items()
+    ]
+    status_rows = [
+        {"institute_id": i, "dept_id": d, "category_id": c, "status": status, "tender_count": n}
+        for (i, d, c, status), n in statuses.items()
+    ]
+    if monthly_rows:
+        db.execute(insert(models.MonthlyRollup), monthly_rows)
+    if status_rows:
+        db.execute(insert(models.StatusRollup), status_rows)
+    db.commit()
+    return {"monthly_rows": len(monthly_rows), "status_rows": len(status_rows)}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m backend.services.analytics rebuild")
+    from ..database import SessionLocal
+    with SessionLocal() as session:
+        print(rebuild_rollups(session))
@@ -0,0 +1,205 @@
+"""
+Archiving of soft-deleted rows.
+
+Tenders, bids and awards soft-deleted more than `ARCHIVE_AFTER_DAYS` ago are
+moved to their `<table>_archive` tables together with the rows they own
+(documents, history, corrigenda, opening results, payments - their
+delete-orphan relationships). Each batch of `ARCHIVE_BATCH_SIZE` rows is
+copied with INSERT ... SELECT and deleted in one transaction, so the live
+tables and their indexes shrink without long locks. Archived rows are filed
+under the year they were deleted (`archive_year`).
+
+Awards go first, then bids, then tenders, so a tender deleted along with its
+bids is archived in the same run. A row that is still referenced from
+outside what it owns (a tender with live bids, EMDs or clarifications) stays
+until the reference is gone.
+
+Archived rows keep their ids, so the live tables must never hand out an id
+twice; both archiving jobs refuse to run on a database that may (see
+`require_stable_ids`).
+
+`archiver` runs in the app every `ARCHIVE_INTERVAL_SECONDS`, guarded by a
+lease so only one worker archives at a time. To archive once by hand:
+
+    python -m backend.services.archiver [days]
+"""
+import logging
+import os
+import socket
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Integer, delete, exists, extract, insert, literal, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from ..soft_delete import INCLUDE_DELETED
+from .scheduler import acquire_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+LEASE_NAME = "soft-delete-archiver"
+
+
+class ArchiveError(Exception):
+    """Raised when rows cannot be archived safely on this database."""
+
+
+def require_stable_ids(db: Session) -> None:
+    """
+    Raise ArchiveError unless the live tables never reuse an id.
+
+    SQLite tables are AUTOINCREMENT (models._register_archive) and PostgreSQL
+    sequences never go back, but MySQL before 8.0 (MariaDB before 10.2.4)
+    resets AUTO_INCREMENT to MAX(id) + 1 on restart: archiving the newest
+    rows would let new ones take their ids, making the archive fallbacks
+    ambiguous and the next archive run fail on a duplicate key.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name != "mysql":
+        return
+    minimum = (10, 2, 4) if dialect.is_mariadb else (8, 0)
+    if dialect.server_version_info < minimum:
+        version = ".".join(str(part) for part in dialect.server_version_info)
+        raise ArchiveError(f"{'MariaDB' if dialect.is_mariadb else 'MySQL'} {version} can reuse ids of archived rows")
+
+
+def _owned_tables(model) -> List[str]:
+    names = [model.__tablename__]
+    for rel in models.owned_relationships(model):
+        names += _owned_tables(rel.mapper.class_)
+    return names
+
+
+def _references(model) -> list:
+    """Foreign key columns of tables outside `model`'s owned rows that point at it."""
+    owned = set(_owned_tables(model))
+    return [
+        fk.parent
+        for table in models.Base.metadata.sorted_tables if table.name not in owned
+        for fk in table.foreign_keys if fk.column.table is model.__table__
+    ]
+
+
+def archivable_rows(db: Session, model, cutoff: datetime, limit: int) -> list:
+    """(id, year deleted) of rows of `model` deleted before `cutoff` that nothing else references."""
+    pk = model.__mapper__.primary_key[0]
+    query = select(pk, extract("year", model.deleted_at)).where(model.is_deleted == True, model.deleted_at < cutoff)
+    for column in _references(model):
+        query = query.where(~exists().where(column == pk))
+    return db.execute(query.order_by(pk).limit(limit).execution_options(**INCLUDE_DELETED)).all()
+
+
+def by_year(rows) -> Dict[int, List[int]]:
+    """Group (id, year) rows into {year: [ids]}."""
+    grouped: Dict[int, List[int]] = {}
+    for row_id, year in rows:
+        grouped.setdefault(int(year), []).append(row_id)
+    return grouped
+
+
+def copy_and_delete(db: Session, table, where, archive_year: int) -> None:
+    """Copy the rows of `table` matching `where` to its archive table, then delete them."""
+    columns = [column.name for column in table.columns]
+    db.execute(
+        insert(models.ARCHIVE_TABLES[table.name]).from_select(
+            columns + ["archive_year"], select(*table.columns, literal(archive_year, Integer)).where(where)
+        )
+    )
+    db.execute(delete(table).where(where))
+
+
+def _move(db: Session, model, where, archive_year: int) -> None:
+    """Archive the rows matching `where` and, before them, the rows they own."""
+    for rel in models.owned_relationships(model):
+        (parent_column, child_column), = rel.local_remote_pairs
+        _move(db, rel.mapper.class_, child_column.in_(select(parent_column).where(where)), archive_year)
+    copy_and_delete(db, model.__table__, where, archive_year)
+
+
+def archive_deleted(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS,
+                    batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict[str, int]:
+    """Archive every eligible row, committing after each batch. Returns rows archived per table."""
+    require_stable_ids(db)
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = {}
+    for model in models.ARCHIVE_ROOTS:
+        total = 0
+        while True:
+            rows = archivable_rows(db, model, cutoff, batch_size)
+            if not rows:
+                break
+            for year, ids in by_year(rows).items():
+                _move(db, model, model.__mapper__.primary_key[0].in_(ids), year)
+            db.commit()
+            total += len(rows)
+        archived[model.__tablename__] = total
+    return archived
+
+
+class PeriodicArchiveJob:
+    """Background thread running an archiving job every `interval` seconds under a lease."""
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[Session], Dict[str, int]],
+        interval: int,
+        session_factory: Callable[[], Session] = SessionLocal,
+        lease_ttl: int = 600,
+    ):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.session_factory = session_factory
+        self.lease_ttl = lease_ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Archiving job %s failed", self.name)
+
+    def run_once(self) -> None:
+        with self.session_factory() as db:
+            if not acquire_lease(db, self.name, self.holder, self.lease_ttl):
+                return
+            try:
+                archived = self.job(db)
+            finally:
+                release_lease(db, self.name, self.holder)
+        if any(archived.values()):
+            logger.info("%s archived %s", self.name, archived)
+
+
+archiver = PeriodicArchiveJob(LEASE_NAME, archive_deleted, ARCHIVE_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    with SessionLocal() as session:
+        print(archive_deleted(session, int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS))
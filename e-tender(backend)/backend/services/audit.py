@@ -0,0 +1,196 @@
+"""
+Buffered audit trail.
+
+Routes call `audit_log.record(...)` for logins, tender creation and
+publishing, bids, document downloads and awards. `record()` only puts the
+entry on an in-memory queue (bounded at `AUDIT_QUEUE_SIZE`), so the bid path
+pays no database round trip; a background thread writes the queued entries
+with one executemany INSERT once `AUDIT_BATCH_SIZE` of them are waiting or
+`AUDIT_FLUSH_SECONDS` after the oldest one arrived, whichever comes first.
+The timestamp is taken when the event happens, not when it is written.
+
+Durability:
+
+* `stop()` (app shutdown) writes everything still queued before returning.
+* A batch the database rejects, and an entry recorded while the queue is
+  full, is appended to `AUDIT_SPILL_PATH` (JSON lines) instead of being
+  dropped. Load the file back once the database is healthy:
+
+      python -m backend.services.audit replay
+
+* Entries still queued when the process is killed are lost; that is at most
+  `AUDIT_FLUSH_SECONDS` worth of activity.
+"""
+import enum
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0"))
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "uploads/audit/spill.jsonl")
+
+_TIMED_OUT = object()
+
+
+def _json_default(value):
+    return value.value if isinstance(value, enum.Enum) else str(value)
+
+
+def write_entries(db: Session, entries: List[Dict]) -> None:
+    db.execute(insert(models.AuditLog), entries)
+    db.commit()
+
+
+class AuditWriter:
+    """Bounded queue of audit entries plus the thread that writes them in batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_seconds: float = AUDIT_FLUSH_SECONDS,
+        max_queued: int = AUDIT_QUEUE_SIZE,
+        spill_path: str = AUDIT_SPILL_PATH,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spill_path = spill_path
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(max_queued)
+        self._spill_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        action: str,
+        *,
+        user_id: Optional[int] = None,
+        dept_id: Optional[int] = None,
+        institute_id: Optional[int] = None,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        **details,
+    ) -> None:
+        """Queue an audit entry; extra keyword arguments are stored as JSON `details`."""
+        entry = {
+            "action": action,
+            "timestamp": datetime.utcnow(),
+            "user_id": user_id,
+            "dept_id": dept_id,
+            "institute_id": institute_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "details": json.dumps(details, default=_json_default) if details else None,
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Audit queue full, spilling %s to %s", action, self.spill_path)
+            self._spill([entry])
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Write every queued entry, then stop the thread."""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write every queued entry on the calling thread."""
+        batch = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                batch.append(entry)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _run(self) -> None:
+        batch: List[Dict] = []
+        deadline = 0.0
+        while True:
+            timeout = max(deadline - time.monotonic(), 0) if batch else None
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = _TIMED_OUT
+            if entry is None:
+                if batch:
+                    self._write(batch)
+                return
+            if entry is not _TIMED_OUT:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_seconds
+                batch.append(entry)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch: List[Dict]) -> None:
+        try:
+            with self.session_factory() as db:
+                write_entries(db, batch)
+        except Exception:
+            logger.exception("Could not write %d audit entries, spilling them to %s", len(batch), self.spill_path)
+            self._spill(batch)
+
+    def _spill(self, entries: List[Dict]) -> None:
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps({**entry, "timestamp": entry["timestamp"].isoformat()}) + "\n")
+
+
+def replay_spill(db: Session, path: str = AUDIT_SPILL_PATH, batch_size: int = AUDIT_BATCH_SIZE) -> int:
+    """Insert the entries of a spill file, then remove it. Returns the number of entries loaded."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+    for start in range(0, len(entries), batch_size):
+        write_entries(db, entries[start:start + batch_size])
+    os.remove(path)
+    return len(entries)
+
+
+audit_log = AuditWriter()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["replay"]:
+        sys.exit("usage: python -m backend.services.audit replay")
+    with SessionLocal() as session:
+        print(replay_spill(session))
@@ -0,0 +1,200 @@
+"""
+Bid opening: runs once a tender's submission deadline has passed.
+
+Every SUBMITTED bid of the tender is opened in one pass. Bid documents are
+validated on a thread pool (file present, non-empty, sha256 matches the one
+taken at upload), the bids are moved to QUALIFIED / DISQUALIFIED with one
+UPDATE per outcome, and a per-bid report is bulk-inserted into
+`bid_opening_results`.
+
+The tender row is locked for the whole pass, so a manual opening and the
+scheduler's cannot read the same SUBMITTED bids at once. Only bids whose
+status UPDATE matched get a report row, and `bid_opening_results.bid_id` is
+unique, so a bid is never reported twice.
+"""
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..history import bulk_update_with_history
+
+# Number of threads used to hash documents. Hashing releases the GIL, so
+# threads scale with disk throughput rather than CPU count.
+OPENING_WORKERS = int(os.getenv("BID_OPENING_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+
+# Bids are updated / reported in chunks to keep IN (...) lists bounded.
+WRITE_CHUNK_SIZE = 1000
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class BidOpeningError(Exception):
+    """Raised when a tender cannot be opened (unknown tender, deadline not reached)."""
+
+
+@dataclass
+class _DocumentRef:
+    doc_id: int
+    file_path: str
+    checksum: Optional[str]
+
+
+@dataclass
+class _BidOutcome:
+    bid_id: int
+    qualified: bool
+    documents_checked: int
+    reason: Optional[str] = None
+    # doc_id -> sha256 for documents uploaded before checksums were recorded
+    backfill: Dict[int, str] = field(default_factory=dict)
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex sha256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _check_bid(bid_id: int, documents: List[_DocumentRef]) -> _BidOutcome:
+    """Validate all documents of one bid. Runs on a worker thread, no DB access."""
+    if not documents:
+        return _BidOutcome(bid_id, False, 0, "No documents submitted")
+
+    outcome = _BidOutcome(bid_id, True, 0)
+    for doc in documents:
+        outcome.documents_checked += 1
+        try:
+            if os.path.getsize(doc.file_path) == 0:
+                return _BidOutcome(bid_id, False, outcome.documents_checked, f"Document {doc.doc_id} is empty")
+            actual = file_sha256(doc.file_path)
+        except OSError:
+            return _BidOutcome(bid_id, False, outcome.documents_checked, f"Document {doc.doc_id} is missing on the server")
+
+        if doc.checksum is None:
+            outcome.backfill[doc.doc_id] = actual
+        elif doc.checksum != actual:
+            return _BidOutcome(bid_id, False, outcome.documents_checked, f"Checksum mismatch for document {doc.doc_id}")
+    return outcome
+
+
+def _chunks(items: list, size: int = WRITE_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _set_status(db: Session, bid_ids: List[int], new_status: models.BidStatus) -> Set[int]:
+    """Move the still-SUBMITTED bids among `bid_ids` to `new_status`; returns the ids that were moved."""
+    moved: Set[int] = set()
+    for chunk in _chunks(bid_ids):
+        matched = bulk_update_with_history(
+            db,
+            models.Bid,
+            [models.Bid.bid_id.in_(chunk), models.Bid.bid_status == models.BidStatus.SUBMITTED],
+            {"bid_status": new_status},
+        )
+        if matched < len(chunk):
+            # Some bids were withdrawn or opened by another run meanwhile (the
+            # UPDATE waited for its commit, so its report rows are visible).
+            moved.update(db.scalars(
+                select(models.Bid.bid_id).where(
+                    models.Bid.bid_id.in_(chunk),
+                    models.Bid.bid_status == new_status,
+                    ~models.Bid.opening_results.any()
+                )
+            ))
+        else:
+            moved.update(chunk)
+    return moved
+
+
+def open_tender_bids(db: Session, tender_id: int, workers: Optional[int] = None) -> dict:
+    """
+    Open all SUBMITTED bids of a tender whose deadline has passed.
+
+    Safe to call more than once, also concurrently: the tender row is locked
+    until the commit, and bids that were already opened are no longer
+    SUBMITTED and are skipped. Commits the session and returns a summary.
+    """
+    tender = db.execute(
+        select(models.Tender.tender_id, models.Tender.submission_deadline).where(
+            models.Tender.tender_id == tender_id
+        ).with_for_update()
+    ).first()
+    if not tender:
+        raise BidOpeningError("Tender not found")
+    if tender.submission_deadline > datetime.utcnow():
+        raise BidOpeningError("Bids cannot be opened before the submission deadline")
+
+    # One query for every pending bid and its documents.
+    rows = db.execute(
+        select(
+            models.Bid.bid_id,
+            models.BidDocument.doc_id,
+            models.BidDocument.file_path,
+            models.BidDocument.checksum,
+        )
+        .outerjoin(models.BidDocument, models.BidDocument.bid_id == models.Bid.bid_id)
+        .where(
+            models.Bid.tender_id == tender_id,
+            models.Bid.bid_status == models.BidStatus.SUBMITTED
+        )
+    ).all()
+
+    documents_by_bid: Dict[int, List[_DocumentRef]] = defaultdict(list)
+    for row in rows:
+        documents = documents_by_bid[row.bid_id]
+        if row.doc_id is not None:
+            documents.append(_DocumentRef(row.doc_id, row.file_path, row.checksum))
+
+    if not documents_by_bid:
+        db.commit()
+        return {"tender_id": tender_id, "opened": 0, "qualified": 0, "disqualified": 0}
+
+    with ThreadPoolExecutor(max_workers=workers or OPENING_WORKERS) as pool:
+        outcomes = list(pool.map(lambda item: _check_bid(*item), documents_by_bid.items()))
+
+    opened_at = datetime.utcnow()
+    qualified = _set_status(db, [o.bid_id for o in outcomes if o.qualified], models.BidStatus.QUALIFIED)
+    disqualified = _set_status(db, [o.bid_id for o in outcomes if not o.qualified], models.BidStatus.DISQUALIFIED)
+    opened = qualified | disqualified
+    outcomes = [o for o in outcomes if o.bid_id in opened]
+
+    backfill = [
+        {"doc_id": doc_id, "checksum": checksum}
+        for o in outcomes for doc_id, checksum in o.backfill.items()
+    ]
+    for chunk in _chunks(backfill):
+        db.execute(update(models.BidDocument), chunk)
+
+    report = [
+        {
+            "tender_id": tender_id,
+            "bid_id": o.bid_id,
+            "bid_status": models.BidStatus.QUALIFIED if o.qualified else models.BidStatus.DISQUALIFIED,
+            "documents_checked": o.documents_checked,
+            "reason": o.reason,
+            "opened_at": opened_at,
+        }
+        for o in outcomes
+    ]
+    for chunk in _chunks(report):
+        db.execute(insert(models.BidOpeningResult), chunk)
+
+    db.commit()
+    return {
+        "tender_id": tender_id,
+        "opened": len(outcomes),
+        "qualified": len(qualified),
+        "disqualified": len(disqualified),
+    }
@@ -0,0 +1,98 @@
+"""
+Pre-bid clarifications (vendor questions and department answers).
+
+Tender listings used to embed every clarification of every tender. The
+answered Q&A of a tender now has its own paginated endpoint, and since it is
+read far more often than it changes, `answered_qa` caches each tender's
+answered clarifications in the process:
+
+* an entry is valid for `CLARIFICATION_CACHE_TTL` seconds, and at most
+  `CLARIFICATION_CACHE_SIZE` tenders are cached (least recently used first out);
+* posting an answer drops the tender's entry in the answering worker at
+  once, and in every other worker when its `clarification.answered` live
+  event arrives through `live_events.broker` (with a Redis broker that
+  reaches all workers; the TTL only bounds staleness if an event is lost).
+
+Entries are always loaded from the primary, never the read replica, so a
+lagging replica cannot refill the cache with a list that misses the answer
+that just invalidated it. Pages are cut from the cached list, so every page
+of a tender costs one query per TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+
+from .. import live_events, schemas
+
+CLARIFICATION_CACHE_TTL = float(os.getenv("CLARIFICATION_CACHE_TTL", "300"))
+CLARIFICATION_CACHE_SIZE = int(os.getenv("CLARIFICATION_CACHE_SIZE", "1000"))
+
+
+class AnsweredClarifications:
+    """Per-process LRU cache of each tender's answered clarifications."""
+
+    def __init__(self, ttl: float = CLARIFICATION_CACHE_TTL, max_tenders: int = CLARIFICATION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_tenders = max_tenders
+        self._entries: "OrderedDict[int, Tuple[List[dict], float]]" = OrderedDict()
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def version(self) -> int:
+        """Take before reading the database; pass to `set()`."""
+        return self._invalidations
+
+    def get(self, tender_id: int) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._entries.get(tender_id)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[tender_id]
+                return None
+            self._entries.move_to_end(tender_id)
+            return entry[0]
+
+    def set(self, tender_id: int, clarifications: List[dict], version: int) -> None:
+        """Cache `clarifications` unless an answer was posted since `version`, as they may predate it."""
+        with self._lock:
+            if version != self._invalidations:
+                return
+            self._entries[tender_id] = (clarifications, time.monotonic() + self.ttl)
+            self._entries.move_to_end(tender_id)
+            while len(self._entries) > self.max_tenders:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tender_id: int) -> None:
+        with self._lock:
+            self._invalidations += 1
+            self._entries.pop(tender_id, None)
+
+
+answered_qa = AnsweredClarifications()
+
+
+def _on_live_event(event: live_events.LiveEvent) -> None:
+    if event.type == "clarification.answered":
+        answered_qa.invalidate(event.data["tender_id"])
+
+
+live_events.broker.add_listener(_on_live_event)
+
+
+def answered_query(model, tender_id: int):
+    """Answered clarifications of a tender in the order they were asked; `model` is live or archived."""
+    return (
+        select(model)
+        .where(model.tender_id == tender_id, model.answer_text.isnot(None))
+        .order_by(model.question_date, model.clarification_id)
+    )
+
+
+def as_dicts(clarifications) -> List[dict]:
+    """Plain copies for the cache, so no ORM object outlives its session."""
+    return [schemas.AnsweredClarification.model_validate(c).model_dump() for c in clarifications]
@@ -0,0 +1,90 @@
+"""
+Cold storage for finished tenders.
+
+CLOSED and AWARDED tenders whose submission deadline is more than
+`COLD_STORAGE_AFTER_DAYS` ago move to the `<table>_archive` tables together
+with every row that references them: bids, awards, payments, EMDs,
+documents, corrigenda, clarifications, history and opening results. The live
+tables then only hold tenders still in progress plus the recent ones, however
+many years of tenders accumulate.
+
+Archived rows keep their ids (which is why the job refuses to run where the
+live tables could reuse them, see `archiver.require_stable_ids`) and are
+filed under the tender's deadline year (`archive_year`). The read endpoints fall back to the `Archived*` models when
+a tender or bid is not live, and the tender and bid listings include archived
+ones, so clients see no difference.
+
+`COLD_STORAGE_BATCH_SIZE` tenders are moved per transaction. `cold_storage`
+runs in the app every `COLD_STORAGE_INTERVAL_SECONDS`; to run it once by hand:
+
+    python -m backend.services.cold_storage [days]
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Set
+
+from sqlalchemy import extract, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from ..soft_delete import INCLUDE_DELETED
+from .archiver import PeriodicArchiveJob, by_year, copy_and_delete, require_stable_ids
+
+COLD_STORAGE_AFTER_DAYS = int(os.getenv("COLD_STORAGE_AFTER_DAYS", "365"))
+COLD_STORAGE_BATCH_SIZE = int(os.getenv("COLD_STORAGE_BATCH_SIZE", "100"))
+COLD_STORAGE_INTERVAL_SECONDS = int(os.getenv("COLD_STORAGE_INTERVAL_SECONDS", "86400"))
+
+FINISHED_STATUSES = (models.TenderStatus.CLOSED, models.TenderStatus.AWARDED)
+
+
+def finished_tenders(db: Session, cutoff: datetime, limit: int) -> list:
+    """(tender_id, deadline year) of finished tenders whose deadline is before `cutoff`, soft-deleted ones included."""
+    return db.execute(
+        select(models.Tender.tender_id, extract("year", models.Tender.submission_deadline))
+        .where(models.Tender.status.in_(FINISHED_STATUSES), models.Tender.submission_deadline < cutoff)
+        .order_by(models.Tender.tender_id)
+        .limit(limit)
+        .execution_options(**INCLUDE_DELETED)
+    ).all()
+
+
+def _move_with_dependants(db: Session, table, where, archive_year: int, moved: Set[str]) -> None:
+    """
+    Archive the rows of `table` matching `where`, after every row referencing them.
+
+    A table reachable along two paths (bid_opening_results points at both the
+    tender and the bid) is moved along the first one only; both select the
+    same rows.
+    """
+    moved.add(table.name)
+    for other, column, referenced in models.referencing_columns(table):
+        if other.name not in moved:
+            _move_with_dependants(db, other, column.in_(select(referenced).where(where)), archive_year, moved)
+    copy_and_delete(db, table, where, archive_year)
+
+
+def archive_finished_tenders(db: Session, older_than_days: int = COLD_STORAGE_AFTER_DAYS,
+                             batch_size: int = COLD_STORAGE_BATCH_SIZE) -> Dict[str, int]:
+    """Move every eligible tender to cold storage, committing after each batch."""
+    require_stable_ids(db)
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = 0
+    while True:
+        rows = finished_tenders(db, cutoff, batch_size)
+        if not rows:
+            break
+        for year, ids in by_year(rows).items():
+            _move_with_dependants(db, models.Tender.__table__, models.Tender.tender_id.in_(ids), year, set())
+        db.commit()
+        total += len(rows)
+    return {"tenders": total}
+
+
+cold_storage = PeriodicArchiveJob("cold-storage", archive_finished_tenders, COLD_STORAGE_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    with SessionLocal() as session:
+        print(archive_finished_tenders(session, int(sys.argv[1]) if len(sys.argv) > 1 else COLD_STORAGE_AFTER_DAYS))
@@ -0,0 +1,116 @@
+"""
+EMD settlement after award.
+
+Once a tender is awarded, every losing vendor's paid (COMPLETED) EMD is
+refunded. All of them are moved to REFUNDED by one UPDATE that also stamps a
+`refund_batch` id; the refund batch file for finance is then exported from
+the rows carrying that id, so it can be regenerated at any time.
+
+Only COMPLETED EMDs of AWARDED tenders whose vendor did not win are touched,
+so running the job again is a no-op. To settle every awarded tender:
+
+    python -m backend.services.emd_settlement
+"""
+import csv
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+REFUND_DIR = "uploads/refunds"
+
+BATCH_FILE_HEADER = ["emd_id", "tender_id", "vendor_id", "company_name", "transaction_id", "amount"]
+
+
+def mark_refunds(db: Session, tender_id: Optional[int] = None) -> Optional[str]:
+    """
+    Move losing vendors' COMPLETED EMDs to REFUNDED in one statement, without committing.
+
+    Limited to one tender when `tender_id` is given, otherwise covers every
+    awarded tender. Returns the refund batch id, or None if nothing was refunded.
+    """
+    awarded_tenders = select(models.Tender.tender_id).where(models.Tender.status == models.TenderStatus.AWARDED)
+    if tender_id is not None:
+        awarded_tenders = awarded_tenders.where(models.Tender.tender_id == tender_id)
+    vendor_won = exists().where(
+        models.Bid.tender_id == models.EMD.tender_id,
+        models.Bid.vendor_id == models.EMD.vendor_id,
+        models.Bid.bid_status == models.BidStatus.AWARDED
+    )
+
+    batch_id = f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    result = db.execute(
+        update(models.EMD)
+        .where(
+            models.EMD.status == models.PaymentStatus.COMPLETED,
+            models.EMD.tender_id.in_(awarded_tenders),
+            ~vendor_won
+        )
+        .values(status=models.PaymentStatus.REFUNDED, refund_batch=batch_id)
+        .execution_options(synchronize_session=False)
+    )
+    return batch_id if result.rowcount else None
+
+
+def write_refund_batch_file(db: Session, batch_id: str, directory: str = REFUND_DIR) -> str:
+    """Export the EMDs of a refund batch to a CSV file and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"refund_batch_{batch_id}.csv")
+    rows = db.execute(
+        select(
+            models.EMD.emd_id, models.EMD.tender_id, models.EMD.vendor_id,
+            models.Vendor.company_name, models.EMD.transaction_id, models.EMD.amount
+        )
+        .join(models.Vendor, models.EMD.vendor_id == models.Vendor.vendor_id)
+        .where(models.EMD.refund_batch == batch_id)
+        .order_by(models.EMD.emd_id)
+        .execution_options(yield_per=1000)
+    )
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(BATCH_FILE_HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def batch_summary(db: Session, batch_id: Optional[str]) -> dict:
+    if not batch_id:
+        return {"batch_id": None, "refunded": 0, "total_amount": 0.0}
+    count, total = db.execute(
+        select(func.count(models.EMD.emd_id), func.coalesce(func.sum(models.EMD.amount), 0))
+        .where(models.EMD.refund_batch == batch_id)
+    ).one()
+    return {"batch_id": batch_id, "refunded": count, "total_amount": float(total)}
+
+
+def export_after_commit(db: Session, batch_id: Optional[str]) -> None:
+    """Write the batch file for a committed batch; failures are logged, the batch can be re-exported."""
+    if not batch_id:
+        return
+    try:
+        write_refund_batch_file(db, batch_id)
+    except Exception:
+        logger.exception("Could not write refund batch file %s", batch_id)
+
+
+def settle_emds(db: Session, tender_id: Optional[int] = None) -> dict:
+    """Refund losing EMDs (of one tender, or all awarded tenders), commit and export the batch."""
+    batch_id = mark_refunds(db, tender_id)
+    db.commit()
+    export_after_commit(db, batch_id)
+    return batch_summary(db, batch_id)
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal
+    with SessionLocal() as session:
+        print(settle_emds(session, int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,528 @@
+"""
+Email delivery through an outbox table.
+
+Nothing talks to SMTP while handling a request. New-tender alerts and award
+notices are queued in `email_outbox` by the notification fan-out, in the
+same transaction as the in-app notifications (see services/notifications.py),
+and deadline reminders are queued by the sender itself. `email_outbox`, an
+asyncio task in the app, then sends them:
+
+* Each round takes the `EMAIL_BATCH_SIZE` recipients with the oldest due
+  emails and sends one message per recipient over a pool of at most
+  `EMAIL_SMTP_CONNECTIONS` SMTP connections, kept open between rounds, so a
+  busy minute costs a handful of connections instead of one per email.
+* Everything pending for a recipient goes out together: several emails
+  become one digest. New-tender alerts wait `EMAIL_DIGEST_SECONDS` before
+  they are due, so alerts for tenders published close together (or with an
+  award notice) share a digest.
+* A failed send is retried after `EMAIL_RETRY_SECONDS`, doubling per
+  attempt up to `EMAIL_RETRY_MAX_SECONDS`; after `EMAIL_MAX_ATTEMPTS`, or on
+  a permanent (5xx) SMTP error, the emails are marked failed.
+* Every `EMAIL_REMINDER_INTERVAL_SECONDS` it queues a reminder for each open
+  tender closing within `EMAIL_REMINDER_HOURS` to the category subscribers
+  that have not bid yet (once per tender and vendor), and deletes sent and
+  failed emails older than `EMAIL_KEEP_DAYS`.
+
+Rounds are guarded by a lease, so with several app workers only one sends
+at a time. Delivery is at least once: emails sent just before a crash are
+sent again.
+
+Email is off unless `EMAIL_SMTP_HOST` is set; then nothing is queued and the
+sender does not start. Sending needs the optional `aiosmtplib` package. For
+local testing, run the bundled sink and point the app at it:
+
+    python -m backend.services.mailer sink [port]
+    EMAIL_SMTP_HOST=localhost EMAIL_SMTP_PORT=1025 EMAIL_SMTP_SECURITY=none uvicorn backend.main:app
+
+To send the due emails once by hand:
+
+    python -m backend.services.mailer send
+"""
+import asyncio
+import logging
+import os
+import socket
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, String, Text, delete, exists, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+try:
+    import aiosmtplib
+except ImportError:  # optional
+    aiosmtplib = None
+
+from .. import models
+from ..database import AsyncSessionLocal
+from .scheduler import acquire_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+EMAIL_SMTP_HOST = os.getenv("EMAIL_SMTP_HOST", "")
+EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT", "587"))
+EMAIL_SMTP_USERNAME = os.getenv("EMAIL_SMTP_USERNAME") or None
+EMAIL_SMTP_PASSWORD = os.getenv("EMAIL_SMTP_PASSWORD") or None
+# "starttls", "tls" (implicit, usually port 465) or "none"
+EMAIL_SMTP_SECURITY = os.getenv("EMAIL_SMTP_SECURITY", "starttls")
+EMAIL_SMTP_TIMEOUT = float(os.getenv("EMAIL_SMTP_TIMEOUT", "30"))
+EMAIL_SMTP_CONNECTIONS = int(os.getenv("EMAIL_SMTP_CONNECTIONS", "4"))
+# Pooled connections idle longer than this are closed rather than reused
+EMAIL_SMTP_IDLE_SECONDS = float(os.getenv("EMAIL_SMTP_IDLE_SECONDS", "60"))
+EMAIL_FROM = os.getenv("EMAIL_FROM", "e-Tender <no-reply@localhost>")
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "200"))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "5"))
+EMAIL_DIGEST_SECONDS = int(os.getenv("EMAIL_DIGEST_SECONDS", "600"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_SECONDS = int(os.getenv("EMAIL_RETRY_SECONDS", "60"))
+EMAIL_RETRY_MAX_SECONDS = int(os.getenv("EMAIL_RETRY_MAX_SECONDS", "21600"))
+EMAIL_REMINDER_HOURS = int(os.getenv("EMAIL_REMINDER_HOURS", "24"))
+EMAIL_REMINDER_INTERVAL_SECONDS = int(os.getenv("EMAIL_REMINDER_INTERVAL_SECONDS", "900"))
+EMAIL_KEEP_DAYS = int(os.getenv("EMAIL_KEEP_DAYS", "30"))
+
+EMAIL_ENABLED = bool(EMAIL_SMTP_HOST)
+
+LEASE_NAME = "email-outbox"
+
+# Email kinds
+TENDER_PUBLISHED = "tender_published"
+TENDER_AWARDED = "tender_awarded"
+DEADLINE_REMINDER = "deadline_reminder"
+NOTICE = "notice"
+
+# Kinds held back for EMAIL_DIGEST_SECONDS so that they can be combined
+DIGEST_KINDS = {TENDER_PUBLISHED}
+
+
+# --- queueing (runs in the caller's transaction) ---
+def queue_emails(
+    db: Session,
+    user_ids: Iterable[int],
+    kind: str,
+    subject: str,
+    body: str,
+    tender_id: Optional[int] = None,
+) -> None:
+    """Queue the same email for each user in `user_ids`; the caller commits."""
+    user_ids = list(user_ids)
+    if not EMAIL_ENABLED or not user_ids:
+        return
+    due = datetime.utcnow() + timedelta(seconds=EMAIL_DIGEST_SECONDS if kind in DIGEST_KINDS else 0)
+    outbox = models.EmailOutbox
+    db.execute(insert(outbox).from_select(
+        ["user_id", "to_address", "kind", "tender_id", "subject", "body", "next_attempt_at"],
+        select(
+            models.User.user_id,
+            models.User.email,
+            literal(kind, String),
+            literal(tender_id, Integer),
+            literal(subject[:255], String),
+            literal(body, Text),
+            literal(due, DateTime),
+        ).where(models.User.user_id.in_(user_ids))
+    ))
+
+
+def queue_deadline_reminders(db: Session, hours: int = EMAIL_REMINDER_HOURS, now: Optional[datetime] = None) -> int:
+    """
+    Queue a reminder for every open tender closing within `hours`, to each
+    vendor subscribed to its category that has not bid on it. Each vendor is
+    reminded once per tender. Returns the number of reminders queued.
+    """
+    now = now or datetime.utcnow()
+    outbox = models.EmailOutbox
+    tender = models.Tender
+    rows = db.execute(
+        select(models.User.user_id, models.User.email, tender.tender_id, tender.tender_number,
+               tender.title, tender.submission_deadline)
+        .join(models.Vendor, models.Vendor.user_id == models.User.user_id)
+        .join(models.VendorCategory, models.VendorCategory.vendor_id == models.Vendor.vendor_id)
+        .join(tender, tender.category_id == models.VendorCategory.category_id)
+        .where(
+            tender.status == models.TenderStatus.OPEN,
+            tender.submission_deadline > now,
+            tender.submission_deadline <= now + timedelta(hours=hours),
+            ~exists().where(models.Bid.tender_id == tender.tender_id, models.Bid.vendor_id == models.Vendor.vendor_id),
+            ~exists().where(
+                outbox.tender_id == tender.tender_id,
+                outbox.kind == DEADLINE_REMINDER,
+                outbox.user_id == models.User.user_id,
+            ),
+        )
+    ).all()
+    if rows:
+        db.execute(insert(outbox), [{
+            "user_id": user_id,
+            "to_address": address,
+            "kind": DEADLINE_REMINDER,
+            "tender_id": tender_id,
+            "subject": f"Reminder: tender {number} closes on {deadline:%d %b %Y %H:%M} UTC"[:255],
+            "body": f"Bids for tender {number}: {title} close on {deadline:%d %b %Y %H:%M} UTC. "
+                    f"You have not submitted a bid yet.",
+            "next_attempt_at": now,
+        } for user_id, address, tender_id, number, title, deadline in rows])
+    db.commit()
+    return len(rows)
+
+
+def purge_outbox(db: Session, older_than_days: int = EMAIL_KEEP_DAYS) -> int:
+    """Delete sent and failed emails whose last attempt is older than `older_than_days`."""
+    outbox = models.EmailOutbox
+    result = db.execute(delete(outbox).where(
+        outbox.status.in_([models.EmailStatus.SENT, models.EmailStatus.FAILED]),
+        outbox.next_attempt_at < datetime.utcnow() - timedelta(days=older_than_days),
+    ))
+    db.commit()
+    return result.rowcount
+
+
+# --- messages ---
+def build_message(address: str, emails: List[models.EmailOutbox], sender: str = EMAIL_FROM) -> EmailMessage:
+    """One message for everything queued for `address`: the email itself, or a digest of several."""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = address
+    if len(emails) == 1:
+        message["Subject"] = emails[0].subject
+        message.set_content(emails[0].body)
+    else:
+        message["Subject"] = f"e-Tender: {len(emails)} updates"
+        message.set_content("\n\n".join(f"{email.subject}\n{email.body}" for email in emails))
+    return message
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies (unknown mailbox, rejected message) will not succeed on a retry."""
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+# --- sending ---
+class SmtpPool:
+    """Up to `size` SMTP connections, kept open and reused between sends."""
+
+    def __init__(
+        self,
+        host: str = EMAIL_SMTP_HOST,
+        port: int = EMAIL_SMTP_PORT,
+        username: Optional[str] = EMAIL_SMTP_USERNAME,
+        password: Optional[str] = EMAIL_SMTP_PASSWORD,
+        security: str = EMAIL_SMTP_SECURITY,
+        timeout: float = EMAIL_SMTP_TIMEOUT,
+        size: int = EMAIL_SMTP_CONNECTIONS,
+        idle_seconds: float = EMAIL_SMTP_IDLE_SECONDS,
+    ):
+        if aiosmtplib is None:
+            raise RuntimeError("EMAIL_SMTP_HOST is set but the aiosmtplib package is not installed")
+        if security not in ("starttls", "tls", "none"):
+            raise ValueError(f"EMAIL_SMTP_SECURITY must be starttls, tls or none, not {security!r}")
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.security = security
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[Tuple["aiosmtplib.SMTP", float]] = []  # (connection, last used)
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.security == "tls",
+            start_tls=self.security == "starttls",
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return client
+
+    def _take_idle(self) -> Optional["aiosmtplib.SMTP"]:
+        now = time.monotonic()
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and now - last_used < self.idle_seconds:
+                return client
+            client.close()
+        return None
+
+    async def send(self, message: EmailMessage) -> None:
+        async with self._slots:
+            client = self._take_idle()
+            try:
+                if client is None:
+                    client = await self._connect()
+                try:
+                    await client.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server dropped a pooled connection; one retry on a fresh one
+                    client.close()
+                    client = await self._connect()
+                    await client.send_message(message)
+            except aiosmtplib.SMTPResponseException:
+                self._idle.append((client, time.monotonic()))  # refused message, connection still fine
+                raise
+            except Exception:
+                if client is not None:
+                    client.close()
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class EmailOutboxSender:
+    """Asyncio task sending the outbox in rounds, under a lease."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        transport=None,
+        batch_size: int = EMAIL_BATCH_SIZE,
+        poll_seconds: float = EMAIL_POLL_SECONDS,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        reminder_interval: int = EMAIL_REMINDER_INTERVAL_SECONDS,
+        lease_ttl: int = 300,
+    ):
+        self.session_factory = session_factory
+        self.transport = transport  # anything with async send(message) / close(); an SmtpPool by default
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.reminder_interval = reminder_interval
+        self.lease_ttl = lease_ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._next_housekeeping = 0.0
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not EMAIL_ENABLED or self._task:
+            return
+        if self.transport is None:
+            self.transport = SmtpPool()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let the current round finish, then close the SMTP connections."""
+        if self._task:
+            self._stopping.set()
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Email sender did not finish its round in %ss", timeout)
+            self._task = None
+        if self.transport is not None:
+            await self.transport.close()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                recipients = await self.run_once()
+            except Exception:
+                logger.exception("Email outbox round failed")
+                recipients = 0
+            if recipients < self.batch_size:  # a full round means more is waiting
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """One round: reminders and purge when due, then one batch. Returns the number of recipients sent to."""
+        async with self.session_factory() as db:
+            if not await db.run_sync(acquire_lease, LEASE_NAME, self.holder, self.lease_ttl):
+                return 0
+            try:
+                if time.monotonic() >= self._next_housekeeping:
+                    self._next_housekeeping = time.monotonic() + self.reminder_interval
+                    reminders = await db.run_sync(queue_deadline_reminders)
+                    purged = await db.run_sync(purge_outbox)
+                    if reminders or purged:
+                        logger.info("Queued %d deadline reminders, purged %d old emails", reminders, purged)
+                return await self._send_batch(db)
+            finally:
+                await db.run_sync(release_lease, LEASE_NAME, self.holder)
+
+    async def _send_batch(self, db: AsyncSession) -> int:
+        outbox = models.EmailOutbox
+        now = datetime.utcnow()
+        addresses = (await db.execute(
+            select(outbox.to_address)
+            .where(outbox.status == models.EmailStatus.PENDING, outbox.next_attempt_at <= now)
+            .group_by(outbox.to_address)
+            .order_by(func.min(outbox.next_attempt_at))
+            .limit(self.batch_size)
+        )).scalars().all()
+        if not addresses:
+            return 0
+        # Whatever else is pending for these recipients joins the digest, unless it is waiting for a retry
+        emails = (await db.execute(
+            select(outbox)
+            .where(
+                outbox.to_address.in_(addresses),
+                outbox.status == models.EmailStatus.PENDING,
+                or_(outbox.next_attempt_at <= now, outbox.attempts == 0),
+            )
+            .order_by(outbox.created_at, outbox.email_id)
+        )).scalars().all()
+        by_address: Dict[str, List[models.EmailOutbox]] = defaultdict(list)
+        for email in emails:
+            by_address[email.to_address].append(email)
+
+        errors = await asyncio.gather(*(self._send(address, queued) for address, queued in by_address.items()))
+
+        sent_ids, retries = [], []
+        for (address, queued), error in zip(by_address.items(), errors):
+            if error is None:
+                sent_ids += [email.email_id for email in queued]
+                continue
+            logger.warning("Sending %d email(s) to %s failed: %s", len(queued), address, error)
+            for email in queued:
+                attempts = email.attempts + 1
+                failed = is_permanent(error) or attempts >= self.max_attempts
+                backoff = min(EMAIL_RETRY_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+                retries.append({
+                    "email_id": email.email_id,
+                    "attempts": attempts,
+                    "status": models.EmailStatus.FAILED if failed else models.EmailStatus.PENDING,
+                    "next_attempt_at": now + timedelta(seconds=backoff),
+                    "last_error": str(error)[:1000],
+                })
+        if sent_ids:
+            await db.execute(
+                update(outbox).where(outbox.email_id.in_(sent_ids))
+                .values(status=models.EmailStatus.SENT, sent_at=datetime.utcnow())
+            )
+        if retries:
+            await db.execute(update(outbox), retries)
+        await db.commit()
+        return len(by_address)
+
+    async def _send(self, address: str, emails: List[models.EmailOutbox]) -> Optional[Exception]:
+        try:
+            await self.transport.send(build_message(address, emails))
+        except Exception as exc:
+            return exc
+        return None
+
+
+email_outbox = EmailOutboxSender()
+
+
+# --- local SMTP sink ---
+class SmtpSink:
+    """
+    Minimal SMTP server for local testing: accepts every message and appends
+    it to `path` in mbox format. No TLS and no authentication; use it with
+    EMAIL_SMTP_SECURITY=none and no username.
+    """
+
+    def __init__(self, path: str = "uploads/mail/sink.mbox"):
+        self.path = path
+        self.received = 0
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 1025) -> None:
+        server = await asyncio.start_server(self._handle, host, port)
+        logger.info("SMTP sink listening on %s:%d, writing to %s", host, port, self.path)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 e-tender SMTP sink")
+        sender, recipients = None, []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            verb = line.decode("utf-8", "replace").strip()[:4].upper()
+            if verb == "EHLO":
+                reply("250-e-tender sink")
+                reply("250-8BITMIME")
+                reply("250 SMTPUTF8")
+            elif verb == "HELO":
+                reply("250 e-tender sink")
+            elif verb == "MAIL":
+                sender, recipients = line.decode("utf-8", "replace").strip()[10:], []
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(line.decode("utf-8", "replace").strip()[8:])
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                data = []
+                while True:
+                    chunk = await reader.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                self._store(sender, recipients, b"".join(data))
+                sender, recipients = None, []
+                reply("250 OK: queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                reply("250 OK")
+            elif verb == "NOOP":
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 Command not implemented")
+            await writer.drain()
+        writer.close()
+
+    def _store(self, sender: Optional[str], recipients: List[str], data: bytes) -> None:
+        self.received += 1
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(f"From {sender or 'MAILER-DAEMON'} {datetime.utcnow():%a %b %d %H:%M:%S %Y}\n".encode())
+            f.write(data.replace(b"\r\n", b"\n"))
+            f.write(b"\n")
+        logger.info("Received message %d for %s", self.received, ", ".join(recipients))
+
+
+async def _send_due() -> int:
+    if not EMAIL_ENABLED:
+        sys.exit("EMAIL_SMTP_HOST is not set")
+    sender = EmailOutboxSender(transport=SmtpPool())
+    total = 0
+    try:
+        while True:
+            recipients = await sender.run_once()
+            total += recipients
+            if recipients < sender.batch_size:
+                return total
+    finally:
+        await sender.transport.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:2] == ["sink"] and len(sys.argv) <= 3:
+        asyncio.run(SmtpSink().serve(port=int(sys.argv[2]) if len(sys.argv) == 3 else 1025))
+    elif sys.argv[1:] == ["send"]:
+        print(asyncio.run(_send_due()))
+    else:
+        sys.exit("usage: python -m backend.services.mailer sink [port] | send")
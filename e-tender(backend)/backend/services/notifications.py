@@ -0,0 +1,256 @@
+"""
+Notification fan-out.
+
+When a tender is published or awarded, every vendor subscribed to its
+category (`vendor_categories`) and every vendor that bid on it gets a
+`Notification`. A popular category can have thousands of subscribers, so the
+request does not write them: after its commit it only hands a
+`NotificationEvent` to `notifier`, and a background thread
+
+* computes the recipients with one set-based query (subscribers UNION
+  bidders, so a subscribed bidder is notified once), and
+* bulk-inserts the notifications `NOTIFICATION_CHUNK_SIZE` rows per
+  executemany, committing after each chunk so no transaction holds many
+  rows' worth of locks.
+
+Each chunk also queues the matching emails in `email_outbox`, in the same
+transaction (see services/mailer.py).
+
+The queue lives in the worker process and holds at most
+`NOTIFICATION_QUEUE_SIZE` events; `stop()` delivers whatever is still queued
+before the app shuts down.
+
+Unread counts for the navbar come from `notification_counters`, one row per
+user, bumped in the same transaction that inserts or marks notifications
+read, so reading a count is a primary-key lookup however many notifications
+a user has. `unread_counts` caches the counts in the process for
+`NOTIFICATION_COUNT_TTL` seconds and applies this worker's own changes to
+the cached values; changes made by other workers show up once an entry
+expires.
+
+To deliver an event, or recompute every counter from the notifications
+table, by hand:
+
+    python -m backend.services.notifications send <tender_id> <message>
+    python -m backend.services.notifications rebuild-counters
+"""
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, union, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from . import mailer
+from .analytics import increment_rows
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_CHUNK_SIZE = int(os.getenv("NOTIFICATION_CHUNK_SIZE", "1000"))
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_COUNT_TTL = float(os.getenv("NOTIFICATION_COUNT_TTL", "30"))
+
+
+@dataclass(frozen=True)
+class NotificationEvent:
+    tender_id: int
+    message: str
+    kind: str = mailer.NOTICE
+    subject: str = "e-Tender notice"
+
+
+def tender_published(tender: models.Tender) -> NotificationEvent:
+    return NotificationEvent(
+        tender.tender_id,
+        f"New tender {tender.tender_number}: {tender.title}. "
+        f"Bids close on {tender.submission_deadline:%d %b %Y %H:%M} UTC.",
+        mailer.TENDER_PUBLISHED,
+        f"New tender {tender.tender_number}: {tender.title}",
+    )
+
+
+def tender_awarded(tender: models.Tender) -> NotificationEvent:
+    return NotificationEvent(
+        tender.tender_id,
+        f"Tender {tender.tender_number}: {tender.title} has been awarded.",
+        mailer.TENDER_AWARDED,
+        f"Tender {tender.tender_number} awarded",
+    )
+
+
+def recipients(tender_id: int):
+    """User ids of the vendors subscribed to the tender's category or bidding on it, each once."""
+    subscribers = (
+        select(models.Vendor.user_id)
+        .join(models.VendorCategory, models.VendorCategory.vendor_id == models.Vendor.vendor_id)
+        .join(models.Tender, models.Tender.category_id == models.VendorCategory.category_id)
+        .where(models.Tender.tender_id == tender_id)
+    )
+    bidders = (
+        select(models.Vendor.user_id)
+        .join(models.Bid, models.Bid.vendor_id == models.Vendor.vendor_id)
+        .where(models.Bid.tender_id == tender_id)
+    )
+    return union(subscribers, bidders)
+
+
+# --- unread counters ---
+class UnreadCounts:
+    """Per-process cache of unread counts, each entry valid for `ttl` seconds."""
+
+    def __init__(self, ttl: float = NOTIFICATION_COUNT_TTL):
+        self.ttl = ttl
+        self._counts: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()  # the fan-out thread updates it too
+
+    def get(self, user_id: int) -> Optional[int]:
+        entry = self._counts.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, user_id: int, count: int) -> None:
+        with self._lock:
+            self._counts[user_id] = (count, time.monotonic() + self.ttl)
+
+    def adjust(self, user_ids: Iterable[int], delta: int) -> None:
+        """Apply a committed change to the cached counts; uncached users are left to the next read."""
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._counts.get(user_id)
+                if entry is not None:
+                    self._counts[user_id] = (max(entry[0] + delta, 0), entry[1])
+
+
+unread_counts = UnreadCounts()
+
+
+def unread_count_query(user_id: int):
+    return select(models.NotificationCounter.unread).where(models.NotificationCounter.user_id == user_id)
+
+
+def subtract_unread(user_id: int, count: int):
+    """Statement taking `count` notifications just marked read off the user's counter."""
+    return (
+        update(models.NotificationCounter)
+        .where(models.NotificationCounter.user_id == user_id)
+        .values(unread=models.NotificationCounter.unread - count)
+    )
+
+
+def rebuild_counters(db: Session) -> int:
+    """Recompute every counter from the notifications table. Returns the number of users with unread ones."""
+    db.execute(delete(models.NotificationCounter))
+    db.execute(insert(models.NotificationCounter).from_select(
+        ["user_id", "unread"],
+        select(models.Notification.user_id, func.count())
+        .where(models.Notification.is_read == False)
+        .group_by(models.Notification.user_id)
+    ))
+    db.commit()
+    return db.scalar(select(func.count()).select_from(models.NotificationCounter))
+
+
+def fan_out(db: Session, event: NotificationEvent, chunk_size: int = NOTIFICATION_CHUNK_SIZE) -> int:
+    """
+    Insert one notification per recipient of `event`, committing every `chunk_size` rows.
+
+    Each chunk bumps its recipients' unread counters and queues their emails
+    in the same transaction.
+    """
+    user_ids = db.execute(recipients(event.tender_id)).scalars().all()
+    now = datetime.utcnow()
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        db.execute(
+            insert(models.Notification),
+            [{"user_id": user_id, "message": event.message, "is_read": False, "created_at": now} for user_id in chunk],
+        )
+        increment_rows(db, models.NotificationCounter, [{"user_id": user_id, "unread": 1} for user_id in chunk], ["unread"])
+        mailer.queue_emails(db, chunk, event.kind, event.subject, event.message, event.tender_id)
+        db.commit()
+        unread_counts.adjust(chunk, 1)
+    return len(user_ids)
+
+
+class NotificationFanout:
+    """Background thread delivering queued `NotificationEvent`s."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        chunk_size: int = NOTIFICATION_CHUNK_SIZE,
+        max_queued: int = NOTIFICATION_QUEUE_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self._queue: "queue.Queue[Optional[NotificationEvent]]" = queue.Queue(max_queued)
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, event: NotificationEvent) -> None:
+        """Queue `event` without blocking; call it only after the triggering change is committed."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.error("Notification queue full, dropping event for tender %s", event.tender_id)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="notification-fanout", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Deliver the events still queued, then stop the thread."""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+        else:
+            self.drain()
+
+    def drain(self) -> None:
+        """Deliver every queued event on the calling thread."""
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if event is not None:
+                self.deliver(event)
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            self.deliver(event)
+
+    def deliver(self, event: NotificationEvent) -> None:
+        try:
+            with self.session_factory() as db:
+                sent = fan_out(db, event, self.chunk_size)
+            logger.info("Sent %d notifications for tender %s", sent, event.tender_id)
+        except Exception:
+            logger.exception("Notification fan-out for tender %s failed", event.tender_id)
+
+
+notifier = NotificationFanout()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild-counters"] and (sys.argv[1:2] != ["send"] or len(sys.argv) < 4):
+        sys.exit("usage: python -m backend.services.notifications send <tender_id> <message> | rebuild-counters")
+    with SessionLocal() as session:
+        if sys.argv[1] == "send":
+            print(fan_out(session, NotificationEvent(int(sys.argv[2]), " ".join(sys.argv[3:]))))
+        else:
+            print(rebuild_counters(session))
@@ -0,0 +1,232 @@
+"""
+Bank-statement reconciliation for Payments and EMDs.
+
+The statement CSV is read as a stream, one line at a time, and matched
+against an in-memory index of PENDING payments and EMDs keyed by
+`transaction_id`. Memory use depends on the number of pending records, not
+on the size of the statement. A transaction id can be shared (by a payment
+and an EMD, say): a line naming it reconciles the one record whose amount
+matches, and is reported for every candidate when that is not exactly one. Matches are marked COMPLETED in batches with
+one UPDATE per batch, and every line that does not reconcile (plus every
+pending record the statement never mentions) is written to a mismatch
+report CSV as it is found.
+"""
+import csv
+import io
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+
+BATCH_SIZE = 1000
+AMOUNT_TOLERANCE = 0.005
+
+REPORT_HEADER = ["line", "transaction_id", "kind", "record_id", "statement_amount", "expected_amount", "issue"]
+
+
+class ReconciliationError(Exception):
+    """Raised when the statement file cannot be parsed."""
+
+
+class _Pending(NamedTuple):
+    kind: str  # "payment" or "emd"
+    record_id: int
+    amount: float
+
+
+@dataclass
+class ReconciliationSummary:
+    lines: int = 0
+    matched_payments: int = 0
+    matched_emds: int = 0
+    mismatches: int = 0
+    not_in_statement: int = 0
+
+
+def _pending_index(db: Session, institute_id: int) -> Dict[str, List[_Pending]]:
+    """transaction_id -> pending records carrying it, for the institute's payments and EMDs."""
+    index: Dict[str, List[_Pending]] = defaultdict(list)
+
+    payments = db.execute(
+        select(models.Payment.transaction_id, models.Payment.payment_id, models.Payment.amount)
+        .join(models.Award, models.Payment.award_id == models.Award.award_id)
+        .join(models.Bid, models.Award.bid_id == models.Bid.bid_id)
+        .join(models.Tender, models.Bid.tender_id == models.Tender.tender_id)
+        .join(models.Department, models.Tender.dept_id == models.Department.dept_id)
+        .where(
+            models.Department.institute_id == institute_id,
+            models.Payment.status == models.PaymentStatus.PENDING,
+            models.Payment.transaction_id.isnot(None)
+        )
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for transaction_id, payment_id, amount in payments:
+        index[transaction_id.strip()].append(_Pending("payment", payment_id, amount))
+
+    emds = db.execute(
+        select(models.EMD.transaction_id, models.EMD.emd_id, models.EMD.amount)
+        .join(models.Tender, models.EMD.tender_id == models.Tender.tender_id)
+        .join(models.Department, models.Tender.dept_id == models.Department.dept_id)
+        .where(
+            models.Department.institute_id == institute_id,
+            models.EMD.status == models.PaymentStatus.PENDING,
+            models.EMD.transaction_id.isnot(None)
+        )
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for transaction_id, emd_id, amount in emds:
+        index[transaction_id.strip()].append(_Pending("emd", emd_id, amount))
+
+    return index
+
+
+def _mark_completed(db: Session, kind: str, record_ids: List[int]) -> None:
+    model, pk = (models.Payment, models.Payment.payment_id) if kind == "payment" else (models.EMD, models.EMD.emd_id)
+    db.execute(
+        update(model)
+        .where(pk.in_(record_ids), model.status == models.PaymentStatus.PENDING)
+        .values(status=models.PaymentStatus.COMPLETED)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _rows(reader, start: int):
+    """`enumerate(reader, start)`, turning csv.Error into ReconciliationError with the line it was found on."""
+    line_number = start
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise ReconciliationError(f"Line {reader.line_num} could not be parsed: {e}")
+        yield line_number, row
+        line_number += 1
+
+
+def _columns(header: List[str]) -> Dict[str, int]:
+    """Map the statement's header row to the columns we need (case-insensitive)."""
+    positions = {name.strip().lower(): i for i, name in enumerate(header)}
+    aliases = {
+        "transaction_id": ("transaction_id", "transaction id", "txn_id", "reference", "utr"),
+        "amount": ("amount", "credit", "credit_amount"),
+    }
+    found = {}
+    for column, names in aliases.items():
+        match = next((positions[name] for name in names if name in positions), None)
+        if match is None:
+            raise ReconciliationError(f"Statement has no '{column}' column")
+        found[column] = match
+    return found
+
+
+def _decoded_lines(statement: BinaryIO) -> Iterator[str]:
+    """The statement's lines as text, decoded one at a time so an encoding error names its line."""
+    for number, raw in enumerate(statement, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise ReconciliationError(f"Line {number} is not valid UTF-8; export the statement as UTF-8 CSV")
+
+
+def reconcile_statement(
+    db: Session,
+    statement: BinaryIO,
+    institute_id: int,
+    report: io.TextIOBase,
+    batch_size: int = BATCH_SIZE,
+) -> ReconciliationSummary:
+    """
+    Stream `statement` (CSV bytes), update matched records, write mismatches to `report`.
+
+    Raises `ReconciliationError` for a statement that is not UTF-8 CSV. Batches
+    matched before the bad line stay committed; running the statement again
+    only touches records that are still pending.
+    """
+    index = _pending_index(db, institute_id)
+    summary = ReconciliationSummary()
+    writer = csv.writer(report)
+    writer.writerow(REPORT_HEADER)
+
+    def mismatch(line: int, transaction_id: str, issue: str, pending: Optional[_Pending] = None, amount=""):
+        summary.mismatches += 1
+        writer.writerow([
+            line, transaction_id,
+            pending.kind if pending else "", pending.record_id if pending else "",
+            amount, pending.amount if pending else "", issue
+        ])
+
+    reader = csv.reader(_decoded_lines(statement))
+    try:
+        columns = _columns(next(reader))
+    except StopIteration:
+        raise ReconciliationError("Statement is empty")
+    except csv.Error as e:
+        raise ReconciliationError(f"Line {reader.line_num} could not be parsed: {e}")
+
+    batches: Dict[str, List[int]] = {"payment": [], "emd": []}
+    for line_number, row in _rows(reader, start=2):
+        summary.lines += 1
+        try:
+            transaction_id = row[columns["transaction_id"]].strip()
+            raw_amount = row[columns["amount"]].strip()
+        except IndexError:
+            mismatch(line_number, "", "Malformed line")
+            continue
+        if not transaction_id:
+            mismatch(line_number, "", "Missing transaction id", amount=raw_amount)
+            continue
+
+        candidates = index.pop(transaction_id, None)
+        if candidates is None:
+            mismatch(line_number, transaction_id, "Unknown or already reconciled transaction", amount=raw_amount)
+            continue
+        try:
+            amount = float(raw_amount.replace(",", ""))
+        except ValueError:
+            for pending in candidates:
+                mismatch(line_number, transaction_id, "Invalid amount", pending, raw_amount)
+            continue
+        if len(candidates) == 1:
+            pending = candidates[0]
+            if abs(amount - pending.amount) > AMOUNT_TOLERANCE:
+                mismatch(line_number, transaction_id, "Amount mismatch", pending, raw_amount)
+                continue
+        else:
+            matching = [c for c in candidates if abs(amount - c.amount) <= AMOUNT_TOLERANCE]
+            if len(matching) != 1:
+                issue = f"Transaction id shared by {len(candidates)} pending records"
+                for pending in candidates:
+                    mismatch(line_number, transaction_id, issue, pending, raw_amount)
+                continue
+            pending = matching[0]
+            # The others may still be paid by a later line with the same id
+            index[transaction_id] = [c for c in candidates if c is not pending]
+
+        batch = batches[pending.kind]
+        batch.append(pending.record_id)
+        if pending.kind == "payment":
+            summary.matched_payments += 1
+        else:
+            summary.matched_emds += 1
+        if len(batch) >= batch_size:
+            _mark_completed(db, pending.kind, batch)
+            batch.clear()
+
+    for kind, batch in batches.items():
+        if batch:
+            _mark_completed(db, kind, batch)
+
+    # Whatever is left was pending but never showed up on the statement.
+    for transaction_id, candidates in index.items():
+        for pending in candidates:
+            summary.not_in_statement += 1
+            writer.writerow(["", transaction_id, pending.kind, pending.record_id, "", pending.amount, "Not in statement"])
+
+    return summary
+
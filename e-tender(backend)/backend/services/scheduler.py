@@ -0,0 +1,243 @@
+"""
+Tender lifecycle scheduler.
+
+Keeps a min-heap of upcoming `submission_deadline`s for OPEN tenders and
+wakes up exactly when the earliest one passes. At that point every OPEN
+tender whose deadline has passed is moved to EVALUATION with one UPDATE and
+its bids are opened (see `bid_opening`).
+
+Several app workers can run a scheduler each: the transition is guarded by a
+row in `scheduler_leases`, so only the worker holding the lease does the
+work. A worker that finds the lease taken puts the due deadlines back and
+tries again `lease_retry` seconds later, so a tender is never left open
+until the next reload just because another worker held the lease. The heap
+is rebuilt from the database at startup and every `reload_interval`
+seconds, which also picks up tenders created by other workers.
+
+Bids are opened after the lease is released. If that fails, or the worker
+dies in between, the tender is left in EVALUATION with SUBMITTED bids; every
+reload looks for such tenders and opens their bids again.
+"""
+import heapq
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from ..history import bulk_update_with_history
+from . import analytics, bid_opening
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "tender-deadlines"
+
+
+def _as_utc_naive(value: datetime) -> datetime:
+    """Deadlines are stored as naive UTC; normalise aware values the same way."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def acquire_lease(db: Session, name: str, holder: str, ttl_seconds: int) -> bool:
+    """Take (or extend) the named lease. Returns False if another holder has it."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    result = db.execute(
+        update(models.SchedulerLease)
+        .where(
+            models.SchedulerLease.name == name,
+            or_(models.SchedulerLease.expires_at < now, models.SchedulerLease.holder == holder)
+        )
+        .values(holder=holder, expires_at=expires_at)
+    )
+    if result.rowcount == 1:
+        db.commit()
+        return True
+
+    try:
+        db.add(models.SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        # The row exists and is held by someone else.
+        db.rollback()
+        return False
+
+
+def release_lease(db: Session, name: str, holder: str) -> None:
+    db.execute(
+        update(models.SchedulerLease)
+        .where(models.SchedulerLease.name == name, models.SchedulerLease.holder == holder)
+        .values(expires_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def close_due_tenders(db: Session, now: Optional[datetime] = None) -> List[int]:
+    """Move every OPEN tender whose deadline has passed to EVALUATION. Returns their ids."""
+    now = now or datetime.utcnow()
+    due = db.execute(
+        select(models.Tender.tender_id).where(
+            models.Tender.status == models.TenderStatus.OPEN,
+            models.Tender.submission_deadline <= now
+        ).with_for_update()
+    ).scalars().all()
+    if due:
+        bulk_update_with_history(
+            db,
+            models.Tender,
+            [models.Tender.tender_id.in_(due), models.Tender.status == models.TenderStatus.OPEN],
+            {"status": models.TenderStatus.EVALUATION},
+        )
+        analytics.record_bulk_status_change(db, due, models.TenderStatus.OPEN, models.TenderStatus.EVALUATION)
+    db.commit()
+    return list(due)
+
+
+def tenders_awaiting_opening(db: Session) -> List[int]:
+    """Tenders in EVALUATION that still have SUBMITTED bids, i.e. whose bid opening did not finish."""
+    return list(db.execute(
+        select(models.Tender.tender_id).where(
+            models.Tender.status == models.TenderStatus.EVALUATION,
+            models.Tender.submission_deadline <= datetime.utcnow(),
+            models.Tender.bids.any(models.Bid.bid_status == models.BidStatus.SUBMITTED)
+        )
+    ).scalars().all())
+
+
+class TenderDeadlineScheduler:
+    """In-process timer that closes tenders for bidding at their deadline."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        reload_interval: int = 60,
+        lease_ttl: int = 30,
+        lease_retry: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.reload_interval = reload_interval
+        self.lease_ttl = lease_ttl
+        self.lease_retry = lease_retry
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heap: List[Tuple[datetime, int]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._next_reload = datetime.min
+
+    # --- public API ---
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._next_reload = datetime.min  # force a reload on the first iteration
+        self._thread = threading.Thread(target=self._run, name="tender-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def schedule(self, tender_id: int, deadline: datetime) -> None:
+        """Register a tender's deadline, waking the scheduler if it is the earliest one."""
+        entry = (_as_utc_naive(deadline), tender_id)
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] == entry:
+                self._cond.notify()
+
+    def reload(self) -> None:
+        """Rebuild the heap from every OPEN tender in the database."""
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(models.Tender.submission_deadline, models.Tender.tender_id).where(
+                    models.Tender.status == models.TenderStatus.OPEN
+                )
+            ).all()
+        heap = [(_as_utc_naive(deadline), tender_id) for deadline, tender_id in rows]
+        heapq.heapify(heap)
+        with self._cond:
+            self._heap = heap
+            self._cond.notify()
+
+    # --- worker thread ---
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                now = datetime.utcnow()
+                wake_at = self._next_reload
+                if self._heap:
+                    wake_at = min(wake_at, self._heap[0][0])
+                if wake_at > now:
+                    self._cond.wait((wake_at - now).total_seconds())
+                    continue
+                popped = []
+                while self._heap and self._heap[0][0] <= now:
+                    popped.append(heapq.heappop(self._heap))
+                reload_due = self._next_reload <= now
+
+            try:
+                due = bool(popped)
+                if reload_due:
+                    self._next_reload = datetime.utcnow() + timedelta(seconds=self.reload_interval)
+                    self.reload()
+                    due = True  # catch tenders whose deadline passed while we were down
+                if due and not self._advance(reopen=reload_due):
+                    self._retry(popped)
+            except Exception:
+                logger.exception("Tender scheduler iteration failed")
+
+    def _retry(self, entries: List[Tuple[datetime, int]]) -> None:
+        """Put deadlines back for another attempt in `lease_retry` seconds; the lease was taken."""
+        retry_at = datetime.utcnow() + timedelta(seconds=self.lease_retry)
+        with self._cond:
+            for _, tender_id in entries:
+                heapq.heappush(self._heap, (retry_at, tender_id))
+
+    def _advance(self, reopen: bool = False) -> bool:
+        """
+        Close the due tenders under the lease and open their bids, plus those of
+        tenders whose earlier opening did not finish if `reopen` is set.
+        Returns False if another worker holds the lease.
+        """
+        with self.session_factory() as db:
+            if not acquire_lease(db, LEASE_NAME, self.holder, self.lease_ttl):
+                return False
+            try:
+                closed = close_due_tenders(db)
+                unopened = tenders_awaiting_opening(db) if reopen else []
+            finally:
+                release_lease(db, LEASE_NAME, self.holder)
+
+        if closed:
+            logger.info("Moved %d tender(s) to evaluation: %s", len(closed), closed)
+        unopened = [tender_id for tender_id in unopened if tender_id not in closed]
+        if unopened:
+            logger.warning("Reopening bids of tender(s) left in evaluation unopened: %s", unopened)
+        for tender_id in closed + unopened:
+            try:
+                with self.session_factory() as db:
+                    bid_opening.open_tender_bids(db, tender_id)
+            except Exception:
+                logger.exception("Bid opening failed for tender %s", tender_id)
+        return True
+
+
+tender_scheduler = TenderDeadlineScheduler()
@@ -0,0 +1,41 @@
+"""
+Global soft-delete filtering.
+
+Tenders, bids and awards are never DELETEd: a deleted row is flagged with
+`is_deleted` / `deleted_at`, and the archiver (services/archiver.py) moves
+it to the archive tables later. The API has no delete endpoints yet, so
+rows are only flagged outside the app for now. A `do_orm_execute` listener on every Session adds
+`with_loader_criteria(SoftDeleteMixin, is_deleted == False)` to each ORM
+SELECT, so flagged rows disappear from queries, joins and relationship
+loads (`tender.bids` skips deleted bids) without a hand-written filter.
+
+Pass the `INCLUDE_DELETED` execution option to see them anyway:
+
+    db.execute(select(models.Bid).execution_options(**INCLUDE_DELETED))
+    db.get(models.Tender, tender_id, execution_options=INCLUDE_DELETED)
+
+Only SELECTs are filtered. Bulk `update()` / `delete()` statements and Core
+statements run on a Connection still need an explicit
+`Model.is_deleted == False`; `history.bulk_update_with_history` adds it
+for you.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from . import models
+
+INCLUDE_DELETED = {"include_deleted": True}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        not orm_execute_state.is_select
+        # refreshing attributes of an object that is already loaded
+        or orm_execute_state.is_column_load
+        or orm_execute_state.execution_options.get("include_deleted", False)
+    ):
+        return
+    orm_execute_state.statement = orm_execute_state.statement.options(
+        with_loader_criteria(models.SoftDeleteMixin, lambda cls: cls.is_deleted == False, include_aliases=True)
+    )